@@ -0,0 +1,79 @@
+"""
+Curator analytics for a course, served from the trigger-maintained
+aggregates in course_stats / course_item_stats
+(supabase/migrations/0007_course_analytics.sql).
+
+The whole report is one embedded PostgREST query whose size depends on the
+number of questions only, never on how many employees took the course.
+"""
+from typing import Any, Dict, List, Optional
+
+# Labels for course_stats.score_buckets (completed enrollments by quiz score)
+SCORE_BUCKET_LABELS = [f"{i * 10}-{i * 10 + 9}%" for i in range(10)] + ["100%"]
+
+_ANALYTICS_COLUMNS = (
+    "id,title,"
+    "course_stats(enrolled,invited,in_progress,completed,answers,quiz_graded,quiz_correct,score_buckets,updated_at),"
+    "course_items(id,type,prompt,order_index,course_item_stats(answers,quiz_graded,quiz_correct))"
+)
+
+
+def _ratio(part: int, whole: int) -> Optional[float]:
+    return round(part / whole, 4) if whole else None
+
+
+def _one(embedded: Any) -> Dict[str, Any]:
+    """One-to-one embeds come back as an object or a single-element list."""
+    if isinstance(embedded, list):
+        return embedded[0] if embedded else {}
+    return embedded or {}
+
+
+def get_course_analytics(client: Any, course_id: str, owner_id: str) -> Optional[Dict[str, Any]]:
+    """Analytics report for a course owned by owner_id, or None if not found."""
+    result = (
+        client.table("courses")
+        .select(_ANALYTICS_COLUMNS)
+        .eq("id", course_id)
+        .eq("created_by", owner_id)
+        .limit(1)
+        .execute()
+    )
+    if not result.data:
+        return None
+    row = result.data[0]
+    stats = _one(row.get("course_stats"))
+    enrolled = stats.get("enrolled", 0)
+    buckets: List[int] = stats.get("score_buckets") or [0] * len(SCORE_BUCKET_LABELS)
+    completed_scored = sum(buckets)
+
+    questions = []
+    for item in sorted(row.get("course_items") or [], key=lambda r: r["order_index"]):
+        item_stats = _one(item.get("course_item_stats"))
+        questions.append({
+            "questionId": item["id"],
+            "type": item["type"],
+            "prompt": item["prompt"],
+            "answers": item_stats.get("answers", 0),
+            "quizGraded": item_stats.get("quiz_graded", 0),
+            "quizCorrect": item_stats.get("quiz_correct", 0),
+            "accuracy": _ratio(item_stats.get("quiz_correct", 0), item_stats.get("quiz_graded", 0)),
+        })
+
+    return {
+        "courseId": row["id"],
+        "title": row["title"],
+        "enrolled": enrolled,
+        "invited": stats.get("invited", 0),
+        "inProgress": stats.get("in_progress", 0),
+        "completed": stats.get("completed", 0),
+        "completionRate": _ratio(stats.get("completed", 0), enrolled),
+        "answers": stats.get("answers", 0),
+        "quizAccuracy": _ratio(stats.get("quiz_correct", 0), stats.get("quiz_graded", 0)),
+        "scoreDistribution": [
+            {"label": label, "count": count, "pct": _ratio(count, completed_scored)}
+            for label, count in zip(SCORE_BUCKET_LABELS, buckets)
+        ],
+        "questions": questions,
+        "updatedAt": stats.get("updated_at"),
+    }
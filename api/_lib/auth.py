@@ -11,7 +11,7 @@ async def get_current_user(request: Request) -> dict:
     Extract and verify the Supabase access token from the Authorization header.
     Returns the authenticated user dict.
     """
-    from api._lib.logger import get_logger, redact_token
+    from api._lib.logger import bind_log_context, get_logger, redact_token
 
     logger = get_logger(__name__)
 
@@ -26,15 +26,19 @@ async def get_current_user(request: Request) -> dict:
         raise HTTPException(status_code=401, detail="Empty token")
 
     try:
+        from api._lib.timing import span
+
         supabase = get_admin_client()
-        user_response = supabase.auth.get_user(token)
+        with span("auth"):
+            user_response = supabase.auth.get_user(token)
 
         if not user_response or not user_response.user:
             logger.warning(f"Auth failed: invalid token (token={redact_token(token)})")
             raise HTTPException(status_code=401, detail="Invalid token")
 
         user = user_response.user
-        logger.debug(f"Auth success: user_id={user.id}, email={user.email}")
+        bind_log_context(user_id=user.id)
+        logger.debug("Auth success: user_id=%s, email=%s", user.id, user.email)
 
         return {
             "id": user.id,
@@ -49,3 +53,23 @@ async def get_current_user(request: Request) -> dict:
             f"(token={redact_token(token)})"
         )
         raise HTTPException(status_code=401, detail=f"Token verification failed: {str(e)}")
+
+
+async def get_current_user_with_profile(user: dict = Depends(get_current_user)) -> dict:
+    """
+    get_current_user plus the user's profile under "profile" (None if the
+    profile does not exist yet or could not be loaded). The profile comes
+    from a short-TTL per-user cache (see api/_lib/profiles.py), so role checks
+    usually cost no database round trip.
+    """
+    from api._lib.logger import get_logger
+    from api._lib.profiles import get_cached_profile
+
+    try:
+        profile = get_cached_profile(get_admin_client(), user["id"])
+    except Exception as e:
+        get_logger(__name__).error(
+            f"Profile lookup failed: user_id={user['id']}, error={type(e).__name__}: {str(e)}"
+        )
+        profile = None
+    return {**user, "profile": profile}
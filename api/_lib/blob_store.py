@@ -0,0 +1,153 @@
+"""
+Content-addressed storage for uploaded course originals (BLOB_STORE).
+
+Each distinct file is stored once in the courses bucket at
+_blobs/{sha[:2]}/{sha256}{ext}. Manifests reference it by storagePath plus
+sha256, so the same PDF uploaded into many drafts, or by many curators,
+takes up space once. A re-upload of a known file skips the storage write.
+
+References are marker objects at _blobs/refs/{sha256}{ext}/{userId}.{courseId},
+one per course that uses the blob. Adding one is an idempotent upsert,
+so a retried draft/process does not count twice. release_blobs() removes
+a course's markers and deletes blobs that have none left.
+
+Writers add their reference before checking whether the blob exists.
+release_blobs() does not delete an unreferenced blob outright: it parks it
+under _blobs/trash/, looks for references again and moves it back if one
+appeared meanwhile (a writer that saw the blob and skipped its upload).
+A writer whose reference lands later finds the blob missing and uploads
+it, so a referenced blob is never left deleted.
+"""
+import hashlib
+import os
+import re
+import uuid
+from typing import Any, List, Tuple
+
+from api._lib.course_files import COURSES_BUCKET
+from api._lib.logger import get_logger
+from api._lib.storage import object_exists
+
+logger = get_logger(__name__)
+
+BLOB_PREFIX = "_blobs"
+REFS_PREFIX = f"{BLOB_PREFIX}/refs"
+TRASH_PREFIX = f"{BLOB_PREFIX}/trash"
+
+_BLOB_RE = re.compile(rf"{BLOB_PREFIX}/[0-9a-f]{{2}}/([0-9a-f]{{64}})(\.[0-9a-z]{{1,10}})?")
+_EXT_RE = re.compile(r"\.[0-9a-z]{1,10}")
+
+
+def sha256_hex(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def blob_path(sha: str, ext: str = "") -> str:
+    ext = ext.lower()
+    return f"{BLOB_PREFIX}/{sha[:2]}/{sha}{ext if _EXT_RE.fullmatch(ext) else ''}"
+
+
+def is_blob_path(path: str) -> bool:
+    return _BLOB_RE.fullmatch(path) is not None
+
+
+def _ref_path(path: str, user_id: str, course_id: str) -> str:
+    return f"{REFS_PREFIX}/{path.rsplit('/', 1)[-1]}/{user_id}.{course_id}"
+
+
+def _has_refs(bucket_api: Any, path: str) -> bool:
+    return bool(bucket_api.list(f"{REFS_PREFIX}/{path.rsplit('/', 1)[-1]}", {"limit": 1}))
+
+
+def _add_ref(bucket_api: Any, path: str, user_id: str, course_id: str) -> None:
+    bucket_api.upload(
+        _ref_path(path, user_id, course_id),
+        f"{user_id}.{course_id}".encode("utf-8"),
+        {"content-type": "text/plain", "upsert": "true"},
+    )
+
+
+def store_blob(
+    supabase: Any, data: bytes, ext: str, content_type: str, user_id: str, course_id: str
+) -> Tuple[str, str, bool]:
+    """
+    Store data as a blob referenced by the course, uploading it only if no
+    identical blob exists. Returns (storage path, sha256, reused).
+    """
+    sha = sha256_hex(data)
+    path = blob_path(sha, ext)
+    bucket_api = supabase.storage.from_(COURSES_BUCKET)
+    _add_ref(bucket_api, path, user_id, course_id)
+    if object_exists(bucket_api, path):
+        return path, sha, True
+    bucket_api.upload(path, data, {"content-type": content_type, "upsert": "true"})
+    return path, sha, False
+
+
+def adopt_blob(
+    supabase: Any, data: bytes, uploaded_path: str, user_id: str, course_id: str
+) -> Tuple[str, str, bool]:
+    """
+    Reference the blob holding data (read from uploaded_path) for the course.
+    An existing blob is only referenced once its name matches the content.
+    The course's own upload under {userId}/{courseId}/files/ is dropped if an
+    identical blob exists and moved into place otherwise, keeping its
+    extension. Returns (storage path, sha256, reused).
+    """
+    sha = sha256_hex(data)
+    bucket_api = supabase.storage.from_(COURSES_BUCKET)
+    match = _BLOB_RE.fullmatch(uploaded_path)
+    if match:
+        if match.group(1) != sha:
+            raise ValueError(f"{uploaded_path} does not match its content")
+        _add_ref(bucket_api, uploaded_path, user_id, course_id)
+        return uploaded_path, sha, True
+    if not uploaded_path.startswith(f"{user_id}/{course_id}/files/"):
+        raise ValueError(f"{uploaded_path} is not an upload of course {course_id}")
+
+    path = blob_path(sha, os.path.splitext(uploaded_path)[1])
+    _add_ref(bucket_api, path, user_id, course_id)
+    if not object_exists(bucket_api, path):
+        try:
+            bucket_api.move(uploaded_path, path)
+            return path, sha, False
+        except Exception:
+            # An identical upload may have been moved into place meanwhile
+            if not object_exists(bucket_api, path):
+                raise
+    bucket_api.remove([uploaded_path])
+    return path, sha, True
+
+
+def _restore(bucket_api: Any, parked: str, path: str) -> None:
+    try:
+        bucket_api.move(parked, path)
+    except Exception:
+        # A writer uploaded the blob again meanwhile; the parked copy is redundant
+        if not object_exists(bucket_api, path):
+            raise
+        bucket_api.remove([parked])
+
+
+def release_blobs(supabase: Any, paths: List[str], user_id: str, course_id: str) -> List[str]:
+    """Drop the course's references to paths; delete and return the blobs nobody references."""
+    bucket_api = supabase.storage.from_(COURSES_BUCKET)
+    deleted = []
+    for path in dict.fromkeys(p for p in paths if is_blob_path(p)):
+        bucket_api.remove([_ref_path(path, user_id, course_id)])
+        if _has_refs(bucket_api, path):
+            continue
+        parked = f"{TRASH_PREFIX}/{uuid.uuid4().hex}.{path.rsplit('/', 1)[-1]}"
+        try:
+            bucket_api.move(path, parked)
+        except Exception as e:
+            logger.warning(f"Could not remove blob {path}: {e}")
+            continue
+        if _has_refs(bucket_api, path):
+            _restore(bucket_api, parked, path)
+            logger.info(f"Kept blob {path}, referenced again while being deleted")
+            continue
+        bucket_api.remove([parked])
+        deleted.append(path)
+        logger.info(f"Deleted unreferenced blob {path}")
+    return deleted
@@ -0,0 +1,87 @@
+"""
+Transparent compression for derived storage artifacts (parsed text,
+combined.txt, manifests).
+
+Writes use STORAGE_COMPRESSION ("gzip", "zstd" or "none"); reads detect the
+format from magic bytes, so objects written before compression was enabled
+(plain UTF-8 text/JSON) keep working. zstd needs the optional `zstandard`
+package and falls back to gzip when it is not installed.
+"""
+import gzip
+from typing import Optional, Tuple
+
+from api._lib.logger import get_logger
+from api._lib.settings import settings
+
+logger = get_logger(__name__)
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+CONTENT_TYPES = {
+    "gzip": "application/gzip",
+    "zstd": "application/zstd",
+}
+
+# Payloads smaller than this are stored as-is (headers would eat the gain).
+MIN_COMPRESS_BYTES = 512
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def detect(data: bytes) -> Optional[str]:
+    """Return "gzip"/"zstd" for compressed payloads, None for plain bytes."""
+    if data[:2] == GZIP_MAGIC:
+        return "gzip"
+    if data[:4] == ZSTD_MAGIC:
+        return "zstd"
+    return None
+
+
+def active_codec() -> Optional[str]:
+    """Codec used for new writes, after optional-dependency fallback."""
+    codec = settings.storage_compression
+    if codec == "none":
+        return None
+    if codec == "zstd" and _zstd() is None:
+        logger.warning("STORAGE_COMPRESSION=zstd but zstandard is not installed; using gzip")
+        return "gzip"
+    return codec
+
+
+def compress(data: bytes) -> Tuple[bytes, Optional[str]]:
+    """
+    Compress data with the active codec.
+
+    Returns:
+        (payload, codec) where codec is None if the data was left uncompressed
+    """
+    codec = active_codec()
+    if codec is None or len(data) < MIN_COMPRESS_BYTES:
+        return data, None
+    if codec == "zstd":
+        payload = _zstd().ZstdCompressor(level=6).compress(data)
+    else:
+        payload = gzip.compress(data, compresslevel=6, mtime=0)
+    if len(payload) >= len(data):
+        return data, None
+    return payload, codec
+
+
+def decompress(data: bytes) -> bytes:
+    """Decode a stored artifact; plain (legacy) payloads are returned unchanged."""
+    codec = detect(data)
+    if codec == "gzip":
+        return gzip.decompress(data)
+    if codec == "zstd":
+        module = _zstd()
+        if module is None:
+            raise ValueError("Object is zstd-compressed but zstandard is not installed")
+        return module.ZstdDecompressor().decompressobj().decompress(data)
+    return data
@@ -0,0 +1,210 @@
+"""
+Response compression (gzip, brotli, zstd) negotiated from Accept-Encoding.
+
+- CompressionMiddleware: pure ASGI. Compresses responses whose content type
+  is text-like (JSON, text/*, XML, JS, SVG) once the body reaches
+  RESPONSE_COMPRESSION_MIN_BYTES. Streaming bodies are compressed chunk by
+  chunk without buffering. Responses that already carry Content-Encoding go
+  out untouched.
+- stored_artifact_response(): serves an artifact stored compressed by
+  api/_lib/codec.py as-is with Content-Encoding when the client accepts that
+  codec, instead of decompressing and compressing it again.
+
+brotli and zstd need the optional `brotli` / `zstandard` packages;
+unavailable codecs are skipped during negotiation.
+"""
+import zlib
+from typing import Any, Callable, Dict, List, Optional
+
+from api._lib.settings import settings
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+# Event streams must reach the client as they are written
+_NEVER_COMPRESS = ("text/event-stream",)
+
+_GZIP_LEVEL = 6
+_BROTLI_QUALITY = 4
+_ZSTD_LEVEL = 3
+
+
+def _available(encoding: str) -> bool:
+    if encoding == "gzip":
+        return True
+    try:
+        if encoding == "br":
+            import brotli  # noqa: F401
+        elif encoding == "zstd":
+            import zstandard  # noqa: F401
+        else:
+            return False
+    except ImportError:
+        return False
+    return True
+
+
+_server_encodings: Optional[List[str]] = None
+
+
+def server_encodings() -> List[str]:
+    """RESPONSE_COMPRESSION_ENCODINGS that are installed, in preference order."""
+    global _server_encodings
+    if _server_encodings is None:
+        wanted = [e.strip().lower() for e in settings.response_compression_encodings.split(",") if e.strip()]
+        _server_encodings = [e for e in wanted if _available(e)]
+    return _server_encodings
+
+
+def _accepted(accept_encoding: str) -> Dict[str, float]:
+    """Accept-Encoding → {coding: q}."""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip()] = q
+    return accepted
+
+
+def negotiate(accept_encoding: str, candidates: Optional[List[str]] = None) -> Optional[str]:
+    """Best coding from candidates (server order breaks ties), or None for identity."""
+    accepted = _accepted(accept_encoding)
+    best, best_q = None, 0.0
+    for coding in server_encodings() if candidates is None else candidates:
+        q = accepted.get(coding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class _Encoder:
+    """Incremental compressor: compress(chunk) then finish()."""
+
+    def __init__(self, encoding: str) -> None:
+        if encoding == "br":
+            import brotli
+
+            c = brotli.Compressor(quality=_BROTLI_QUALITY)
+            self.compress, self.finish = c.process, c.finish
+        elif encoding == "zstd":
+            import zstandard
+
+            c = zstandard.ZstdCompressor(level=_ZSTD_LEVEL).compressobj()
+            self.compress, self.finish = c.compress, c.flush
+        else:
+            c = zlib.compressobj(_GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+            self.compress, self.finish = c.compress, c.flush
+
+
+def _compressible(content_type: str) -> bool:
+    content_type = content_type.lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES) and not content_type.startswith(_NEVER_COMPRESS)
+
+
+def _with_vary(headers: List[Any]) -> List[Any]:
+    for i, (name, value) in enumerate(headers):
+        if name.lower() == b"vary":
+            if b"accept-encoding" not in value.lower():
+                headers[i] = (name, value + b", Accept-Encoding")
+            return headers
+    headers.append((b"vary", b"Accept-Encoding"))
+    return headers
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware: compress text-like responses per Accept-Encoding."""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or not settings.response_compression:
+            await self.app(scope, receive, send)
+            return
+        accept = dict(scope.get("headers") or []).get(b"accept-encoding", b"").decode("latin-1")
+        encoding = negotiate(accept) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Dict[str, Any]] = None
+        encoder: Optional[_Encoder] = None
+        passthrough = False
+
+        async def send_compressed(message: Dict[str, Any]) -> None:
+            nonlocal start, encoder, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if encoder is None:
+                # First body chunk: decide once, then send the (possibly edited) start
+                headers = list(start.get("headers", []))
+                names = {name.lower(): value for name, value in headers}
+                eligible = (
+                    start["status"] not in (204, 304)
+                    and b"content-encoding" not in names
+                    and _compressible(names.get(b"content-type", b"").decode("latin-1"))
+                )
+                if eligible and (more_body or len(body) >= settings.response_compression_min_bytes):
+                    encoder = _Encoder(encoding)
+                    headers = [(n, v) for n, v in headers if n.lower() != b"content-length"]
+                    headers.append((b"content-encoding", encoding.encode("latin-1")))
+                    if not more_body:
+                        body = encoder.compress(body) + encoder.finish()
+                        headers.append((b"content-length", str(len(body)).encode("latin-1")))
+                        await send({**start, "headers": _with_vary(headers)})
+                        await send({**message, "body": body})
+                        return
+                    await send({**start, "headers": _with_vary(headers)})
+                else:
+                    passthrough = True
+                    await send({**start, "headers": _with_vary(headers)} if eligible else start)
+                    await send(message)
+                    return
+
+            chunk = encoder.compress(body)
+            if not more_body:
+                chunk += encoder.finish()
+            if chunk or not more_body:
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+
+def stored_artifact_response(data: bytes, media_type: str, accept_encoding: str) -> Any:
+    """
+    Response for a stored artifact: pre-compressed bytes go out as-is when the
+    client accepts their codec, otherwise they are decompressed here.
+    """
+    from fastapi.responses import Response
+
+    from api._lib.codec import decompress, detect
+
+    codec = detect(data)
+    if codec is None:
+        return Response(content=data, media_type=media_type)
+    if negotiate(accept_encoding, [codec]) == codec:
+        return Response(
+            content=data,
+            media_type=media_type,
+            headers={"Content-Encoding": codec, "Vary": "Accept-Encoding"},
+        )
+    return Response(content=decompress(data), media_type=media_type, headers={"Vary": "Accept-Encoding"})
@@ -0,0 +1,25 @@
+"""
+Bounded concurrency for per-request fan-out (storage transfers, parsing).
+
+Blocking storage3/pypdf calls run in worker threads via asyncio.to_thread
+(which copies the context, so timing spans still land on the request);
+gather_bounded() keeps at most STORAGE_CONCURRENCY of them in flight and
+returns results in input order.
+"""
+import asyncio
+from typing import Awaitable, Iterable, List, Optional, TypeVar
+
+from api._lib.settings import settings
+
+T = TypeVar("T")
+
+
+async def gather_bounded(aws: Iterable[Awaitable[T]], limit: Optional[int] = None) -> List[T]:
+    """Await all awaitables with at most `limit` running at once; results keep input order."""
+    semaphore = asyncio.Semaphore(max(limit or settings.storage_concurrency, 1))
+
+    async def run(aw: Awaitable[T]) -> T:
+        async with semaphore:
+            return await aw
+
+    return await asyncio.gather(*(run(aw) for aw in aws))
@@ -0,0 +1,109 @@
+"""
+Streaming ZIP export of a course: source files, parsed text and the manifest.
+
+stream_course_zip() is a generator that writes the archive incrementally.
+Each source file is read from storage in chunks (storage.iter_download) and
+written straight into its zip entry, and archive bytes are yielded as soon as
+they are produced. Memory stays at about one chunk regardless of course
+size, and the first bytes go out before the first file is fully read.
+
+The output is not seekable, so entries carry data descriptors (sizes and
+CRC after the data). PDF/DOCX are stored as-is, since they are already
+compressed; text is deflated.
+"""
+import os
+import time
+import zipfile
+from typing import Any, Dict, Iterator, List, Set
+
+from api._lib.course_files import COURSES_BUCKET, download_artifact, manifest_file
+from api._lib.jsonio import dumps
+from api._lib.logger import get_logger
+from api._lib.storage import iter_download
+
+logger = get_logger(__name__)
+
+_STORED_EXTENSIONS = {".pdf", ".docx", ".zip", ".png", ".jpg", ".jpeg"}
+
+
+class _ChunkSink:
+    """Write-only file object collecting zipfile output until drained."""
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        if data:
+            self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _unique_name(name: str, used: Set[str]) -> str:
+    name = name.replace("/", "_").replace("\\", "_").strip() or "file"
+    stem, ext = os.path.splitext(name)
+    candidate, n = name, 2
+    while candidate.lower() in used:
+        candidate = f"{stem} ({n}){ext}"
+        n += 1
+    used.add(candidate.lower())
+    return candidate
+
+
+def _compression(name: str) -> int:
+    return zipfile.ZIP_STORED if os.path.splitext(name)[1].lower() in _STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+
+
+def stream_course_zip(supabase: Any, manifest: Dict[str, Any], user_id: str) -> Iterator[bytes]:
+    """Yield a ZIP archive of the course: files/, parsed/ and manifest.json."""
+    sink = _ChunkSink()
+    bucket_api = supabase.storage.from_(COURSES_BUCKET)
+    used: Dict[str, Set[str]] = {"files": set(), "parsed": set()}
+    failed: List[str] = []
+
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
+        for stored in manifest.get("files", []):
+            entry = manifest_file(user_id, manifest.get("courseId", ""), stored)
+            name = entry.get("name") or entry.get("fileId") or "file"
+            arcname = "files/" + _unique_name(name, used["files"])
+            try:
+                info = zipfile.ZipInfo(arcname, date_time=time.localtime()[:6])
+                info.compress_type = _compression(name)
+                info.external_attr = 0o644 << 16
+                with zf.open(info, mode="w") as out:
+                    for chunk in iter_download(bucket_api, entry["storagePath"]):
+                        out.write(chunk)
+                        if data := sink.drain():
+                            yield data
+            except Exception as e:
+                # The partial entry stays in the archive; list it as failed
+                logger.warning(f"Export {manifest.get('courseId')}: could not read {entry.get('storagePath')}: {e}")
+                failed.append(arcname)
+            if data := sink.drain():
+                yield data
+
+            if entry.get("parsedPath"):
+                parsed_name = "parsed/" + _unique_name(os.path.splitext(name)[0] + ".txt", used["parsed"])
+                try:
+                    zf.writestr(parsed_name, download_artifact(supabase, entry["parsedPath"]))
+                except Exception as e:
+                    if "parsedPath" in stored:
+                        logger.warning(f"Export {manifest.get('courseId')}: could not read {entry['parsedPath']}: {e}")
+                        failed.append(parsed_name)
+                    else:
+                        # Guessed location of an older draft file; it may have had no text
+                        used["parsed"].discard(parsed_name[len("parsed/"):].lower())
+                if data := sink.drain():
+                    yield data
+
+        zf.writestr("manifest.json", dumps(manifest))
+        if failed:
+            zf.writestr("export_errors.txt", "Could not be exported completely:\n" + "\n".join(failed) + "\n")
+    yield sink.drain()
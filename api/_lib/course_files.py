@@ -0,0 +1,207 @@
+"""
+Course file handling shared by the course and training routers: upload
+limits, per-format parsers, the text cleanup stage and the "courses" bucket
+helpers for derived artifacts (parsed text, manifests).
+
+The combined text of a draft stays server-side: draft/process responses
+carry stats and a short preview, and generate reads it back through
+load_draft_text() (per-instance TTL cache, DRAFT_TEXT_CACHE_SECONDS).
+
+Parsers import pypdf / python-docx on first use.
+"""
+from typing import Any, Dict, List
+
+from api._lib.logger import get_logger
+from api._lib.settings import settings
+from api._lib.timing import timed
+from api._lib.ttl_cache import TTLCache
+
+logger = get_logger(__name__)
+
+COURSES_BUCKET = "courses"
+MAX_FILE_SIZE = 30 * 1024 * 1024  # 30MB
+ALLOWED_EXTENSIONS = {".pdf", ".txt", ".doc", ".docx"}
+ALLOWED_MIME_TYPES = {
+    "application/pdf",
+    "text/plain",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "application/msword",
+}
+
+DRAFT_PREVIEW_CHARS = 500
+
+# Up to 100k chars per draft; a handful of wizards in flight per instance
+_draft_text_cache: TTLCache = TTLCache(ttl=settings.draft_text_cache_seconds, max_entries=32)
+
+
+@timed("parse", kind="pdf")
+def parse_pdf_pages(content: bytes) -> List[str]:
+    """Extract text from PDF bytes using pypdf, one entry per page."""
+    try:
+        from pypdf import PdfReader
+        import io
+        reader = PdfReader(io.BytesIO(content))
+        texts = []
+        for page in reader.pages:
+            page_text = page.extract_text()
+            if page_text:
+                texts.append(page_text)
+        return texts
+    except Exception as e:
+        raise ValueError(f"PDF parse error: {str(e)}")
+
+
+def parse_pdf_bytes(content: bytes) -> str:
+    """Extract text from PDF bytes using pypdf."""
+    return "\n".join(parse_pdf_pages(content))
+
+
+@timed("parse", kind="docx")
+def parse_docx_bytes(content: bytes) -> str:
+    """Extract text from DOCX bytes using python-docx."""
+    try:
+        from docx import Document
+        import io
+        doc = Document(io.BytesIO(content))
+        paragraphs = [para.text for para in doc.paragraphs if para.text.strip()]
+        return "\n".join(paragraphs)
+    except Exception as e:
+        raise ValueError(f"DOCX parse error: {str(e)}")
+
+
+@timed("parse", kind="txt")
+def parse_txt_bytes(content: bytes) -> str:
+    """Decode TXT bytes to string."""
+    for encoding in ("utf-8", "utf-16", "latin-1"):
+        try:
+            return content.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return content.decode("latin-1", errors="replace")
+
+
+def cleanup_pages(pages: List[str]):
+    """
+    Normalization stage between parsing and combined text assembly.
+    Strips running headers/footers, page numbers and TOC noise (see
+    api/_lib/text_cleanup.py). Returns a CleanupResult; pass-through when
+    TEXT_CLEANUP is disabled.
+    """
+    from api._lib.text_cleanup import CleanupResult, normalize_pages
+
+    if settings.text_cleanup:
+        return normalize_pages(pages)
+    text = "\n".join(pages)
+    return CleanupResult(text=text, original_chars=len(text), cleaned_chars=len(text), removed_lines=0)
+
+
+def ensure_courses_bucket(supabase) -> None:
+    """Ensure the courses bucket exists. Creates/updates it without MIME restrictions.
+
+    We intentionally do NOT set allowed_mime_types here — MIME validation is
+    performed at the application level. Setting it on the bucket has caused
+    InvalidMimeType 415 errors (e.g. when the browser reports an empty or
+    vendor-prefixed MIME type for DOCX files).
+    """
+    try:
+        buckets = supabase.storage.list_buckets()
+        exists = any(b.name == COURSES_BUCKET for b in buckets)
+        if not exists:
+            supabase.storage.create_bucket(
+                COURSES_BUCKET,
+                options={
+                    "public": False,
+                    "file_size_limit": MAX_FILE_SIZE,
+                    # No allowed_mime_types — allow all; app validates by extension.
+                },
+            )
+            logger.info(f"Created bucket '{COURSES_BUCKET}'")
+        else:
+            # If the bucket already exists with stale allowed_mime_types restrictions
+            # (e.g. created without the application/ prefix), clear them so uploads
+            # are not blocked at the storage layer.
+            try:
+                supabase.storage.update_bucket(
+                    COURSES_BUCKET,
+                    options={
+                        "public": False,
+                        "file_size_limit": MAX_FILE_SIZE,
+                        "allowed_mime_types": [],  # empty = no restriction
+                    },
+                )
+            except Exception as update_err:
+                logger.warning(f"Could not update bucket mime settings (non-fatal): {update_err}")
+    except Exception as e:
+        logger.warning(f"Could not ensure bucket: {e}")
+
+
+def upload_artifact(supabase, path: str, data: bytes, content_type: str) -> None:
+    """
+    Upsert a derived artifact (parsed text, combined.txt, manifests),
+    compressed per STORAGE_COMPRESSION. Raw course files are not passed here.
+    """
+    from api._lib.codec import CONTENT_TYPES, compress
+
+    payload, codec = compress(data)
+    supabase.storage.from_(COURSES_BUCKET).upload(
+        path,
+        payload,
+        {"content-type": CONTENT_TYPES[codec] if codec else content_type, "upsert": "true"},
+    )
+
+
+def download_artifact(supabase, path: str) -> bytes:
+    """Download a derived artifact, transparently decompressing it."""
+    from api._lib.codec import decompress
+
+    return decompress(supabase.storage.from_(COURSES_BUCKET).download(path))
+
+
+def combined_text_path(user_id: str, draft_id: str) -> str:
+    return f"{user_id}/{draft_id}/parsed/combined.txt"
+
+
+def parsed_text_path(user_id: str, course_id: str, file_key: str) -> str:
+    return f"{user_id}/{course_id}/parsed/{file_key}.txt"
+
+
+def manifest_file(user_id: str, course_id: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    A course manifest file entry with fileId/name/parsedPath filled in.
+    Courses finalized from a draft list the draft's files ({path,
+    storagePath, originalName, mime, size}); manifests written before
+    finalize recorded parsedPath get the location draft/process save
+    parsed text at, which may not exist (no text was extracted).
+    """
+    if entry.get("fileId") or not entry.get("path"):
+        return entry
+    view = {**entry, "fileId": entry["path"], "name": entry.get("name") or entry.get("originalName") or entry["path"]}
+    if "parsedPath" not in entry:
+        view["parsedPath"] = parsed_text_path(user_id, course_id, entry["path"])
+    return view
+
+
+def remember_draft_text(user_id: str, draft_id: str, text: str) -> None:
+    """Cache the combined text just written so generate on this instance skips the download."""
+    if settings.draft_text_cache_seconds > 0:
+        _draft_text_cache.set((user_id, draft_id), text)
+
+
+def forget_draft_text(user_id: str, draft_id: str) -> None:
+    _draft_text_cache.invalidate((user_id, draft_id))
+
+
+def load_draft_text(supabase, user_id: str, draft_id: str) -> str:
+    """
+    Combined text of a draft (parsed/combined.txt), from the cache or storage.
+    Raises if the draft has no combined text.
+    """
+    text = _draft_text_cache.get((user_id, draft_id))
+    if text is None:
+        text = download_artifact(supabase, combined_text_path(user_id, draft_id)).decode("utf-8")
+        remember_draft_text(user_id, draft_id, text)
+    return text
+
+
+def draft_preview(text: str) -> str:
+    return text[:DRAFT_PREVIEW_CHARS]
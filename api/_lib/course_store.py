@@ -0,0 +1,376 @@
+"""
+Course repository: where finalized course manifests live.
+
+COURSE_STORE selects the implementation:
+- "storage" (default): one JSON blob per course at
+  {userId}/{courseId}/manifest.json plus an invite-code index at
+  _index/{code}.json in the courses bucket.
+- "db": rows in the `courses` table (invite codes resolved through the
+  unique `invite_code` index) with questions in `course_items` (see
+  supabase/migrations/0006_course_store.sql). save() writes both in one
+  transaction through the save_course RPC (0009): questions are upserted by
+  id and only removed ones are deleted, so re-finalizing a course keeps the
+  answers to questions that did not change.
+
+Both return the same manifest dict shape, so routes do not care which one
+is active. scripts/migrate_manifests.py copies storage manifests into the
+database.
+"""
+import uuid
+from typing import Any, Dict, List, Optional
+
+from api._lib.logger import get_logger
+from api._lib.settings import settings
+
+logger = get_logger(__name__)
+
+COURSES_BUCKET = "courses"
+INDEX_PREFIX = "_index"
+
+# Columns read for course listings (no questions, no per-file detail needed
+# beyond what the manifest already exposes).
+_COURSE_COLUMNS = (
+    "id,created_by,title,size,created_at,overall_status,text_bytes,"
+    "invite_code,files,quiz_count,open_count,enrollments(count)"
+)
+_ITEM_COLUMNS = "id,type,prompt,options,correct_option,expected_answer,explanation,tag,order_index"
+
+# PostgREST "function not found in schema cache"
+_RPC_MISSING = "PGRST202"
+
+
+class InviteCodeTaken(Exception):
+    """Raised by save() when the manifest's invite code belongs to another course."""
+
+
+class CourseOwnedByOther(Exception):
+    """Raised by save() when the course id belongs to another user's course."""
+
+
+class CourseStore:
+    """Interface shared by the storage and database implementations."""
+
+    def save(self, user_id: str, manifest: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def list_for_user(self, user_id: str) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def get(self, user_id: str, course_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def get_by_code(self, code: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def delete(self, user_id: str, manifest: Dict[str, Any]) -> None:
+        """Remove the course record; its files are the caller's business."""
+        raise NotImplementedError
+
+
+# =============================================================================
+# Storage-backed (manifest.json blobs)
+# =============================================================================
+
+class StorageCourseStore(CourseStore):
+    """Manifests as compressed JSON objects in the courses bucket."""
+
+    def __init__(self, client: Any) -> None:
+        self._client = client
+
+    def _bucket(self) -> Any:
+        return self._client.storage.from_(COURSES_BUCKET)
+
+    def _upload_json(self, path: str, data: Dict[str, Any]) -> None:
+        from api._lib.codec import CONTENT_TYPES, compress
+        from api._lib.jsonio import dumps
+
+        payload, codec = compress(dumps(data))
+        self._bucket().upload(
+            path,
+            payload,
+            {"content-type": CONTENT_TYPES[codec] if codec else "application/json", "upsert": "true"},
+        )
+
+    def _download_json(self, path: str) -> Dict[str, Any]:
+        from api._lib.codec import decompress
+        from api._lib.jsonio import loads
+
+        return loads(decompress(self._bucket().download(path)))
+
+    def save(self, user_id: str, manifest: Dict[str, Any]) -> None:
+        self._upload_json(f"{user_id}/{manifest['courseId']}/manifest.json", manifest)
+        code = manifest.get("inviteCode")
+        if not code:
+            return
+        try:
+            self._upload_json(
+                f"{INDEX_PREFIX}/{code}.json",
+                {"userId": user_id, "courseId": manifest["courseId"]},
+            )
+        except Exception as e:
+            logger.warning(f"Could not save code index for {code}: {e}")
+
+    def list_for_user(self, user_id: str) -> List[Dict[str, Any]]:
+        try:
+            items = self._bucket().list(user_id)
+        except Exception as e:
+            logger.error(f"Failed to list courses for user {user_id}: {e}")
+            return []
+
+        courses = []
+        for item in items or []:
+            # Each item is a folder representing a courseId
+            course_id = item.get("name") if isinstance(item, dict) else getattr(item, "name", None)
+            if not course_id:
+                continue
+            try:
+                courses.append(self._download_json(f"{user_id}/{course_id}/manifest.json"))
+            except Exception as e:
+                logger.warning(f"Could not read manifest for course {course_id}: {e}")
+                # Include a placeholder for courses without manifest
+                courses.append({
+                    "courseId": course_id,
+                    "title": "Неполный курс",
+                    "size": "unknown",
+                    "createdAt": "",
+                    "overallStatus": "error",
+                    "textBytes": 0,
+                    "inviteCode": "",
+                    "employeesCount": 0,
+                    "files": [],
+                })
+
+        # Sort by createdAt descending (newest first)
+        courses.sort(key=lambda c: c.get("createdAt", ""), reverse=True)
+        return courses
+
+    def get(self, user_id: str, course_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            return self._download_json(f"{user_id}/{course_id}/manifest.json")
+        except Exception as e:
+            logger.error(f"Could not read manifest for course {course_id}: {e}")
+            return None
+
+    def get_by_code(self, code: str) -> Optional[Dict[str, Any]]:
+        try:
+            index_data = self._download_json(f"{INDEX_PREFIX}/{code.upper()}.json")
+        except Exception:
+            return None
+        user_id = index_data.get("userId")
+        course_id = index_data.get("courseId")
+        if not user_id or not course_id:
+            return None
+        return self.get(user_id, course_id)
+
+    def delete(self, user_id: str, manifest: Dict[str, Any]) -> None:
+        paths = [f"{user_id}/{manifest['courseId']}/manifest.json"]
+        if manifest.get("inviteCode"):
+            paths.append(f"{INDEX_PREFIX}/{manifest['inviteCode']}.json")
+        self._bucket().remove(paths)
+
+
+# =============================================================================
+# Database-backed (courses + course_items)
+# =============================================================================
+
+def _item_id(course_id: str, question_id: str) -> str:
+    """course_items.id is a UUID; legacy non-UUID question ids are mapped deterministically."""
+    try:
+        return str(uuid.UUID(str(question_id)))
+    except ValueError:
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{course_id}/{question_id}"))
+
+
+def _item_row(course_id: str, index: int, question: Dict[str, Any]) -> Dict[str, Any]:
+    is_quiz = question.get("type") == "quiz"
+    return {
+        "id": _item_id(course_id, question.get("id") or index),
+        "course_id": course_id,
+        "type": question.get("type"),
+        "prompt": question.get("prompt", ""),
+        "options": question.get("quizOptions") if is_quiz else None,
+        "correct_option": question.get("correctIndex") if is_quiz else None,
+        "expected_answer": question.get("expectedAnswer"),
+        "explanation": question.get("explanation"),
+        "tag": question.get("tag"),
+        "order_index": index,
+    }
+
+
+def _question_from_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": row["id"],
+        "type": row["type"],
+        "prompt": row["prompt"],
+        "quizOptions": row.get("options"),
+        "correctIndex": row.get("correct_option"),
+        "expectedAnswer": row.get("expected_answer"),
+        "explanation": row.get("explanation"),
+        "tag": row.get("tag"),
+    }
+
+
+def _manifest_from_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    enrollments = row.get("enrollments") or [{}]  # embedded enrollments(count)
+    manifest = {
+        "courseId": row["id"],
+        "title": row["title"],
+        "size": row["size"],
+        "createdAt": row["created_at"],
+        "overallStatus": row.get("overall_status") or "ready",
+        "textBytes": row.get("text_bytes") or 0,
+        "inviteCode": row.get("invite_code") or "",
+        "employeesCount": enrollments[0].get("count", 0),
+        "files": row.get("files") or [],
+        "quizCount": row.get("quiz_count") or 0,
+        "openCount": row.get("open_count") or 0,
+    }
+    if "course_items" in row:
+        items = sorted(row["course_items"] or [], key=lambda r: r["order_index"])
+        manifest["questions"] = [_question_from_row(r) for r in items]
+    return manifest
+
+
+class DbCourseStore(CourseStore):
+    """Courses in Postgres via PostgREST; every read is one indexed query."""
+
+    def __init__(self, client: Any) -> None:
+        self._client = client
+
+    def save(self, user_id: str, manifest: Dict[str, Any]) -> None:
+        from postgrest.exceptions import APIError
+
+        course_id = manifest["courseId"]
+        questions = manifest.get("questions") or []
+        row = {
+            "id": course_id,
+            "created_by": user_id,
+            "title": manifest["title"],
+            "size": manifest["size"],
+            "created_at": manifest.get("createdAt") or None,
+            "overall_status": manifest.get("overallStatus", "ready"),
+            "text_bytes": manifest.get("textBytes", 0),
+            "invite_code": manifest.get("inviteCode") or None,
+            "files": manifest.get("files") or [],
+            "quiz_count": manifest.get("quizCount", sum(1 for q in questions if q.get("type") == "quiz")),
+            "open_count": manifest.get("openCount", sum(1 for q in questions if q.get("type") == "open")),
+        }
+        if row["created_at"] is None:
+            del row["created_at"]
+
+        items = [_item_row(course_id, i, q) for i, q in enumerate(questions)] if "questions" in manifest else None
+
+        try:
+            self._client.rpc("save_course", {"p_course": row, "p_items": items}).execute()
+        except APIError as e:
+            if e.code == "23505" and "invite_code" in (e.message or "") + (e.details or ""):
+                raise InviteCodeTaken(row["invite_code"]) from e
+            if e.code == "42501":
+                raise CourseOwnedByOther(course_id) from e
+            if e.code != _RPC_MISSING:
+                raise
+            logger.warning("save_course RPC missing (apply migration 0009); saving without a transaction")
+            self._save_unatomic(row, items)
+
+    def _save_unatomic(self, row: Dict[str, Any], items: Optional[List[Dict[str, Any]]]) -> None:
+        """Pre-0009 fallback: same writes and ownership check as save_course, as separate requests."""
+        from postgrest.exceptions import APIError
+        from postgrest.types import ReturnMethod
+
+        courses = self._client.table("courses")
+        existing_course = courses.select("created_by").eq("id", row["id"]).limit(1).execute()
+        try:
+            if not existing_course.data:
+                courses.insert(row, returning=ReturnMethod.minimal).execute()
+            elif existing_course.data[0].get("created_by") != row["created_by"]:
+                raise CourseOwnedByOther(row["id"])
+            else:
+                # Scoped to the owner as well, like the RPC's conflict update
+                update = {k: v for k, v in row.items() if k not in ("id", "created_by")}
+                courses.update(update, returning=ReturnMethod.minimal).eq("id", row["id"]).eq(
+                    "created_by", row["created_by"]
+                ).execute()
+        except APIError as e:
+            if e.code == "23505" and "invite_code" in (e.message or "") + (e.details or ""):
+                raise InviteCodeTaken(row["invite_code"]) from e
+            raise
+
+        if items is None:
+            return
+        # Only questions that were removed lose their answers; answers go
+        # first so the 0007 triggers can still find the course
+        existing = self._client.table("course_items").select("id").eq("course_id", row["id"]).execute()
+        keep = {item["id"] for item in items}
+        removed = [r["id"] for r in existing.data or [] if r["id"] not in keep]
+        if removed:
+            self._client.table("answers").delete(returning=ReturnMethod.minimal).in_(
+                "course_item_id", removed
+            ).execute()
+            self._client.table("course_items").delete(returning=ReturnMethod.minimal).in_(
+                "id", removed
+            ).execute()
+        if items:
+            self._client.table("course_items").upsert(
+                items, on_conflict="id", returning=ReturnMethod.minimal
+            ).execute()
+
+    def list_for_user(self, user_id: str) -> List[Dict[str, Any]]:
+        result = (
+            self._client.table("courses")
+            .select(_COURSE_COLUMNS)
+            .eq("created_by", user_id)
+            .order("created_at", desc=True)
+            .execute()
+        )
+        return [_manifest_from_row(r) for r in result.data or []]
+
+    def _get_one(self, column: str, value: str, owner: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        query = (
+            self._client.table("courses")
+            .select(f"{_COURSE_COLUMNS},course_items({_ITEM_COLUMNS})")
+            .eq(column, value)
+        )
+        if owner is not None:
+            query = query.eq("created_by", owner)
+        result = query.limit(1).execute()
+        return _manifest_from_row(result.data[0]) if result.data else None
+
+    def get(self, user_id: str, course_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            uuid.UUID(course_id)
+        except ValueError:
+            return None
+        return self._get_one("id", course_id, owner=user_id)
+
+    def get_by_code(self, code: str) -> Optional[Dict[str, Any]]:
+        return self._get_one("invite_code", code.upper())
+
+    def delete(self, user_id: str, manifest: Dict[str, Any]) -> None:
+        from postgrest.types import ReturnMethod
+
+        # course_items, enrollments and answers go with it (ON DELETE CASCADE)
+        self._client.table("courses").delete(returning=ReturnMethod.minimal).eq(
+            "id", manifest["courseId"]
+        ).eq("created_by", user_id).execute()
+
+    def get_questions(self, course_id: str) -> List[Dict[str, Any]]:
+        """Questions of a course in order (idx_course_items_order)."""
+        result = (
+            self._client.table("course_items")
+            .select(_ITEM_COLUMNS)
+            .eq("course_id", course_id)
+            .order("order_index")
+            .execute()
+        )
+        return [_question_from_row(r) for r in result.data or []]
+
+
+def get_course_store(client: Any = None) -> CourseStore:
+    """Course store selected by COURSE_STORE, bound to the admin client."""
+    if client is None:
+        from api._lib.supabase_admin import get_admin_client
+
+        client = get_admin_client()
+    if settings.course_store == "db":
+        return DbCourseStore(client)
+    return StorageCourseStore(client)
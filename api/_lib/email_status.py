@@ -0,0 +1,81 @@
+"""
+Email registration status for POST /api/auth/check-email.
+
+Resolves a single email with the auth_email_status RPC
+(supabase/migrations/0008_email_status_rpc.sql), an indexed lookup on
+auth.users. Until that migration is applied it falls back to the
+idx_profiles_email_lookup index on profiles plus one GoTrue get-by-id call.
+Either way the cost no longer grows with the number of users.
+
+Results are cached per instance: confirmed accounts for
+CHECK_EMAIL_CACHE_SECONDS, unknown/unconfirmed emails (which change on
+signup/confirmation) for the shorter CHECK_EMAIL_NEGATIVE_CACHE_SECONDS.
+"""
+from typing import Any, Dict, Optional
+
+from api._lib.logger import get_logger
+from api._lib.settings import settings
+from api._lib.timing import span
+from api._lib.ttl_cache import TTLCache
+
+logger = get_logger(__name__)
+
+_cache: TTLCache = TTLCache(ttl=settings.check_email_cache_seconds)
+
+# PostgREST "function not found in schema cache"
+_RPC_MISSING = "PGRST202"
+
+
+def _normalize(email: str) -> str:
+    return email.strip().lower()
+
+
+def _from_rpc(client: Any, email: str) -> Optional[Dict[str, Any]]:
+    """Status via the RPC, or None if the function is not deployed."""
+    from postgrest.exceptions import APIError
+
+    try:
+        result = client.rpc("auth_email_status", {"p_email": email}).execute()
+    except APIError as e:
+        if e.code == _RPC_MISSING:
+            return None
+        raise
+    rows = result.data or []
+    if not rows:
+        return {"exists": False, "confirmed": None}
+    return {"exists": True, "confirmed": bool(rows[0].get("confirmed"))}
+
+
+def _from_profiles(client: Any, email: str) -> Dict[str, Any]:
+    """Fallback: profiles email index, then the auth user for confirmation state."""
+    result = client.table("profiles").select("id").eq("email", email).limit(1).execute()
+    if not result.data:
+        return {"exists": False, "confirmed": None}
+    with span("auth"):
+        response = client.auth.admin.get_user_by_id(result.data[0]["id"])
+    user = getattr(response, "user", None)
+    if user is None:
+        return {"exists": False, "confirmed": None}
+    return {"exists": True, "confirmed": user.email_confirmed_at is not None}
+
+
+def lookup_email_status(client: Any, email: str) -> Dict[str, Any]:
+    """Return {"exists": bool, "confirmed": bool | None} for an email."""
+    key = _normalize(email)
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
+
+    status = _from_rpc(client, key)
+    if status is None:
+        logger.warning("auth_email_status RPC missing (apply migration 0008); using profiles lookup")
+        status = _from_profiles(client, key)
+
+    ttl = settings.check_email_cache_seconds if status["confirmed"] else settings.check_email_negative_cache_seconds
+    _cache.set(key, status, ttl=ttl)
+    return status
+
+
+def invalidate_email_status(email: Optional[str]) -> None:
+    if email:
+        _cache.invalidate(_normalize(email))
@@ -0,0 +1,211 @@
+"""
+Employee progress: enrollments and answers (requires COURSE_STORE=db, since
+both tables reference courses/course_items).
+
+submit_answers() grades quiz answers against course_items.correct_option
+in Python and saves the batch with the submit_answers RPC
+(supabase/migrations/0010_submit_answers_rpc.sql): one round trip that
+creates the enrollment on first submission, upserts the answers on
+unique_answer (enrollment_id, course_item_id) and moves
+status/started_at/completed_at forward. The enrollment completes once all
+of the course's questions have an answer, across however many batches.
+Until 0010 is applied the same steps run as separate requests.
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from api._lib.logger import get_logger
+
+logger = get_logger(__name__)
+
+# PostgREST "function not found in schema cache"
+_RPC_MISSING = "PGRST202"
+
+
+class UnknownQuestion(ValueError):
+    """An answer referenced a question that is not part of the course."""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def get_enrollment(client: Any, course_id: str, employee_id: str) -> Optional[Dict[str, Any]]:
+    result = (
+        client.table("enrollments")
+        .select("id,status,started_at,completed_at")
+        .eq("course_id", course_id)
+        .eq("employee_id", employee_id)
+        .limit(1)
+        .execute()
+    )
+    return result.data[0] if result.data else None
+
+
+def ensure_enrollment(client: Any, course_id: str, employee_id: str) -> Dict[str, Any]:
+    """Return the employee's enrollment, creating it (in_progress) on first use."""
+    enrollment = get_enrollment(client, course_id, employee_id)
+    if enrollment is not None:
+        return enrollment
+    # ignore_duplicates: a concurrent first submission must not reset status/started_at
+    result = client.table("enrollments").upsert(
+        {
+            "course_id": course_id,
+            "employee_id": employee_id,
+            "status": "in_progress",
+            "started_at": _now(),
+        },
+        on_conflict="course_id,employee_id",
+        ignore_duplicates=True,
+    ).execute()
+    return result.data[0] if result.data else get_enrollment(client, course_id, employee_id)
+
+
+def grade(questions: List[Dict[str, Any]], answers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Build answers rows (without enrollment_id) for a batch.
+
+    Quiz answers are graded against correctIndex; open answers are stored
+    ungraded (is_correct NULL). A question answered twice in one batch keeps
+    the last answer.
+    """
+    by_id = {q["id"]: q for q in questions}
+    rows: Dict[str, Dict[str, Any]] = {}
+    for answer in answers:
+        question = by_id.get(answer["questionId"])
+        if question is None:
+            raise UnknownQuestion(answer["questionId"])
+        option = answer.get("answerOption")
+        is_correct = None
+        if question["type"] == "quiz":
+            is_correct = option is not None and option == question.get("correctIndex")
+        rows[question["id"]] = {
+            "course_item_id": question["id"],
+            "answer_text": answer.get("answerText"),
+            "answer_option": option,
+            "is_correct": is_correct,
+        }
+    return list(rows.values())
+
+
+def _submit_rpc(
+    client: Any, course_id: str, employee_id: str, rows: List[Dict[str, Any]], complete: bool
+) -> Optional[Dict[str, Any]]:
+    """(enrollment_id, status) via the submit_answers RPC, or None if it is not deployed."""
+    from postgrest.exceptions import APIError
+
+    try:
+        result = client.rpc(
+            "submit_answers",
+            {"p_course_id": course_id, "p_employee_id": employee_id, "p_rows": rows, "p_complete": complete},
+        ).execute()
+    except APIError as e:
+        if e.code == _RPC_MISSING:
+            return None
+        raise
+    return result.data[0]
+
+
+def _submit_requests(
+    client: Any,
+    course_id: str,
+    employee_id: str,
+    questions: List[Dict[str, Any]],
+    rows: List[Dict[str, Any]],
+    complete: bool,
+) -> Dict[str, Any]:
+    """Pre-0010 fallback: the same steps as separate requests."""
+    from postgrest.types import ReturnMethod
+
+    enrollment = ensure_enrollment(client, course_id, employee_id)
+    enrollment_id = enrollment["id"]
+
+    if rows:
+        client.table("answers").upsert(
+            [{**row, "enrollment_id": enrollment_id} for row in rows],
+            on_conflict="enrollment_id,course_item_id",
+            returning=ReturnMethod.minimal,
+        ).execute()
+
+    # Every answer the enrollment has saved so far, not only this batch
+    answered = client.table("answers").select("id", count="exact").eq(
+        "enrollment_id", enrollment_id
+    ).limit(1).execute().count or 0
+    answered_all = bool(questions) and answered >= len(questions)
+
+    updates: Dict[str, Any] = {}
+    if enrollment.get("status") == "invited":
+        updates["status"] = "in_progress"
+    if not enrollment.get("started_at"):
+        updates["started_at"] = _now()
+    if (complete or answered_all) and enrollment.get("status") != "completed":
+        updates["status"] = "completed"
+        updates["completed_at"] = _now()
+    if updates:
+        client.table("enrollments").update(updates, returning=ReturnMethod.minimal).eq(
+            "id", enrollment_id
+        ).execute()
+    return {"enrollment_id": enrollment_id, "status": updates.get("status", enrollment.get("status"))}
+
+
+def submit_answers(
+    client: Any,
+    course_id: str,
+    employee_id: str,
+    questions: List[Dict[str, Any]],
+    answers: List[Dict[str, Any]],
+    complete: bool = False,
+) -> Dict[str, Any]:
+    """Grade a batch of answers and save it; advance the enrollment status."""
+    rows = grade(questions, answers)
+    state = _submit_rpc(client, course_id, employee_id, rows, complete)
+    if state is None:
+        logger.warning("submit_answers RPC missing (apply migration 0010); using separate requests")
+        state = _submit_requests(client, course_id, employee_id, questions, rows, complete)
+
+    graded = [r for r in rows if r["is_correct"] is not None]
+    return {
+        "enrollmentId": state["enrollment_id"],
+        "status": state["status"],
+        "saved": len(rows),
+        "quizGraded": len(graded),
+        "quizCorrect": sum(1 for r in graded if r["is_correct"]),
+        "results": [
+            {"questionId": r["course_item_id"], "isCorrect": r["is_correct"]} for r in rows
+        ],
+    }
+
+
+def get_progress(client: Any, course_id: str, employee_id: str) -> Optional[Dict[str, Any]]:
+    """Enrollment with its answers, in one embedded query."""
+    result = (
+        client.table("enrollments")
+        .select("id,status,started_at,completed_at,answers(course_item_id,answer_text,answer_option,is_correct)")
+        .eq("course_id", course_id)
+        .eq("employee_id", employee_id)
+        .limit(1)
+        .execute()
+    )
+    if not result.data:
+        return None
+    row = result.data[0]
+    answers = row.get("answers") or []
+    graded = [a for a in answers if a.get("is_correct") is not None]
+    return {
+        "enrollmentId": row["id"],
+        "status": row["status"],
+        "startedAt": row.get("started_at"),
+        "completedAt": row.get("completed_at"),
+        "answered": len(answers),
+        "quizGraded": len(graded),
+        "quizCorrect": sum(1 for a in graded if a["is_correct"]),
+        "answers": [
+            {
+                "questionId": a["course_item_id"],
+                "answerText": a.get("answer_text"),
+                "answerOption": a.get("answer_option"),
+                "isCorrect": a.get("is_correct"),
+            }
+            for a in answers
+        ],
+    }
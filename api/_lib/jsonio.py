@@ -0,0 +1,95 @@
+"""
+JSON encoding for API responses and stored manifests.
+
+JSON_BACKEND selects the encoder: "orjson" (the default via "auto" when the
+package is installed) or the stdlib "json" module. Both write compact
+UTF-8 JSON that either backend reads back.
+
+- dumps()/loads(): bytes in, bytes out; manifests are written compact.
+- pydantic models are serialized by pydantic-core straight to JSON bytes
+  (embedded as orjson Fragments), without a model_dump() dict in between.
+- JSONBytesResponse: the app's default response class.
+- json_response(): return it from a route to skip FastAPI's
+  jsonable_encoder pass over large payloads (manifests, course lists,
+  extracted text).
+"""
+import json
+from datetime import date, datetime
+from typing import Any, Optional
+
+from starlette.responses import JSONResponse
+
+from api._lib.logger import get_logger
+from api._lib.settings import settings
+
+logger = get_logger(__name__)
+
+
+def _orjson():
+    if settings.json_backend == "stdlib":
+        return None
+    try:
+        import orjson
+    except ImportError:
+        if settings.json_backend == "orjson":
+            logger.warning("JSON_BACKEND=orjson but orjson is not installed; using the json module")
+        return None
+    return orjson
+
+
+_backend = _orjson()
+
+
+def backend_name() -> str:
+    return "orjson" if _backend is not None else "json"
+
+
+def _is_model(obj: Any) -> bool:
+    return hasattr(obj, "__pydantic_serializer__")
+
+
+def _orjson_default(obj: Any) -> Any:
+    if _is_model(obj):
+        import pydantic_core
+
+        return _backend.Fragment(pydantic_core.to_json(obj))
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _stdlib_default(obj: Any) -> Any:
+    if _is_model(obj):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    return str(obj)
+
+
+def dumps(obj: Any) -> bytes:
+    """Compact UTF-8 JSON bytes."""
+    if _backend is not None:
+        return _backend.dumps(obj, default=_orjson_default, option=_backend.OPT_NON_STR_KEYS)
+    return json.dumps(
+        obj, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_stdlib_default
+    ).encode("utf-8")
+
+
+def loads(data: "bytes | str") -> Any:
+    if _backend is not None:
+        return _backend.loads(data)
+    return json.loads(data)
+
+
+class JSONBytesResponse(JSONResponse):
+    """JSONResponse rendered with dumps() (orjson when available)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def json_response(content: Any, status_code: int = 200, headers: Optional[dict] = None) -> JSONBytesResponse:
+    """Response that FastAPI returns as-is (no jsonable_encoder pass)."""
+    return JSONBytesResponse(content, status_code=status_code, headers=headers)
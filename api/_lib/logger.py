@@ -1,17 +1,135 @@
 """
 Structured logging utilities for FastAPI application.
 Provides consistent logging format and safe token redaction.
+
+Records are handed to a QueueHandler on the calling thread and formatted and
+written by a QueueListener thread, so a log call on the event loop costs an
+enqueue instead of formatting + a blocking stdout write (LOG_QUEUE=false
+writes synchronously). The message itself is formatted lazily on the
+listener thread, so %-style calls (`logger.debug("x=%s", x)`) defer the
+string work too.
+
+LOG_FORMAT=json emits one JSON object per record with the request id,
+user id and any `extra={...}` fields (e.g. the timing fields of the
+request_timing line). LOG_DEBUG_SAMPLE_RATE keeps only that fraction of
+DEBUG records.
 """
+import atexit
+import json
 import logging
+import queue
+import random
 import sys
-from typing import Optional
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Callable, Dict, Optional
+
+from api._lib.settings import settings
+
+TEXT_FORMAT = '%(asctime)s [%(levelname)s] %(name)s: %(message)s'
+
+# Attributes every LogRecord has; anything else came from `extra=`
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+# Per-request fields (request_id, user_id). A dict rather than one var per
+# field so values bound in worker threads (which run on a copy of the
+# context) are visible to the rest of the request.
+_log_context: ContextVar[Optional[Dict[str, Any]]] = ContextVar("log_context", default=None)
+
+_listener: Optional[QueueListener] = None
+
+
+def bind_log_context(**fields: Any) -> None:
+    """Attach fields (e.g. user_id) to every record logged for the current request."""
+    context = _log_context.get()
+    if context is not None:
+        context.update(fields)
+
+
+def current_request_id() -> Optional[str]:
+    context = _log_context.get()
+    return context.get("request_id") if context else None
+
+
+class _ContextFilter(logging.Filter):
+    """Runs on the calling thread: stamps request fields, samples DEBUG records."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno <= logging.DEBUG:
+            rate = settings.log_debug_sample_rate
+            if rate < 1.0 and random.random() >= rate:
+                return False
+        context = _log_context.get()
+        if context:
+            for key, value in context.items():
+                if not hasattr(record, key):
+                    setattr(record, key, value)
+        return True
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stock prepare() formats the message and traceback here so the
+        # record can cross a process boundary; this queue is in-process.
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: ts, level, logger, message + context/extra fields."""
 
-# Configure root logger
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(name)s: %(message)s',
-    handlers=[logging.StreamHandler(sys.stdout)]
-)
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+def configure_logging() -> None:
+    """(Re)configure the root logger from settings. Safe to call more than once."""
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter() if settings.log_format == "json" else logging.Formatter(TEXT_FORMAT))
+
+    if settings.log_queue:
+        log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        handler: logging.Handler = _DeferredQueueHandler(log_queue)
+        _listener = QueueListener(log_queue, stream)
+        _listener.start()
+    else:
+        handler = stream
+    handler.addFilter(_ContextFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(settings.log_level.upper())
+
+
+def _flush_logs() -> None:
+    if _listener is not None:
+        _listener.stop()
+
+
+configure_logging()
+atexit.register(_flush_logs)
 
 
 def get_logger(name: str) -> logging.Logger:
@@ -50,3 +168,34 @@ def redact_token(token: Optional[str], show_chars: int = 8) -> str:
         return "***"
 
     return f"{token[:show_chars]}***"
+
+
+class RequestContextMiddleware:
+    """
+    Pure ASGI middleware: opens the per-request log context with a request id
+    (incoming X-Request-ID or a new one) and echoes it as X-Request-ID.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = dict(scope.get("headers") or []).get(b"x-request-id", b"").decode("latin-1")
+        request_id = incoming[:64] or uuid.uuid4().hex
+        token = _log_context.set({"request_id": request_id})
+
+        async def send_with_id(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-request-id", request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            _log_context.reset(token)
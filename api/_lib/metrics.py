@@ -0,0 +1,289 @@
+"""
+In-process Prometheus metrics, exposed at GET /api/metrics in the text
+exposition format (no client library, no external service).
+
+- HTTP: request counts and latency histograms per route template, plus an
+  in-flight gauge (MetricsMiddleware).
+- Upstreams: latency histograms and error counts per component (auth,
+  postgrest, storage, yandex), fed from the timing spans in
+  api/_lib/timing.py.
+- Ingest: parse durations by file type and bytes ingested by file type.
+- Caches: hit ratios of the storage download cache and the email/profile/
+  draft-text/signed-URL TTL caches, read at scrape time.
+
+Values are per serverless instance; Prometheus aggregates across instances.
+"""
+import bisect
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from api._lib.timing import add_observer
+
+LabelValues = Tuple[str, ...]
+
+# Seconds; covers cached reads (ms) through LLM calls (tens of seconds)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(labels.get(n, "")) for n in self.label_names)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.label_names, k)} {v:g}" for k, v in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        collect: Optional[Callable[[], Dict[LabelValues, float]]] = None,
+    ) -> None:
+        super().__init__(name, help, labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._collect = collect
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def render(self) -> List[str]:
+        if self._collect is not None:
+            items = sorted(self._collect().items())
+        else:
+            with self._lock:
+                items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.label_names, k)} {v:g}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [bucket counts..., +Inf count, sum]
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        lines = self.header()
+        for key, series in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = _labels(self.label_names, key, f'le="{bound:g}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative:g}")
+            cumulative += series[len(self.buckets)]
+            inf = _labels(self.label_names, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{inf} {cumulative:g}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {cumulative:g}")
+        return lines
+
+
+# =============================================================================
+# Collectors
+# =============================================================================
+
+HTTP_REQUESTS = Counter(
+    "adapt_http_requests_total", "HTTP requests by route template and status.", ("method", "route", "status")
+)
+HTTP_DURATION = Histogram(
+    "adapt_http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route")
+)
+HTTP_IN_FLIGHT = Gauge("adapt_http_requests_in_flight", "HTTP requests currently being served.")
+
+UPSTREAM_DURATION = Histogram(
+    "adapt_upstream_duration_seconds", "Upstream call latency by component.", ("component", "op")
+)
+UPSTREAM_ERRORS = Counter(
+    "adapt_upstream_errors_total", "Upstream calls that raised, by component.", ("component",)
+)
+
+PARSE_DURATION = Histogram(
+    "adapt_parse_duration_seconds", "Document parse time by file type.", ("kind",)
+)
+INGESTED_BYTES = Counter(
+    "adapt_ingested_bytes_total", "Bytes of uploaded course files read by the API, by file type.", ("kind",)
+)
+BLOB_REUSED_BYTES = Counter(
+    "adapt_blob_reused_bytes_total", "Bytes of course files not stored again because an identical blob existed."
+)
+
+# Span name (api/_lib/timing.py) -> upstream component label
+_SPAN_COMPONENTS = {"auth": "auth", "db": "postgrest", "storage": "storage", "yandex": "yandex"}
+
+
+def _on_span(name: str, duration_ms: float, attrs: Dict[str, Any]) -> None:
+    seconds = duration_ms / 1000
+    if name == "parse":
+        PARSE_DURATION.observe(seconds, kind=attrs.get("kind", "other"))
+        return
+    component = _SPAN_COMPONENTS.get(name)
+    if component is None:
+        return
+    # storage spans carry the bucket method, db spans the table/RPC name
+    op = attrs.get("op") or attrs.get("target", "")
+    UPSTREAM_DURATION.observe(seconds, component=component, op=op)
+    if attrs.get("error"):
+        UPSTREAM_ERRORS.inc(component=component)
+
+
+add_observer(_on_span)
+
+
+def record_ingest(kind: str, size: int) -> None:
+    """Count bytes of an uploaded course file (kind: file extension without the dot)."""
+    INGESTED_BYTES.inc(size, kind=kind or "other")
+
+
+def record_blob_reuse(size: int) -> None:
+    """Count bytes of a course file deduplicated against an existing blob (BLOB_STORE)."""
+    BLOB_REUSED_BYTES.inc(size)
+
+
+def _cache_ratios() -> Dict[LabelValues, float]:
+    from api._lib import course_files, email_status, profiles, signed_urls
+    from api._lib.storage_cache import cache_stats
+
+    ratios: Dict[LabelValues, float] = {}
+    storage = cache_stats()
+    if storage.get("enabled"):
+        ratios[("storage",)] = storage["hit_ratio"]
+    for cache_name, cache in (
+        ("check_email", email_status._cache),
+        ("profile", profiles._profile_cache),
+        ("draft_text", course_files._draft_text_cache),
+        ("signed_url", signed_urls._url_cache),
+    ):
+        stats = cache.stats()
+        lookups = stats["hits"] + stats["misses"]
+        ratios[(cache_name,)] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    return ratios
+
+
+CACHE_HIT_RATIO = Gauge(
+    "adapt_cache_hit_ratio", "Hit ratio of in-process caches since instance start.", ("cache",), collect=_cache_ratios
+)
+
+_REGISTRY: List[_Metric] = [
+    HTTP_REQUESTS,
+    HTTP_DURATION,
+    HTTP_IN_FLIGHT,
+    UPSTREAM_DURATION,
+    UPSTREAM_ERRORS,
+    PARSE_DURATION,
+    INGESTED_BYTES,
+    BLOB_REUSED_BYTES,
+    CACHE_HIT_RATIO,
+]
+
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in _REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# =============================================================================
+# Middleware
+# =============================================================================
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: per-route request counts, latency and in-flight gauge."""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            # Route template (e.g. /api/courses/{course_id}) keeps label cardinality bounded
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope.get("method", "")
+            HTTP_REQUESTS.inc(method=method, route=route, status=status)
+            HTTP_DURATION.observe(time.perf_counter() - t0, method=method, route=route)
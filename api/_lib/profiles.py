@@ -0,0 +1,95 @@
+"""
+Profile repository: one PostgREST round trip per operation.
+
+Writes are sent with `Prefer: return=representation` (postgrest's default
+ReturnMethod), so the written row comes back in the write response instead
+of through a follow-up `select("*").maybe_single()`.
+
+get_cached_profile() serves the auth dependency from a short-TTL per-user
+cache (PROFILE_CACHE_SECONDS); every write below refreshes it with the row
+it got back, so an instance never serves a role older than its own writes.
+"""
+from typing import Any, Dict, Optional, Tuple
+
+from api._lib.logger import get_logger
+from api._lib.settings import settings
+from api._lib.ttl_cache import TTLCache
+
+logger = get_logger(__name__)
+
+PROFILES_TABLE = "profiles"
+
+_profile_cache: TTLCache = TTLCache(ttl=settings.profile_cache_seconds)
+
+
+def _first(result: Any) -> Optional[Dict[str, Any]]:
+    data = result.data if result is not None else None
+    if isinstance(data, list):
+        return data[0] if data else None
+    return data or None
+
+
+def get_profile(client: Any, user_id: str, columns: str = "*") -> Optional[Dict[str, Any]]:
+    result = client.table(PROFILES_TABLE).select(columns).eq("id", user_id).maybe_single().execute()
+    return _first(result)
+
+
+def get_cached_profile(client: Any, user_id: str) -> Optional[Dict[str, Any]]:
+    """Profile from the per-user cache, loading it on a miss (missing profiles are not cached)."""
+    if settings.profile_cache_seconds <= 0:
+        return get_profile(client, user_id)
+    profile = _profile_cache.get(user_id)
+    if profile is None:
+        profile = get_profile(client, user_id)
+        if profile is not None:
+            _profile_cache.set(user_id, profile)
+    return profile
+
+
+def _remember(user_id: str, profile: Optional[Dict[str, Any]]) -> None:
+    if profile is None:
+        _profile_cache.invalidate(user_id)
+    elif settings.profile_cache_seconds > 0:
+        _profile_cache.set(user_id, profile)
+
+
+def upsert_profile(client: Any, row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """INSERT ... ON CONFLICT (id) DO UPDATE ... RETURNING *."""
+    _profile_cache.invalidate(row["id"])
+    result = client.table(PROFILES_TABLE).upsert(row, on_conflict="id").execute()
+    profile = _first(result)
+    _remember(row["id"], profile)
+    return profile
+
+
+def update_profile(client: Any, user_id: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """UPDATE ... WHERE id = user_id RETURNING *; None if no such profile."""
+    _profile_cache.invalidate(user_id)
+    result = client.table(PROFILES_TABLE).update(fields).eq("id", user_id).execute()
+    profile = _first(result)
+    _remember(user_id, profile)
+    return profile
+
+
+def ensure_profile(client: Any, row: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+    """
+    Create the profile unless it exists.
+
+    INSERT ... ON CONFLICT DO NOTHING RETURNING * returns the new row, or
+    nothing when the profile was already there; only then is it read back.
+
+    Returns:
+        (profile, created)
+    """
+    result = (
+        client.table(PROFILES_TABLE)
+        .upsert(row, on_conflict="id", ignore_duplicates=True)
+        .execute()
+    )
+    created = _first(result)
+    if created is not None:
+        _remember(row["id"], created)
+        return created, True
+
+    existing = get_profile(client, row["id"])
+    return (existing or row), False
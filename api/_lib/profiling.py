@@ -0,0 +1,106 @@
+"""
+Opt-in per-request profiling.
+
+A request is run under cProfile when either
+- it carries `X-Profiler-Token: <PROFILER_TOKEN>` (admin-only shared secret), or
+- it is picked by PROFILER_SAMPLE_RATE (fraction of requests, 0 = never).
+
+The profile id is returned in the X-Profile-Id response header and the
+pstats dump is saved as `<id>.prof` under PROFILER_DIR, or uploaded to
+PROFILER_STORAGE_PREFIX ("bucket/prefix") when that is set. Open it with
+`python -m pstats <file>`, snakeviz, or convert it for flamegraph tools
+(e.g. flameprof).
+
+cProfile is deterministic and per-thread: it sees the request's coroutine
+code on the event loop thread (including synchronous parsing called from
+async routes) but not work handed to worker threads, and other requests
+interleaving on the same event loop show up in it too. Only one request is
+profiled at a time; others run unprofiled while a profile is in progress.
+"""
+import asyncio
+import cProfile
+import hmac
+import os
+import random
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict
+
+from api._lib.logger import get_logger
+from api._lib.settings import settings
+
+logger = get_logger(__name__)
+
+# cProfile cannot run two profilers at once on 3.12
+_active = threading.Lock()
+
+
+def _wants_profile(scope: Dict[str, Any]) -> bool:
+    if settings.profiler_token:
+        supplied = dict(scope.get("headers") or []).get(b"x-profiler-token", b"").decode("latin-1")
+        if supplied and hmac.compare_digest(supplied, settings.profiler_token):
+            return True
+    rate = settings.profiler_sample_rate
+    return rate > 0 and random.random() < rate
+
+
+def _save_profile(profiler: cProfile.Profile, profile_id: str) -> str:
+    """Write the pstats dump; returns where it went."""
+    os.makedirs(settings.profiler_dir, exist_ok=True)
+    local_path = os.path.join(settings.profiler_dir, f"{profile_id}.prof")
+    profiler.dump_stats(local_path)
+
+    if not settings.profiler_storage_prefix:
+        return local_path
+
+    from api._lib.supabase_admin import get_admin_client
+
+    bucket, _, prefix = settings.profiler_storage_prefix.strip("/").partition("/")
+    object_path = f"{prefix}/{profile_id}.prof" if prefix else f"{profile_id}.prof"
+    with open(local_path, "rb") as f:
+        get_admin_client().storage.from_(bucket).upload(
+            object_path, f.read(), {"content-type": "application/octet-stream", "upsert": "true"}
+        )
+    os.remove(local_path)
+    return f"{bucket}/{object_path}"
+
+
+class ProfilerMiddleware:
+    """Pure ASGI middleware: cProfile selected requests, X-Profile-Id header."""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or not _wants_profile(scope) or not _active.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{uuid.uuid4().hex[:8]}"
+
+        async def send_with_id(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", profile_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        profiler = cProfile.Profile()
+        t0 = time.perf_counter()
+        try:
+            profiler.enable()
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profiler.disable()
+            _active.release()
+            elapsed_ms = (time.perf_counter() - t0) * 1000
+            try:
+                location = await asyncio.to_thread(_save_profile, profiler, profile_id)
+                logger.info(
+                    "profile saved id=%s path=%s total_ms=%.1f location=%s",
+                    profile_id, scope.get("path"), elapsed_ms, location,
+                    extra={"profile_id": profile_id, "profile_location": location},
+                )
+            except Exception as e:
+                logger.error(f"Failed to save profile {profile_id}: {e}")
@@ -0,0 +1,61 @@
+"""
+Per-key fixed-window rate limiter for public endpoints (keyed by client IP).
+
+State is per serverless instance, which is enough to blunt enumeration and
+retry storms from a single client without an external store.
+"""
+import math
+import threading
+import time
+from typing import Dict, Tuple
+
+from starlette.requests import Request
+
+
+class RateLimiter:
+    """Allow at most `limit` hits per `window` seconds for each key."""
+
+    def __init__(self, limit: int, window: float = 60.0, max_keys: int = 50_000) -> None:
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._windows: Dict[str, Tuple[float, int]] = {}
+
+    def hit(self, key: str) -> Tuple[bool, int]:
+        """
+        Record one request for key.
+
+        Returns:
+            (allowed, retry_after_seconds)
+        """
+        if self.limit <= 0:
+            return True, 0
+        now = time.monotonic()
+        with self._lock:
+            start, count = self._windows.get(key, (now, 0))
+            if now - start >= self.window:
+                start, count = now, 0
+            count += 1
+            self._windows[key] = (start, count)
+            if len(self._windows) > self.max_keys:
+                self._prune(now)
+        if count > self.limit:
+            return False, max(1, math.ceil(self.window - (now - start)))
+        return True, 0
+
+    def _prune(self, now: float) -> None:
+        expired = [k for k, (start, _) in self._windows.items() if now - start >= self.window]
+        for k in expired:
+            del self._windows[k]
+
+
+def client_ip(request: Request) -> str:
+    """Best-effort client address behind Vercel's proxy."""
+    real_ip = request.headers.get("x-real-ip")
+    if real_ip:
+        return real_ip.strip()
+    forwarded = request.headers.get("x-forwarded-for")
+    if forwarded:
+        return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
@@ -26,6 +26,82 @@ class Settings(BaseSettings):
     yandex_project_id: str = ""    # Yandex Cloud project/folder billing ID
     yandex_prompt_id: str = ""     # Yandex AI Studio prompt template ID
     yandex_model_uri: str = ""     # optional override, e.g. "yandexgpt-lite/latest"
+    yandex_base_url: str = "https://rest-assistant.api.cloud.yandex.net/v1"  # override for local stand-in
+
+    # Text cleanup stage between parsing and prompt assembly
+    text_cleanup: bool = True
+
+    # Storage backend behind get_admin_client().storage
+    storage_backend: Literal["supabase", "local", "memory"] = "supabase"
+    storage_local_root: str = "/tmp/adapt-storage"   # root for the "local" backend
+    storage_signing_secret: str = ""                 # HMAC key for local signed URLs
+    storage_public_url: str = ""                     # origin prefixed to local signed URLs
+
+    # Read-through cache for storage downloads (memory LRU + /tmp disk tier)
+    storage_cache: bool = True
+    storage_cache_memory_mb: int = 64
+    storage_cache_dir: str = "/tmp/adapt-storage-cache"
+    storage_cache_disk_mb: int = 512
+    storage_cache_max_object_mb: int = 16
+    # Opt-in staleness window: serve cached objects without ETag revalidation
+    # for this long. Writes invalidate only the local instance, so with several
+    # instances reads may be this stale; 0 = always revalidate (If-None-Match)
+    storage_cache_fresh_seconds: float = 0.0
+
+    # Compression for parsed text and manifests: "gzip" | "zstd" | "none"
+    storage_compression: Literal["gzip", "zstd", "none"] = "gzip"
+
+    # Where finalized courses live: "storage" (manifest.json) | "db" (courses tables)
+    course_store: Literal["storage", "db"] = "storage"
+
+    # Store uploaded originals once per SHA-256 under _blobs/ (see api/_lib/blob_store.py)
+    blob_store: bool = False
+
+    # POST /api/auth/check-email: result cache and per-IP rate limit
+    check_email_cache_seconds: float = 60.0           # confirmed accounts
+    check_email_negative_cache_seconds: float = 10.0  # unknown / unconfirmed emails
+    check_email_rate_limit: int = 20                  # requests per minute per IP (0 = off)
+
+    # Per-user profile cache behind get_current_user_with_profile (0 = off)
+    profile_cache_seconds: float = 30.0
+
+    # Course files processed concurrently per draft/process request (download,
+    # parse and uploads of one file overlap with the others)
+    storage_concurrency: int = 4
+
+    # Lifetime of course file download URLs; cached until a minute before expiry
+    signed_url_expires_seconds: int = 600
+
+    # Per-instance cache of draft combined text read by /api/training/generate (0 = off)
+    draft_text_cache_seconds: float = 600.0
+
+    # Server-Timing header + per-request timing summary log line
+    server_timing: bool = True
+
+    # JSON encoder for responses and manifests: "auto" (orjson if installed) | "orjson" | "stdlib"
+    json_backend: Literal["auto", "orjson", "stdlib"] = "auto"
+
+    # Response compression: codecs in server preference order (br needs
+    # `brotli`, zstd needs `zstandard`), bodies below the threshold go as-is
+    response_compression: bool = True
+    response_compression_encodings: str = "zstd,br,gzip"
+    response_compression_min_bytes: int = 1024
+
+    # Bearer token required by GET /api/metrics (empty = open)
+    metrics_token: str = ""
+
+    # Logging: "text" lines or one JSON object per record, written by a
+    # background QueueListener thread unless log_queue is off
+    log_level: str = "INFO"
+    log_format: Literal["text", "json"] = "text"
+    log_queue: bool = True
+    log_debug_sample_rate: float = 1.0               # fraction of DEBUG records kept
+
+    # Opt-in cProfile of single requests (X-Profiler-Token header or sampling)
+    profiler_token: str = ""
+    profiler_sample_rate: float = 0.0
+    profiler_dir: str = "/tmp/adapt-profiles"
+    profiler_storage_prefix: str = ""                # "bucket/prefix" to upload instead
 
     # Vercel deployment metadata
     vercel_env: str = "local"
@@ -49,4 +125,40 @@ settings = Settings(
     yandex_project_id=os.getenv("YANDEX_PROJECT_ID", ""),
     yandex_prompt_id=os.getenv("YANDEX_PROMPT_ID", ""),
     yandex_model_uri=os.getenv("YANDEX_MODEL_URI", ""),
+    yandex_base_url=os.getenv("YANDEX_BASE_URL", "https://rest-assistant.api.cloud.yandex.net/v1"),
+    text_cleanup=os.getenv("TEXT_CLEANUP", "true"),  # type: ignore
+    storage_backend=os.getenv("STORAGE_BACKEND", "supabase"),  # type: ignore
+    storage_local_root=os.getenv("STORAGE_LOCAL_ROOT", "/tmp/adapt-storage"),
+    storage_signing_secret=os.getenv("STORAGE_SIGNING_SECRET", ""),
+    storage_public_url=os.getenv("STORAGE_PUBLIC_URL", ""),
+    storage_cache=os.getenv("STORAGE_CACHE", "true"),  # type: ignore
+    storage_cache_memory_mb=os.getenv("STORAGE_CACHE_MEMORY_MB", "64"),  # type: ignore
+    storage_cache_dir=os.getenv("STORAGE_CACHE_DIR", "/tmp/adapt-storage-cache"),
+    storage_cache_disk_mb=os.getenv("STORAGE_CACHE_DISK_MB", "512"),  # type: ignore
+    storage_cache_max_object_mb=os.getenv("STORAGE_CACHE_MAX_OBJECT_MB", "16"),  # type: ignore
+    storage_cache_fresh_seconds=os.getenv("STORAGE_CACHE_FRESH_SECONDS", "0"),  # type: ignore
+    storage_compression=os.getenv("STORAGE_COMPRESSION", "gzip"),  # type: ignore
+    course_store=os.getenv("COURSE_STORE", "storage"),  # type: ignore
+    blob_store=os.getenv("BLOB_STORE", "false"),  # type: ignore
+    check_email_cache_seconds=os.getenv("CHECK_EMAIL_CACHE_SECONDS", "60"),  # type: ignore
+    check_email_negative_cache_seconds=os.getenv("CHECK_EMAIL_NEGATIVE_CACHE_SECONDS", "10"),  # type: ignore
+    check_email_rate_limit=os.getenv("CHECK_EMAIL_RATE_LIMIT", "20"),  # type: ignore
+    profile_cache_seconds=os.getenv("PROFILE_CACHE_SECONDS", "30"),  # type: ignore
+    storage_concurrency=os.getenv("STORAGE_CONCURRENCY", "4"),  # type: ignore
+    signed_url_expires_seconds=os.getenv("SIGNED_URL_EXPIRES_SECONDS", "600"),  # type: ignore
+    draft_text_cache_seconds=os.getenv("DRAFT_TEXT_CACHE_SECONDS", "600"),  # type: ignore
+    server_timing=os.getenv("SERVER_TIMING", "true"),  # type: ignore
+    metrics_token=os.getenv("METRICS_TOKEN", ""),
+    json_backend=os.getenv("JSON_BACKEND", "auto"),  # type: ignore
+    response_compression=os.getenv("RESPONSE_COMPRESSION", "true"),  # type: ignore
+    response_compression_encodings=os.getenv("RESPONSE_COMPRESSION_ENCODINGS", "zstd,br,gzip"),
+    response_compression_min_bytes=os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024"),  # type: ignore
+    log_level=os.getenv("LOG_LEVEL", "INFO"),
+    log_format=os.getenv("LOG_FORMAT", "text"),  # type: ignore
+    log_queue=os.getenv("LOG_QUEUE", "true"),  # type: ignore
+    log_debug_sample_rate=os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0"),  # type: ignore
+    profiler_token=os.getenv("PROFILER_TOKEN", ""),
+    profiler_sample_rate=os.getenv("PROFILER_SAMPLE_RATE", "0"),  # type: ignore
+    profiler_dir=os.getenv("PROFILER_DIR", "/tmp/adapt-profiles"),
+    profiler_storage_prefix=os.getenv("PROFILER_STORAGE_PREFIX", ""),
 )
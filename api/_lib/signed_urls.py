@@ -0,0 +1,62 @@
+"""
+Signed download URLs with a per-instance cache.
+
+URLs are issued for SIGNED_URL_EXPIRES_SECONDS and reused from the cache
+until REFRESH_MARGIN_SECONDS before they expire, so every URL handed out
+stays valid for at least that long. Misses for a whole course go to
+storage in a single create_signed_urls call.
+"""
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from api._lib.logger import get_logger
+from api._lib.settings import settings
+from api._lib.ttl_cache import TTLCache
+
+logger = get_logger(__name__)
+
+REFRESH_MARGIN_SECONDS = 60
+
+# (bucket, path) -> (url, expires_at epoch seconds)
+_url_cache: TTLCache = TTLCache(ttl=max(settings.signed_url_expires_seconds - REFRESH_MARGIN_SECONDS, 0))
+
+
+def _url_of(item: Dict[str, Any]) -> Optional[str]:
+    return item.get("signedURL") or item.get("signedUrl")
+
+
+def signed_urls(supabase: Any, bucket: str, paths: List[str]) -> Dict[str, Tuple[str, int]]:
+    """
+    Signed URLs for paths in bucket: {path: (url, expires_at)}. Paths the
+    storage could not sign (missing objects) are left out.
+    """
+    expires_in = settings.signed_url_expires_seconds
+    cacheable = expires_in > REFRESH_MARGIN_SECONDS
+    result: Dict[str, Tuple[str, int]] = {}
+    missing: List[str] = []
+    for path in dict.fromkeys(paths):
+        cached = _url_cache.get((bucket, path)) if cacheable else None
+        if cached is not None:
+            result[path] = cached
+        else:
+            missing.append(path)
+    if not missing:
+        return result
+
+    expires_at = int(time.time()) + expires_in
+    items = supabase.storage.from_(bucket).create_signed_urls(missing, expires_in=expires_in)
+    for path, item in zip(missing, items):
+        url = _url_of(item)
+        if not url or item.get("error"):
+            logger.warning(f"No signed URL for {bucket}/{path}: {item.get('error')}")
+            continue
+        result[path] = (url, expires_at)
+        if cacheable:
+            _url_cache.set((bucket, path), (url, expires_at))
+    return result
+
+
+def invalidate_signed_urls(bucket: str, paths: List[str]) -> None:
+    """Forget cached URLs of deleted objects."""
+    for path in paths:
+        _url_cache.invalidate((bucket, path))
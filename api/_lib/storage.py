@@ -0,0 +1,497 @@
+"""
+Pluggable storage backends for the admin client.
+
+`get_admin_client().storage` is one of:
+- "supabase": storage3 SyncStorageClient (production)
+- "local":    files under STORAGE_LOCAL_ROOT (survives restarts)
+- "memory":   process-local dict (tests, benchmarks, profiling)
+
+The local backends mirror the subset of the storage3 interface used by the
+API (list_buckets/create_bucket/update_bucket/from_ and, per bucket,
+upload/update/download/list/remove/copy/move/create_signed_url(s)) with the
+same semantics: uploads fail on existing paths unless upserted, missing
+objects raise, list() returns one folder level with Supabase-shaped items.
+
+iter_download() reads an object in chunks from any backend (storage3 has
+no streaming download, so it streams the object endpoint directly).
+"""
+import functools
+import hashlib
+import hmac
+import json
+import mimetypes
+import os
+import secrets
+import threading
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+from api._lib.settings import settings
+
+# Signing key for local signed URLs; random per process unless configured.
+_SIGNING_SECRET = settings.storage_signing_secret or secrets.token_hex(32)
+
+# Route that serves local signed URLs (see api/_routers/health.py).
+LOCAL_SIGNED_PREFIX = "/api/storage/local"
+
+DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+
+
+class StorageError(Exception):
+    """Raised by local backends; payload mirrors storage3.StorageException."""
+
+    def __init__(self, status_code: int, error: str, message: str) -> None:
+        super().__init__({"statusCode": status_code, "error": error, "message": message})
+        self.status_code = status_code
+        self.message = message
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _clean_path(path: str) -> str:
+    """Normalize an object key and reject traversal outside the bucket."""
+    parts = [p for p in path.replace("\\", "/").split("/") if p not in ("", ".")]
+    if any(p == ".." for p in parts):
+        raise StorageError(400, "invalid_key", f"Invalid key: {path}")
+    return "/".join(parts)
+
+
+def _read_payload(file: Any) -> bytes:
+    """Accept the same upload payloads as storage3 (bytes, file object, path)."""
+    if isinstance(file, (bytes, bytearray, memoryview)):
+        return bytes(file)
+    if hasattr(file, "read"):
+        return file.read()
+    with open(file, "rb") as fh:
+        return fh.read()
+
+
+def sign_path(bucket: str, path: str, expires_in: int) -> str:
+    """Build a local signed URL for bucket/path valid for expires_in seconds."""
+    expires = int(time.time()) + int(expires_in)
+    token = _signature(bucket, path, expires)
+    base = settings.storage_public_url.rstrip("/")
+    return f"{base}{LOCAL_SIGNED_PREFIX}/{quote(bucket)}/{quote(path)}?token={token}&expires={expires}"
+
+
+def verify_signature(bucket: str, path: str, token: str, expires: int) -> bool:
+    """Check a token produced by sign_path."""
+    if expires < time.time():
+        return False
+    return hmac.compare_digest(token, _signature(bucket, path, expires))
+
+
+def _signature(bucket: str, path: str, expires: int) -> str:
+    msg = f"{bucket}/{path}:{expires}".encode("utf-8")
+    return hmac.new(_SIGNING_SECRET.encode("utf-8"), msg, hashlib.sha256).hexdigest()
+
+
+class LocalBucket:
+    """storage3-compatible file API over a LocalStorageBase backend."""
+
+    def __init__(self, backend: "LocalStorageBase", bucket_id: str) -> None:
+        self.id = bucket_id
+        self._backend = backend
+
+    def upload(self, path: str, file: Any, file_options: Optional[dict] = None) -> dict:
+        return self._write(path, file, file_options, allow_overwrite=None)
+
+    def update(self, path: str, file: Any, file_options: Optional[dict] = None) -> dict:
+        return self._write(path, file, file_options, allow_overwrite=True)
+
+    def _write(self, path: str, file: Any, file_options: Optional[dict], allow_overwrite: Optional[bool]) -> dict:
+        options = {k.lower(): v for k, v in (file_options or {}).items()}
+        upsert = str(options.get("upsert", options.get("x-upsert", "false"))).lower() == "true"
+        key = _clean_path(path)
+        exists = self._backend._exists(self.id, key)
+        if allow_overwrite is None and exists and not upsert:
+            raise StorageError(409, "Duplicate", "The resource already exists")
+        if allow_overwrite and not exists:
+            raise StorageError(404, "not_found", "Object not found")
+
+        data = _read_payload(file)
+        meta = {
+            "mimetype": options.get("content-type") or mimetypes.guess_type(key)[0] or "application/octet-stream",
+            "size": len(data),
+            "eTag": f'"{hashlib.md5(data).hexdigest()}"',
+            "lastModified": _now_iso(),
+            "cacheControl": f"max-age={options.get('cache-control', 3600)}",
+        }
+        self._backend._put(self.id, key, data, meta)
+        return {"Key": f"{self.id}/{key}"}
+
+    def download(self, path: str, options: Optional[dict] = None) -> bytes:
+        data, _ = self._backend._get(self.id, _clean_path(path))
+        return data
+
+    def info(self, path: str) -> dict:
+        """Object metadata (mimetype, size, eTag, lastModified)."""
+        _, meta = self._backend._get(self.id, _clean_path(path), with_data=False)
+        return meta
+
+    def download_with_info(self, path: str) -> Tuple[bytes, dict]:
+        """Object bytes and metadata read together (used by the read-through cache)."""
+        return self._backend._get(self.id, _clean_path(path))
+
+    def iter_download(self, path: str, chunk_size: int = DOWNLOAD_CHUNK_BYTES) -> Iterator[bytes]:
+        """Object bytes in chunks of up to chunk_size."""
+        return self._backend._iter(self.id, _clean_path(path), chunk_size)
+
+    def remove(self, paths: List[str]) -> List[dict]:
+        removed = []
+        for path in paths:
+            key = _clean_path(path)
+            if self._backend._delete(self.id, key):
+                removed.append({"name": key, "bucket_id": self.id})
+        return removed
+
+    def copy(self, from_path: str, to_path: str) -> dict:
+        data, meta = self._backend._get(self.id, _clean_path(from_path))
+        self._backend._put(self.id, _clean_path(to_path), data, dict(meta, lastModified=_now_iso()))
+        return {"Key": f"{self.id}/{_clean_path(to_path)}"}
+
+    def move(self, from_path: str, to_path: str) -> dict:
+        self.copy(from_path, to_path)
+        self._backend._delete(self.id, _clean_path(from_path))
+        return {"message": "Successfully moved"}
+
+    def list(self, path: Optional[str] = None, options: Optional[dict] = None) -> List[dict]:
+        """One folder level under `path`, Supabase-shaped, sorted by name."""
+        opts = options or {}
+        limit = int(opts.get("limit", 100))
+        offset = int(opts.get("offset", 0))
+        desc = (opts.get("sortBy") or {}).get("order") == "desc"
+        prefix = _clean_path(path or "")
+        prefix = f"{prefix}/" if prefix else ""
+
+        folders: Dict[str, None] = {}
+        files: Dict[str, dict] = {}
+        for key in self._backend._keys(self.id):
+            if not key.startswith(prefix):
+                continue
+            rest = key[len(prefix):]
+            head, sep, _ = rest.partition("/")
+            if sep:
+                folders[head] = None
+            else:
+                _, meta = self._backend._get(self.id, key, with_data=False)
+                files[head] = meta
+
+        items = [
+            {"name": name, "id": None, "updated_at": None, "created_at": None,
+             "last_accessed_at": None, "metadata": None}
+            for name in folders
+        ] + [
+            {"name": name, "id": hashlib.md5(f"{self.id}/{prefix}{name}".encode()).hexdigest(),
+             "updated_at": meta["lastModified"], "created_at": meta["lastModified"],
+             "last_accessed_at": meta["lastModified"], "metadata": meta}
+            for name, meta in files.items()
+        ]
+        items.sort(key=lambda i: i["name"], reverse=desc)
+        return items[offset:offset + limit]
+
+    def create_signed_url(self, path: str, expires_in: int, options: Optional[dict] = None) -> dict:
+        key = _clean_path(path)
+        if not self._backend._exists(self.id, key):
+            raise StorageError(400, "not_found", "Object not found")
+        url = sign_path(self.id, key, expires_in)
+        return {"signedURL": url, "signedUrl": url}
+
+    def create_signed_urls(self, paths: List[str], expires_in: int, options: Optional[dict] = None) -> List[dict]:
+        results = []
+        for path in paths:
+            key = _clean_path(path)
+            if self._backend._exists(self.id, key):
+                url = sign_path(self.id, key, expires_in)
+                results.append({"path": path, "signedURL": url, "signedUrl": url, "error": None})
+            else:
+                results.append({
+                    "path": path, "signedURL": None, "signedUrl": None,
+                    "error": "Either the object does not exist or you do not have access to it",
+                })
+        return results
+
+
+class LocalStorageBase:
+    """Bucket bookkeeping shared by the memory and filesystem backends."""
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._buckets: Dict[str, dict] = {}
+
+    # ── bucket API (subset of storage3.SyncStorageBucketAPI) ──────────────
+
+    def list_buckets(self) -> List[SimpleNamespace]:
+        with self._lock:
+            return [SimpleNamespace(id=b, name=b, **opts) for b, opts in self._buckets.items()]
+
+    def get_bucket(self, id: str) -> SimpleNamespace:
+        with self._lock:
+            if id not in self._buckets:
+                raise StorageError(404, "Bucket not found", "Bucket not found")
+            return SimpleNamespace(id=id, name=id, **self._buckets[id])
+
+    def create_bucket(self, id: str, name: Optional[str] = None, options: Optional[dict] = None) -> dict:
+        with self._lock:
+            if id in self._buckets:
+                raise StorageError(409, "Duplicate", "The resource already exists")
+            self._buckets[id] = dict(options or {})
+            self._save_buckets()
+        return {"name": id}
+
+    def update_bucket(self, id: str, options: dict) -> dict:
+        with self._lock:
+            if id not in self._buckets:
+                raise StorageError(404, "Bucket not found", "Bucket not found")
+            self._buckets[id].update(options)
+            self._save_buckets()
+        return {"message": "Successfully updated"}
+
+    def from_(self, id: str) -> LocalBucket:
+        return LocalBucket(self, id)
+
+    def _save_buckets(self) -> None:
+        pass
+
+    # ── object primitives implemented by subclasses ────────────────────────
+
+    def _exists(self, bucket: str, key: str) -> bool:
+        raise NotImplementedError
+
+    def _get(self, bucket: str, key: str, with_data: bool = True) -> Tuple[bytes, dict]:
+        raise NotImplementedError
+
+    def _put(self, bucket: str, key: str, data: bytes, meta: dict) -> None:
+        raise NotImplementedError
+
+    def _delete(self, bucket: str, key: str) -> bool:
+        raise NotImplementedError
+
+    def _keys(self, bucket: str) -> Iterable[str]:
+        raise NotImplementedError
+
+    def _iter(self, bucket: str, key: str, chunk_size: int) -> Iterator[bytes]:
+        data, _ = self._get(bucket, key)
+        view = memoryview(data)
+        for offset in range(0, len(data), chunk_size):
+            yield bytes(view[offset:offset + chunk_size])
+
+
+class MemoryStorage(LocalStorageBase):
+    """Process-local object store."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._objects: Dict[Tuple[str, str], Tuple[bytes, dict]] = {}
+
+    def _exists(self, bucket: str, key: str) -> bool:
+        return (bucket, key) in self._objects
+
+    def _get(self, bucket: str, key: str, with_data: bool = True) -> Tuple[bytes, dict]:
+        try:
+            data, meta = self._objects[(bucket, key)]
+        except KeyError:
+            raise StorageError(404, "not_found", "Object not found")
+        return (data if with_data else b""), dict(meta)
+
+    def _put(self, bucket: str, key: str, data: bytes, meta: dict) -> None:
+        with self._lock:
+            self._objects[(bucket, key)] = (data, meta)
+
+    def _delete(self, bucket: str, key: str) -> bool:
+        with self._lock:
+            return self._objects.pop((bucket, key), None) is not None
+
+    def _keys(self, bucket: str) -> Iterable[str]:
+        with self._lock:
+            return [k for b, k in self._objects if b == bucket]
+
+
+class FilesystemStorage(LocalStorageBase):
+    """
+    Objects stored as files under {root}/{bucket}/{key}; metadata lives in
+    {root}/.meta/{bucket}/{key}.json and bucket options in {root}/.buckets.json.
+    """
+
+    def __init__(self, root: str) -> None:
+        super().__init__()
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+        buckets_file = os.path.join(self.root, ".buckets.json")
+        if os.path.exists(buckets_file):
+            with open(buckets_file, "r", encoding="utf-8") as fh:
+                self._buckets = json.load(fh)
+
+    def _save_buckets(self) -> None:
+        with open(os.path.join(self.root, ".buckets.json"), "w", encoding="utf-8") as fh:
+            json.dump(self._buckets, fh)
+
+    def _data_path(self, bucket: str, key: str) -> str:
+        return os.path.join(self.root, bucket, *key.split("/"))
+
+    def _meta_path(self, bucket: str, key: str) -> str:
+        return os.path.join(self.root, ".meta", bucket, *key.split("/")) + ".json"
+
+    def _exists(self, bucket: str, key: str) -> bool:
+        return os.path.isfile(self._data_path(bucket, key))
+
+    def _get(self, bucket: str, key: str, with_data: bool = True) -> Tuple[bytes, dict]:
+        data_path = self._data_path(bucket, key)
+        if not os.path.isfile(data_path):
+            raise StorageError(404, "not_found", "Object not found")
+        try:
+            with open(self._meta_path(bucket, key), "r", encoding="utf-8") as fh:
+                meta = json.load(fh)
+        except (OSError, ValueError):
+            stat = os.stat(data_path)
+            meta = {
+                "mimetype": mimetypes.guess_type(key)[0] or "application/octet-stream",
+                "size": stat.st_size,
+                "eTag": f'"{int(stat.st_mtime_ns)}-{stat.st_size}"',
+                "lastModified": datetime.fromtimestamp(stat.st_mtime, timezone.utc).isoformat(),
+            }
+        if not with_data:
+            return b"", meta
+        with open(data_path, "rb") as fh:
+            return fh.read(), meta
+
+    def _iter(self, bucket: str, key: str, chunk_size: int) -> Iterator[bytes]:
+        data_path = self._data_path(bucket, key)
+        if not os.path.isfile(data_path):
+            raise StorageError(404, "not_found", "Object not found")
+        with open(data_path, "rb") as fh:
+            while chunk := fh.read(chunk_size):
+                yield chunk
+
+    def _put(self, bucket: str, key: str, data: bytes, meta: dict) -> None:
+        data_path = self._data_path(bucket, key)
+        meta_path = self._meta_path(bucket, key)
+        os.makedirs(os.path.dirname(data_path), exist_ok=True)
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        tmp_path = f"{data_path}.{secrets.token_hex(4)}.tmp"
+        with open(tmp_path, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp_path, data_path)
+        with open(meta_path, "w", encoding="utf-8") as fh:
+            json.dump(meta, fh)
+
+    def _delete(self, bucket: str, key: str) -> bool:
+        data_path = self._data_path(bucket, key)
+        if not os.path.isfile(data_path):
+            return False
+        os.remove(data_path)
+        try:
+            os.remove(self._meta_path(bucket, key))
+        except OSError:
+            pass
+        return True
+
+    def _keys(self, bucket: str) -> Iterable[str]:
+        base = os.path.join(self.root, bucket)
+        keys = []
+        for dirpath, _, filenames in os.walk(base):
+            for filename in filenames:
+                if filename.endswith(".tmp"):
+                    continue
+                rel = os.path.relpath(os.path.join(dirpath, filename), base)
+                keys.append(rel.replace(os.sep, "/"))
+        return keys
+
+
+class TimedBucket:
+    """Bucket proxy recording a "storage" timing span for every backend call."""
+
+    def __init__(self, inner: Any) -> None:
+        self._inner = inner
+        self.id = inner.id
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._inner, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def call(*args: Any, **kwargs: Any) -> Any:
+            from api._lib.timing import span
+
+            with span("storage", op=name):
+                return attr(*args, **kwargs)
+        return call
+
+
+class TimedStorage(TimedBucket):
+    """Storage client proxy: bucket management calls are timed, from_() hands out TimedBuckets."""
+
+    def __init__(self, inner: Any) -> None:
+        self._inner = inner
+
+    def from_(self, id: str) -> TimedBucket:
+        return TimedBucket(self._inner.from_(id))
+
+
+def iter_download(bucket_api: Any, path: str, chunk_size: int = DOWNLOAD_CHUNK_BYTES) -> Iterator[bytes]:
+    """
+    Stream an object in chunks without holding it in memory. Local buckets
+    implement iter_download(); for storage3 the object endpoint is streamed
+    through the bucket's httpx client (bypassing the download cache).
+    """
+    if hasattr(bucket_api, "iter_download"):
+        yield from bucket_api.iter_download(path, chunk_size)
+        return
+    client = bucket_api._client
+    with client.stream("GET", f"object/{bucket_api.id}/{path.lstrip('/')}") as response:
+        if response.status_code >= 400:
+            response.read()
+            raise StorageError(response.status_code, "download_failed", response.text[:200])
+        yield from response.iter_bytes(chunk_size)
+
+
+def object_exists(bucket_api: Any, path: str) -> bool:
+    """
+    Whether an object exists, from its metadata only (no listing, no body).
+    Local buckets answer through info(); for storage3 the object endpoint is
+    asked with a HEAD request through the bucket's httpx client.
+    """
+    if hasattr(bucket_api, "info"):
+        try:
+            bucket_api.info(path)
+        except StorageError as e:
+            if e.status_code == 404:
+                return False
+            raise
+        return True
+    response = bucket_api._client.head(f"object/{bucket_api.id}/{path.lstrip('/')}")
+    if response.status_code in (400, 404):
+        return False
+    if response.status_code >= 400:
+        raise StorageError(response.status_code, "head_failed", f"HEAD {path} failed")
+    return True
+
+
+def create_storage_client(base_url: str, headers: Dict[str, str]):
+    """
+    Build the storage client selected by settings.storage_backend, wrapped in
+    timing spans and the read-through download cache (unless STORAGE_CACHE
+    is disabled). Cache hits therefore never show up as storage time.
+    """
+    backend = settings.storage_backend
+    if backend == "memory":
+        client: Any = MemoryStorage()
+    elif backend == "local":
+        client = FilesystemStorage(settings.storage_local_root)
+    else:
+        from storage3 import SyncStorageClient
+
+        client = SyncStorageClient(url=f"{base_url}/storage/v1", headers=headers)
+
+    client = TimedStorage(client)
+    if settings.storage_cache:
+        from api._lib.storage_cache import CachedStorage, get_download_cache
+
+        client = CachedStorage(client, get_download_cache())
+    return client
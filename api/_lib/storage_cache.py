@@ -0,0 +1,357 @@
+"""
+Two-tier read-through cache for storage downloads.
+
+Wraps the storage client returned by create_storage_client(): every
+bucket's download() is served from an in-memory LRU (bounded by bytes),
+then from a disk tier under STORAGE_CACHE_DIR (/tmp survives warm
+serverless invocations), and only then from the backend. Entries are keyed
+by bucket/path and revalidated with the object's ETag (If-None-Match) on
+every read, so a 304 costs a round trip but no body. STORAGE_CACHE_FRESH_SECONDS
+opts into skipping revalidation for that long; writes through the cached
+client (upload/update/remove/move/copy) invalidate their paths only on this
+instance, so other instances may serve data up to that old.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from api._lib.logger import get_logger
+from api._lib.settings import settings
+
+logger = get_logger(__name__)
+
+
+class _Entry:
+    __slots__ = ("data", "etag", "last_modified", "validated_at", "from_disk")
+
+    def __init__(self, data: bytes, etag: Optional[str], last_modified: Optional[str], validated_at: float) -> None:
+        self.data = data
+        self.etag = etag
+        self.last_modified = last_modified
+        self.validated_at = validated_at
+        self.from_disk = False
+
+
+class _CacheStats:
+    """Counters exposed through cache_stats()."""
+
+    def __init__(self) -> None:
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.bytes_served = 0
+        self.bytes_fetched = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        hits = self.memory_hits + self.disk_hits + self.revalidated
+        lookups = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "bytes_served": self.bytes_served,
+            "bytes_fetched": self.bytes_fetched,
+        }
+
+
+class DownloadCache:
+    """Memory LRU + disk tier shared by every CachedBucket in the process."""
+
+    def __init__(self, memory_bytes: int, disk_dir: str, disk_bytes: int, max_object_bytes: int) -> None:
+        self.memory_bytes = memory_bytes
+        self.disk_dir = disk_dir
+        self.disk_bytes = disk_bytes
+        self.max_object_bytes = max_object_bytes
+        self.stats = _CacheStats()
+        self._lock = threading.Lock()
+        self._lru: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lru_size = 0
+        self._disk_size: Optional[int] = None
+
+    # ── memory tier ────────────────────────────────────────────────────────
+
+    def _mem_get(self, key: str) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None:
+                self._lru.move_to_end(key)
+            return entry
+
+    def _mem_put(self, key: str, entry: _Entry) -> None:
+        size = len(entry.data)
+        if size > self.memory_bytes // 4:
+            return
+        with self._lock:
+            old = self._lru.pop(key, None)
+            if old is not None:
+                self._lru_size -= len(old.data)
+            self._lru[key] = entry
+            self._lru_size += size
+            while self._lru_size > self.memory_bytes and self._lru:
+                _, evicted = self._lru.popitem(last=False)
+                self._lru_size -= len(evicted.data)
+
+    # ── disk tier ──────────────────────────────────────────────────────────
+
+    def _disk_paths(self, key: str) -> Tuple[str, str]:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        base = os.path.join(self.disk_dir, digest[:2], digest)
+        return base + ".bin", base + ".json"
+
+    def _disk_get(self, key: str) -> Optional[_Entry]:
+        if not self.disk_bytes:
+            return None
+        data_path, meta_path = self._disk_paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as fh:
+                meta = json.load(fh)
+            if meta.get("key") != key:
+                return None
+            with open(data_path, "rb") as fh:
+                data = fh.read()
+        except (OSError, ValueError):
+            return None
+        return _Entry(data, meta.get("etag"), meta.get("last_modified"), meta.get("validated_at", 0.0))
+
+    def _disk_put(self, key: str, entry: _Entry) -> None:
+        if not self.disk_bytes or len(entry.data) > self.disk_bytes // 4:
+            return
+        data_path, meta_path = self._disk_paths(key)
+        try:
+            os.makedirs(os.path.dirname(data_path), exist_ok=True)
+            tmp_path = f"{data_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as fh:
+                fh.write(entry.data)
+            os.replace(tmp_path, data_path)
+            with open(meta_path, "w", encoding="utf-8") as fh:
+                json.dump({
+                    "key": key,
+                    "etag": entry.etag,
+                    "last_modified": entry.last_modified,
+                    "validated_at": entry.validated_at,
+                }, fh)
+            self._account_disk(len(entry.data))
+        except OSError as e:
+            logger.warning(f"Storage cache disk write failed (non-fatal): {e}")
+
+    def _disk_delete(self, key: str) -> None:
+        for path in self._disk_paths(key):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _account_disk(self, added: int) -> None:
+        """Track disk usage and evict least-recently-written files when over budget."""
+        with self._lock:
+            if self._disk_size is None:
+                self._disk_size = sum(size for _, size, _ in self._scan_disk())
+            else:
+                self._disk_size += added
+            if self._disk_size <= self.disk_bytes:
+                return
+            files = sorted(self._scan_disk(), key=lambda f: f[2])
+            target = int(self.disk_bytes * 0.8)
+            total = sum(size for _, size, _ in files)
+            for path, size, _ in files:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                    os.remove(path[:-4] + ".json")
+                except OSError:
+                    pass
+                total -= size
+            self._disk_size = total
+
+    def _scan_disk(self) -> List[Tuple[str, int, float]]:
+        found = []
+        for dirpath, _, filenames in os.walk(self.disk_dir):
+            for name in filenames:
+                if name.endswith(".bin"):
+                    path = os.path.join(dirpath, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    found.append((path, st.st_size, st.st_mtime))
+        return found
+
+    # ── public API ─────────────────────────────────────────────────────────
+
+    def lookup(self, key: str) -> Optional[_Entry]:
+        """Find an entry in memory, then on disk (promoting disk hits)."""
+        entry = self._mem_get(key)
+        if entry is not None:
+            return entry
+        entry = self._disk_get(key)
+        if entry is not None:
+            entry.validated_at = min(entry.validated_at, time.time())
+            entry.from_disk = True
+            self._mem_put(key, entry)
+        return entry
+
+    def store(self, key: str, entry: _Entry) -> None:
+        if len(entry.data) > self.max_object_bytes:
+            return
+        self._mem_put(key, entry)
+        self._disk_put(key, entry)
+
+    def count(self, **deltas: int) -> None:
+        """Add to stats counters; downloads run in the threadpool, so under the LRU lock."""
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self.stats, name, getattr(self.stats, name) + delta)
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            old = self._lru.pop(key, None)
+            if old is not None:
+                self._lru_size -= len(old.data)
+            self.stats.invalidations += 1
+        self._disk_delete(key)
+
+
+class CachedBucket:
+    """Bucket proxy whose download() reads through the DownloadCache."""
+
+    def __init__(self, inner: Any, cache: DownloadCache) -> None:
+        self._inner = inner
+        self._cache = cache
+        self.id = inner.id
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._inner, name)
+
+    def _key(self, path: str) -> str:
+        return f"{self.id}/{path.strip('/')}"
+
+    def _fetch(self, path: str, etag: Optional[str]) -> Tuple[Optional[bytes], Optional[str], Optional[str]]:
+        """
+        Conditional download. Returns (data, etag, last_modified); data is
+        None when the cached etag is still current.
+        """
+        if hasattr(self._inner, "download_with_info"):
+            data, meta = self._inner.download_with_info(path)
+            if etag and meta.get("eTag") == etag:
+                return None, etag, meta.get("lastModified")
+            return data, meta.get("eTag"), meta.get("lastModified")
+
+        client = getattr(self._inner, "_client", None)
+        if client is None:
+            return self._inner.download(path), None, None
+        from api._lib.timing import span
+
+        headers = {"If-None-Match": etag} if etag else {}
+        with span("storage", op="download"):
+            response = client.get(f"object/{self.id}/{path.lstrip('/')}", headers=headers)
+        if response.status_code == 304:
+            return None, etag, response.headers.get("last-modified")
+        if response.status_code >= 400:
+            # Re-issue through storage3 so callers get its usual StorageException.
+            return self._inner.download(path), None, None
+        return response.content, response.headers.get("etag"), response.headers.get("last-modified")
+
+    def download(self, path: str, options: Optional[dict] = None) -> bytes:
+        if options:
+            return self._inner.download(path, options)
+
+        cache = self._cache
+        key = self._key(path)
+        entry = cache.lookup(key)
+        now = time.time()
+
+        if entry is not None and now - entry.validated_at < settings.storage_cache_fresh_seconds:
+            if entry.from_disk:
+                cache.count(disk_hits=1, bytes_served=len(entry.data))
+                entry.from_disk = False
+            else:
+                cache.count(memory_hits=1, bytes_served=len(entry.data))
+            return entry.data
+
+        data, etag, last_modified = self._fetch(path, entry.etag if entry is not None and entry.etag else None)
+        if data is None and entry is not None:
+            entry.validated_at = now
+            cache.store(key, entry)
+            cache.count(revalidated=1, bytes_served=len(entry.data))
+            return entry.data
+
+        assert data is not None
+        cache.count(misses=1, bytes_fetched=len(data))
+        cache.store(key, _Entry(data, etag, last_modified, now))
+        return data
+
+    # ── writes invalidate the affected paths ───────────────────────────────
+
+    def upload(self, path: str, file: Any, file_options: Optional[dict] = None) -> Any:
+        self._cache.invalidate(self._key(path))
+        return self._inner.upload(path, file, file_options)
+
+    def update(self, path: str, file: Any, file_options: Optional[dict] = None) -> Any:
+        self._cache.invalidate(self._key(path))
+        return self._inner.update(path, file, file_options)
+
+    def remove(self, paths: List[str]) -> Any:
+        for path in paths:
+            self._cache.invalidate(self._key(path))
+        return self._inner.remove(paths)
+
+    def move(self, from_path: str, to_path: str) -> Any:
+        self._cache.invalidate(self._key(from_path))
+        self._cache.invalidate(self._key(to_path))
+        return self._inner.move(from_path, to_path)
+
+    def copy(self, from_path: str, to_path: str) -> Any:
+        self._cache.invalidate(self._key(to_path))
+        return self._inner.copy(from_path, to_path)
+
+
+class CachedStorage:
+    """Storage client proxy that hands out CachedBucket instances."""
+
+    def __init__(self, inner: Any, cache: DownloadCache) -> None:
+        self._inner = inner
+        self._cache = cache
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._inner, name)
+
+    def from_(self, id: str) -> CachedBucket:
+        return CachedBucket(self._inner.from_(id), self._cache)
+
+
+_cache: Optional[DownloadCache] = None
+
+
+def get_download_cache() -> DownloadCache:
+    """Process-wide cache instance (created on first use)."""
+    global _cache
+    if _cache is None:
+        _cache = DownloadCache(
+            memory_bytes=settings.storage_cache_memory_mb * 1024 * 1024,
+            disk_dir=settings.storage_cache_dir,
+            disk_bytes=settings.storage_cache_disk_mb * 1024 * 1024,
+            max_object_bytes=settings.storage_cache_max_object_mb * 1024 * 1024,
+        )
+    return _cache
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Hit ratio and byte counters for the storage download cache."""
+    if not settings.storage_cache:
+        return {"enabled": False}
+    cache = get_download_cache()
+    with cache._lock:
+        memory_used = cache._lru_size
+        entries = len(cache._lru)
+        stats = cache.stats.as_dict()
+    return {"enabled": True, "memory_bytes": memory_used, "memory_entries": entries, **stats}
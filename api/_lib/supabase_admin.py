@@ -4,14 +4,46 @@ Replaces the monolithic supabase==2.9.1 SDK to eliminate unused sub-packages:
 - realtime (websockets) — not used, ~1.5 MB + websockets dep
 - supafunc — not used, ~0.1 MB
 
-Exposes the same .storage, .auth, and .table() interface as supabase.Client
-so that api/index.py and api/_lib/auth.py require zero changes.
-"""
-from storage3 import SyncStorageClient
-from gotrue import SyncGoTrueClient
-from postgrest import SyncPostgrestClient
+Exposes the same .storage, .auth, .table() and .rpc() interface as supabase.Client
+so that the routers and api/_lib/auth.py require zero changes.
+
+.storage is selected by STORAGE_BACKEND (see api/_lib/storage.py): the
+Supabase storage3 client, a local filesystem root, or an in-memory store.
 
+gotrue/postgrest (and their httpx stack) are imported when the client is
+first built, not at module import, so routes that never touch Supabase
+(e.g. /api/health) do not pay for them on a cold start.
+"""
 from api._lib.settings import settings
+from api._lib.storage import create_storage_client
+from api._lib.timing import span
+
+# Supabase CLI defaults, used for auth/postgrest when a local storage backend
+# is selected without explicit credentials.
+_LOCAL_SUPABASE_URL = "http://127.0.0.1:54321"
+
+
+class _TimedQuery:
+    """PostgREST builder proxy: execute() records a "db" timing span."""
+
+    def __init__(self, builder, target: str) -> None:
+        self._builder = builder
+        self._target = target
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._builder, name)
+        if name == "execute":
+            def execute():
+                with span("db", target=self._target):
+                    return attr()
+            return execute
+        if not callable(attr):
+            return attr
+
+        def chain(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            return _TimedQuery(result, self._target) if hasattr(result, "execute") else result
+        return chain
 
 
 class _AdminClient:
@@ -21,16 +53,16 @@ class _AdminClient:
     """
 
     def __init__(self, url: str, service_role_key: str) -> None:
+        from gotrue import SyncGoTrueClient
+        from postgrest import SyncPostgrestClient
+
         base_url = url.rstrip("/")
         base_headers = {
             "apikey": service_role_key,
             "Authorization": f"Bearer {service_role_key}",
         }
 
-        self.storage = SyncStorageClient(
-            url=f"{base_url}/storage/v1",
-            headers=base_headers,
-        )
+        self.storage = create_storage_client(base_url, base_headers)
 
         self.auth = SyncGoTrueClient(
             url=f"{base_url}/auth/v1",
@@ -47,7 +79,10 @@ class _AdminClient:
         )
 
     def table(self, table_name: str):
-        return self._postgrest.from_(table_name)
+        return _TimedQuery(self._postgrest.from_(table_name), table_name)
+
+    def rpc(self, fn: str, params: "dict | None" = None):
+        return _TimedQuery(self._postgrest.rpc(fn, params or {}), fn)
 
 
 _admin_client: "_AdminClient | None" = None
@@ -60,12 +95,13 @@ def get_admin_client() -> _AdminClient:
     """
     global _admin_client
     if _admin_client is None:
-        if not settings.supabase_url or not settings.supabase_service_role_key:
+        local_storage = settings.storage_backend != "supabase"
+        if not local_storage and (not settings.supabase_url or not settings.supabase_service_role_key):
             raise ValueError(
                 "SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set in environment"
             )
         _admin_client = _AdminClient(
-            settings.supabase_url,
-            settings.supabase_service_role_key,
+            settings.supabase_url or _LOCAL_SUPABASE_URL,
+            settings.supabase_service_role_key or "local",
         )
     return _admin_client
@@ -0,0 +1,164 @@
+"""
+Text normalization stage between document parsing and prompt assembly.
+Strips running headers/footers, page numbers, table-of-contents leaders and
+hyphenation artifacts so the kb_chunks budget is spent on real material.
+"""
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import List
+
+# Lines inspected at the top and bottom of each page when looking for
+# running headers and footers.
+EDGE_LINES = 2
+
+# A line is boilerplate when it repeats on at least this share of pages.
+REPEAT_THRESHOLD = 0.5
+
+# Repetition detection needs enough pages to be meaningful.
+MIN_PAGES_FOR_REPEATS = 3
+
+_DIGITS_RE = re.compile(r"\d+")
+_SPACES_RE = re.compile(r"[ \t\u00a0\u2000-\u200b\u3000]+")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+_PAGE_NUMBER_RE = re.compile(
+    r"^[-–—\s]*(?:(?:стр\.?|страница|page|p\.)\s*)?\d{1,4}"
+    r"(?:\s*(?:из|of|/)\s*\d{1,4})?[-–—\s]*$",
+    re.IGNORECASE,
+)
+# A number alone on a line is only a page number when it follows the page
+# sequence (see _page_number_offsets); years and figures are kept.
+_BARE_NUMBER_RE = re.compile(r"^\d{1,4}$")
+_TOC_RE = re.compile(r"^\S.{1,200}?(?:\s*(?:\.\s?){4,}|\s*…{2,}|\s*_{4,})\s*\d{1,4}$")
+# Soft hyphens only mark where a word was split, so the halves are joined.
+# A visible hyphen at a line end may belong to the word ("кто-нибудь",
+# "из-за", "e-mail"): it is kept and only the line break goes.
+_SOFT_HYPHEN_BREAK_RE = re.compile(r"(\w)\u00ad\n[ \t]*(\w)")
+_HYPHEN_BREAK_RE = re.compile(r"(\w[-\u2010])\n[ \t]*([a-zа-яё])")
+
+
+@dataclass
+class CleanupResult:
+    """Normalized text plus size statistics for logging."""
+    text: str
+    original_chars: int
+    cleaned_chars: int
+    removed_lines: int
+
+    @property
+    def ratio(self) -> float:
+        """Cleaned size relative to the original (1.0 = nothing removed)."""
+        if not self.original_chars:
+            return 1.0
+        return self.cleaned_chars / self.original_chars
+
+
+def _line_key(line: str) -> str:
+    """Key used to match a running header/footer across pages.
+
+    Digits are masked so "Page 3" and "Page 4" fall into the same bucket.
+    """
+    return _DIGITS_RE.sub("#", _SPACES_RE.sub(" ", line).strip().lower())
+
+
+def _edge_indices(lines: List[str]) -> List[int]:
+    """Indices of the first and last EDGE_LINES non-empty lines of a page."""
+    non_empty = [i for i, line in enumerate(lines) if line.strip()]
+    return sorted(set(non_empty[:EDGE_LINES] + non_empty[-EDGE_LINES:]))
+
+
+def _find_repeated_keys(pages: List[List[str]]) -> set:
+    """Return line keys that appear in the header/footer zone of most pages."""
+    if len(pages) < MIN_PAGES_FOR_REPEATS:
+        return set()
+
+    counts: Counter = Counter()
+    for lines in pages:
+        keys = {_line_key(lines[i]) for i in _edge_indices(lines)}
+        counts.update(k for k in keys if k)
+
+    min_pages = max(MIN_PAGES_FOR_REPEATS, int(len(pages) * REPEAT_THRESHOLD))
+    return {key for key, n in counts.items() if n >= min_pages}
+
+
+def _page_number_offsets(pages: List[List[str]]) -> set:
+    """
+    Offsets (number minus page index) shared by bare numbers at the edges of
+    most pages: printed page numbers grow by one per page, so they keep the
+    same offset, while a year or figure at a page edge does not.
+    """
+    counts: Counter = Counter()
+    for index, lines in enumerate(pages):
+        offsets = set()
+        for i in _edge_indices(lines):
+            line = _SPACES_RE.sub(" ", lines[i]).strip()
+            if _BARE_NUMBER_RE.match(line):
+                offsets.add(int(line) - index)
+        counts.update(offsets)
+
+    min_pages = max(2, int(len(pages) * REPEAT_THRESHOLD))
+    return {offset for offset, n in counts.items() if n >= min_pages}
+
+
+def _is_page_number(line: str, index: int, offsets: set) -> bool:
+    if not _PAGE_NUMBER_RE.match(line):
+        return False
+    return not _BARE_NUMBER_RE.match(line) or int(line) - index in offsets
+
+
+def normalize_pages(pages: List[str]) -> CleanupResult:
+    """
+    Normalize extracted document text.
+
+    Args:
+        pages: Text per page (PDF) or a single-element list for flat formats
+
+    Returns:
+        CleanupResult with the joined, cleaned text and size statistics
+    """
+    original_chars = sum(len(p) for p in pages) + max(len(pages) - 1, 0)
+    split_pages = [p.replace("\r\n", "\n").replace("\r", "\n").split("\n") for p in pages]
+    repeated = _find_repeated_keys(split_pages)
+    paged = len(split_pages) > 1
+    offsets = _page_number_offsets(split_pages) if paged else set()
+
+    removed = 0
+    kept_pages: List[str] = []
+    for index, lines in enumerate(split_pages):
+        # Page numbers and running headers only live at the page edges;
+        # lone numbers in the body (table cells, years) are kept.
+        edges = set(_edge_indices(lines)) if paged else set()
+        kept: List[str] = []
+        for i, line in enumerate(lines):
+            line = _SPACES_RE.sub(" ", line).strip()
+            if not line:
+                kept.append("")
+                continue
+            at_edge = i in edges
+            if (
+                _TOC_RE.match(line)
+                or (at_edge and _is_page_number(line, index, offsets))
+                or (at_edge and not _BARE_NUMBER_RE.match(line) and _line_key(line) in repeated)
+            ):
+                removed += 1
+                continue
+            kept.append(line)
+        kept_pages.append("\n".join(kept).strip("\n"))
+
+    text = "\n".join(p for p in kept_pages if p)
+    text = _SOFT_HYPHEN_BREAK_RE.sub(r"\1\2", text)
+    text = _HYPHEN_BREAK_RE.sub(r"\1\2", text)
+    text = text.replace("\u00ad", "")
+    text = _BLANK_LINES_RE.sub("\n\n", text).strip()
+
+    return CleanupResult(
+        text=text,
+        original_chars=original_chars,
+        cleaned_chars=len(text),
+        removed_lines=removed,
+    )
+
+
+def normalize_text(text: str) -> CleanupResult:
+    """Normalize a flat text (DOCX/TXT) that has no page structure."""
+    return normalize_pages([text])
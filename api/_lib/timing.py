@@ -0,0 +1,155 @@
+"""
+Per-request timing spans and the Server-Timing header.
+
+ServerTimingMiddleware opens a RequestTimings for every HTTP request and
+keeps it in a ContextVar. span()/timed() record durations into it from any
+route or helper, including code running in worker threads via
+asyncio.to_thread / Starlette's threadpool (both copy the context). Spans
+with the same name are summed, so one request's five storage calls show up
+as a single `storage;dur=...;desc="5 calls"` entry.
+
+When the response starts the middleware emits
+    Server-Timing: auth;dur=41.2, storage;dur=88.0;desc="5 calls", total;dur=140.3
+and when it finishes it logs one summary line per request. Observers
+registered with add_observer() receive every span (see api/_lib/metrics.py).
+"""
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from api._lib.logger import get_logger
+from api._lib.settings import settings
+
+logger = get_logger(__name__)
+
+SpanObserver = Callable[[str, float, Dict[str, Any]], None]
+
+_observers: List[SpanObserver] = []
+
+
+class RequestTimings:
+    """Span totals for one request (thread-safe: helpers may run in threads)."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._spans: Dict[str, List[float]] = {}  # name -> [total_ms, count]
+
+    def add(self, name: str, duration_ms: float) -> None:
+        with self._lock:
+            entry = self._spans.setdefault(name, [0.0, 0])
+            entry[0] += duration_ms
+            entry[1] += 1
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def spans(self) -> List[Tuple[str, float, int]]:
+        with self._lock:
+            return [(name, total, count) for name, (total, count) in self._spans.items()]
+
+    def header_value(self) -> str:
+        parts = []
+        for name, total, count in self.spans():
+            part = f"{name};dur={total:.1f}"
+            if count > 1:
+                part += f';desc="{count} calls"'
+            parts.append(part)
+        parts.append(f"total;dur={self.elapsed_ms():.1f}")
+        return ", ".join(parts)
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+def add_observer(observer: SpanObserver) -> None:
+    """Receive (name, duration_ms, attrs) for every recorded span."""
+    if observer not in _observers:
+        _observers.append(observer)
+
+
+def record(name: str, duration_ms: float, **attrs: Any) -> None:
+    """Add a finished span to the current request (if any) and notify observers."""
+    timings = _current.get()
+    if timings is not None:
+        timings.add(name, duration_ms)
+    for observer in _observers:
+        try:
+            observer(name, duration_ms, attrs)
+        except Exception as e:
+            logger.debug("Span observer failed: %s", e)
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Time a block. The yielded dict can be updated with extra attributes
+    (e.g. status) before the block ends; observers see them.
+    """
+    t0 = time.perf_counter()
+    extra: Dict[str, Any] = dict(attrs)
+    try:
+        yield extra
+    except BaseException:
+        extra.setdefault("error", True)
+        raise
+    finally:
+        record(name, (time.perf_counter() - t0) * 1000, **extra)
+
+
+def timed(name: str, **attrs: Any) -> Callable:
+    """Decorator form of span()."""
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(name, **attrs):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class ServerTimingMiddleware:
+    """Pure ASGI middleware: per-request RequestTimings + Server-Timing header."""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or not settings.server_timing:
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        status = 500
+
+        async def send_with_header(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.header_value().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_header)
+        finally:
+            _current.reset(token)
+            spans = {f"{name}_ms": round(total, 1) for name, total, _ in timings.spans()}
+            total_ms = round(timings.elapsed_ms(), 1)
+            # Formatted on the log listener thread; JSON logs get the fields as keys
+            logger.info(
+                "request_timing method=%s path=%s status=%s total_ms=%.1f%s",
+                scope.get("method"), scope.get("path"), status, total_ms,
+                "".join(f" {k}={v}" for k, v in spans.items()),
+                extra={"method": scope.get("method"), "path": scope.get("path"),
+                       "status": status, "total_ms": total_ms, **spans},
+            )
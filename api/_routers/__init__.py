@@ -0,0 +1,9 @@
+"""
+API routers by area, included by api/index.py:
+
+- health: health checks, metrics and storage diagnostics
+- profile: roles, profiles and check-email
+- demo: landing-page demo requests
+- courses: course processing, listing and file downloads
+- training: course wizard (draft/generate/finalize) and employee progress
+"""
@@ -0,0 +1,563 @@
+"""
+Course processing, listing, detail, deletion and file download endpoints.
+"""
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+
+from api._lib.auth import get_current_user
+from api._lib.blob_store import adopt_blob, is_blob_path
+from api._lib.concurrency import gather_bounded
+from api._lib.course_files import (
+    COURSES_BUCKET,
+    MAX_FILE_SIZE,
+    cleanup_pages,
+    combined_text_path,
+    draft_preview,
+    ensure_courses_bucket,
+    forget_draft_text,
+    manifest_file,
+    parse_docx_bytes,
+    parse_pdf_pages,
+    parse_txt_bytes,
+    parsed_text_path,
+    remember_draft_text,
+    upload_artifact,
+)
+from api._lib.jsonio import json_response
+from api._lib.logger import get_logger
+from api._lib.metrics import record_blob_reuse, record_ingest
+from api._lib.settings import settings
+
+router = APIRouter()
+
+
+# =============================================================================
+# Courses Endpoints (Storage-based, no DB)
+# =============================================================================
+#
+# STORAGE SETUP REQUIRED:
+# Create a bucket named "courses" in your Supabase project:
+#   1. Go to Storage → Create bucket → Name: "courses", Public: false
+#   2. Set file size limit: 30MB
+#   3. Allowed MIME types: application/pdf, text/plain,
+#      application/vnd.openxmlformats-officedocument.wordprocessingml.document,
+#      application/msword
+#
+# File structure in bucket:
+#   {userId}/{courseId}/files/{filename}       ← original files
+#   {userId}/{courseId}/parsed/{filename}.txt  ← parsed text per file
+#   {userId}/{courseId}/parsed/combined.txt    ← all text combined
+#   {userId}/{courseId}/manifest.json          ← course metadata
+#
+# With COURSE_STORE=db finalized courses live in the courses/course_items
+# tables instead of manifest.json (api/_lib/course_store.py).
+# =============================================================================
+
+
+class FileInfo(BaseModel):
+    name: str
+    originalName: str
+    storagePath: str
+    mimeType: str
+    size: int
+
+
+class CourseProcessRequest(BaseModel):
+    courseId: str
+    userId: str
+    title: str
+    size: str
+    files: List[FileInfo]
+
+
+class CourseManifestFile(BaseModel):
+    fileId: str           # UUID filename in storage e.g. "abc123.pdf"
+    name: str             # original file name
+    type: str
+    size: int
+    storagePath: str
+    parseStatus: str  # "parsed" | "skipped" | "error"
+    parsedPath: Optional[str] = None
+    parseError: Optional[str] = None
+    sha256: Optional[str] = None  # set when BLOB_STORE keeps the file content-addressed
+
+
+class CourseManifest(BaseModel):
+    courseId: str
+    title: str
+    size: str
+    createdAt: str
+    overallStatus: str  # "ready" | "partial" | "error" | "processing"
+    textBytes: int
+    inviteCode: str
+    employeesCount: int = 0
+    files: List[CourseManifestFile]
+
+
+@router.post("/api/courses/process")
+async def process_course(
+    body: CourseProcessRequest,
+    user: dict = Depends(get_current_user),
+):
+    """
+    Process uploaded course files: parse text, save results, create manifest.
+
+    Called after client has already uploaded files to Supabase Storage.
+    Downloads each file, parses it, saves parsed text and manifest.json.
+    """
+    import asyncio
+    import random
+    import string
+    from datetime import datetime, timezone
+    from api._lib.course_store import CourseOwnedByOther, InviteCodeTaken, get_course_store
+    from api._lib.supabase_admin import get_admin_client
+
+    log = get_logger(__name__)
+    user_id = user["id"]
+    course_id = body.courseId
+
+    def _generate_invite_code(length: int = 6) -> str:
+        chars = string.ascii_uppercase + string.digits
+        return "".join(random.choices(chars, k=length))
+
+    log.info(f"POST /api/courses/process - userId={user_id}, courseId={course_id}")
+
+    # Security: ensure user can only process their own courses
+    if body.userId != user_id:
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+    # Enforce file size limits before downloading anything
+    MAX_TOTAL_SIZE = 300 * 1024 * 1024  # 300 MB
+    for f in body.files:
+        if f.size > MAX_FILE_SIZE:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Файл «{f.originalName}» ({f.size // (1024*1024)} МБ) превышает лимит 30 МБ.",
+            )
+    total_upload_size = sum(f.size for f in body.files)
+    if total_upload_size > MAX_TOTAL_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Суммарный размер файлов ({total_upload_size // (1024*1024)} МБ) превышает лимит 300 МБ.",
+        )
+
+    supabase = get_admin_client()
+    ensure_courses_bucket(supabase)
+
+    bucket_api = supabase.storage.from_(COURSES_BUCKET)
+
+    def _parse(ext: str, file_bytes: bytes):
+        """(cleanup or None, parse_status, parse_error) for one file (worker thread)."""
+        try:
+            if ext == ".pdf":
+                pages = parse_pdf_pages(file_bytes)
+            elif ext in (".txt",):
+                pages = [parse_txt_bytes(file_bytes)]
+            elif ext == ".docx":
+                pages = [parse_docx_bytes(file_bytes)]
+            elif ext == ".doc":
+                return None, "skipped", ".doc загружен, парсинг будет позже"
+            else:
+                return None, "skipped", f"Неподдерживаемый формат: {ext}"
+        except ValueError as e:
+            return None, "error", str(e)
+        return cleanup_pages(pages), "parsed", None
+
+    async def _process(file_info: FileInfo):
+        """Download, parse and save one file; returns (manifest entry, cleanup, text part)."""
+        file_path = file_info.storagePath
+        name_lower = file_info.originalName.lower()
+        ext = "." + name_lower.rsplit(".", 1)[-1] if "." in name_lower else ""
+
+        log.info(f"Processing file: {file_info.originalName} (ext={ext})")
+
+        sha256: Optional[str] = None
+
+        def _entry(**fields) -> CourseManifestFile:
+            return CourseManifestFile(
+                fileId=file_info.name,
+                name=file_info.originalName,
+                type=file_info.mimeType,
+                size=file_info.size,
+                storagePath=file_path,
+                sha256=sha256,
+                **fields,
+            )
+
+        # Download file from Storage
+        try:
+            file_bytes = await asyncio.to_thread(bucket_api.download, file_path)
+            record_ingest(ext.lstrip("."), len(file_bytes))
+        except Exception as e:
+            log.error(f"Failed to download {file_path}: {e}")
+            return _entry(parseStatus="error", parseError=f"Download failed: {str(e)}"), None, None
+
+        # Parse based on extension; with BLOB_STORE the course's own upload
+        # meanwhile becomes a content-addressed blob (dropped if one already
+        # exists). A blob path from the draft is only referenced, never moved.
+        parse = asyncio.to_thread(_parse, ext, file_bytes)
+        if settings.blob_store and (file_path.startswith(f"{user_id}/{course_id}/files/") or is_blob_path(file_path)):
+            adopted, parsed = await asyncio.gather(
+                asyncio.to_thread(adopt_blob, supabase, file_bytes, file_path, user_id, course_id),
+                parse,
+                return_exceptions=True,
+            )
+            if isinstance(parsed, Exception):
+                raise parsed
+            if isinstance(adopted, Exception):
+                log.warning(f"Could not move {file_path} to the blob store: {adopted}")
+            else:
+                file_path, sha256, reused = adopted
+                if reused:
+                    record_blob_reuse(len(file_bytes))
+                    log.info(f"{file_info.originalName} already stored as {file_path}, upload dropped")
+        else:
+            parsed = await parse
+        cleanup, parse_status, parse_error = parsed
+        if parse_status == "error":
+            log.warning(f"Parse error for {file_info.originalName}: {parse_error}")
+        if cleanup is None:
+            return _entry(parseStatus=parse_status, parseError=parse_error), None, None
+
+        log.info(
+            f"Cleaned {file_info.originalName}: chars {cleanup.original_chars} -> "
+            f"{cleanup.cleaned_chars} (ratio={cleanup.ratio:.2f}, removed_lines={cleanup.removed_lines})"
+        )
+
+        # Save parsed text to Storage
+        parsed_path = parsed_text_path(user_id, course_id, file_info.name)
+        part: Optional[str] = None
+        try:
+            await asyncio.to_thread(
+                upload_artifact,
+                supabase,
+                parsed_path,
+                cleanup.text.encode("utf-8"),
+                "text/plain; charset=utf-8",
+            )
+            part = f"=== {file_info.originalName} ===\n{cleanup.text}"
+        except Exception as e:
+            log.error(f"Failed to save parsed text for {file_info.originalName}: {e}")
+            parse_error = f"Parsed text save failed: {str(e)}"
+
+        entry = _entry(parseStatus=parse_status, parsedPath=parsed_path, parseError=parse_error)
+        return entry, cleanup, part
+
+    # Files are downloaded, parsed and saved concurrently (STORAGE_CONCURRENCY
+    # at a time); results keep the request order. combined.txt and the
+    # manifest are written only after every file is done.
+    results = await gather_bounded(_process(f) for f in body.files)
+    parsed_files: List[CourseManifestFile] = [entry for entry, _, _ in results]
+    combined_parts: List[str] = [part for _, _, part in results if part is not None]
+    cleanups = [cleanup for _, cleanup, _ in results if cleanup is not None]
+    total_text_bytes = sum(len(c.text.encode("utf-8")) for c in cleanups)
+    raw_chars = sum(c.original_chars for c in cleanups)
+    cleaned_chars = sum(c.cleaned_chars for c in cleanups)
+
+    # Combined text for question generation (truncate to 100k chars); it stays
+    # server-side in combined.txt, /api/training/generate reads it from there
+    combined_str = "\n\n".join(combined_parts) if combined_parts else ""
+    MAX_CHARS = 100_000
+    truncated = len(combined_str) > MAX_CHARS
+    if truncated:
+        combined_str = combined_str[:MAX_CHARS]
+
+    # Save combined.txt
+    if combined_parts:
+        try:
+            upload_artifact(
+                supabase,
+                combined_text_path(user_id, course_id),
+                combined_str.encode("utf-8"),
+                "text/plain; charset=utf-8",
+            )
+            remember_draft_text(user_id, course_id, combined_str)
+        except Exception as e:
+            log.error(f"Failed to save combined.txt: {e}")
+
+    # Determine overall status
+    statuses = [f.parseStatus for f in parsed_files]
+    if all(s == "parsed" for s in statuses):
+        overall_status = "ready"
+    elif any(s == "error" for s in statuses):
+        overall_status = "partial" if any(s == "parsed" for s in statuses) else "error"
+    else:
+        overall_status = "ready"
+
+    # Build and save manifest
+    manifest = CourseManifest(
+        courseId=course_id,
+        title=body.title,
+        size=body.size,
+        createdAt=datetime.now(timezone.utc).isoformat(),
+        overallStatus=overall_status,
+        textBytes=total_text_bytes,
+        inviteCode=_generate_invite_code(),
+        employeesCount=0,
+        files=[f.model_dump() for f in parsed_files],
+    )
+
+    # The DB store rejects invite codes already taken; draw a new one and retry
+    store = get_course_store(supabase)
+    for attempt in range(5):
+        try:
+            store.save(user_id, manifest.model_dump())
+            break
+        except InviteCodeTaken:
+            log.warning(f"Invite code {manifest.inviteCode} taken, retrying")
+            manifest.inviteCode = _generate_invite_code()
+        except CourseOwnedByOther:
+            log.warning(f"Course {course_id} belongs to another user")
+            raise HTTPException(status_code=403, detail="Course belongs to another user")
+        except Exception as e:
+            log.error(f"Failed to save manifest: {e}")
+            raise HTTPException(status_code=500, detail=f"Failed to save manifest: {str(e)}")
+    else:
+        raise HTTPException(status_code=500, detail="Failed to save manifest: no free invite code")
+
+    cleanup_ratio = round(cleaned_chars / raw_chars, 3) if raw_chars else 1.0
+
+    log.info(
+        f"Course processed - courseId={course_id}, status={overall_status}, "
+        f"files={len(parsed_files)}, extractedChars={len(combined_str)}, truncated={truncated}, "
+        f"rawChars={raw_chars}, cleanupRatio={cleanup_ratio}"
+    )
+
+    return json_response({
+        "ok": True,
+        "manifest": manifest,
+        "extractedPreview": draft_preview(combined_str),
+        "extractedStats": {
+            "chars": len(combined_str),
+            "filesCount": len([f for f in parsed_files if f.parseStatus == "parsed"]),
+            "truncated": truncated,
+            "rawChars": raw_chars,
+            "cleanupRatio": cleanup_ratio,
+        },
+    })
+
+
+@router.get("/api/courses/list")
+async def list_courses(user: dict = Depends(get_current_user)):
+    """
+    List all courses for the authenticated user (see api/_lib/course_store.py).
+    Returns courses sorted by createdAt descending.
+    """
+    from api._lib.course_store import StorageCourseStore, get_course_store
+    from api._lib.supabase_admin import get_admin_client
+
+    log = get_logger(__name__)
+    user_id = user["id"]
+
+    log.info(f"GET /api/courses/list - userId={user_id}")
+
+    supabase = get_admin_client()
+    store = get_course_store(supabase)
+    if isinstance(store, StorageCourseStore):
+        ensure_courses_bucket(supabase)
+
+    try:
+        courses = store.list_for_user(user_id)
+    except Exception as e:
+        log.error(f"Failed to list courses for user {user_id}: {e}")
+        return {"ok": True, "courses": []}
+
+    return json_response({"ok": True, "courses": courses})
+
+
+@router.get("/api/courses/{course_id}")
+async def get_course(course_id: str, user: dict = Depends(get_current_user)):
+    """
+    Get a single course manifest by courseId.
+    """
+    from api._lib.course_store import get_course_store
+
+    user_id = user["id"]
+
+    manifest = get_course_store().get(user_id, course_id)
+    if manifest is None:
+        raise HTTPException(status_code=404, detail="Course not found")
+
+    return json_response({"ok": True, "manifest": manifest})
+
+
+@router.delete("/api/courses/{course_id}")
+async def delete_course(course_id: str, user: dict = Depends(get_current_user)):
+    """
+    Delete a course: its record, source files and parsed text. Shared
+    originals (BLOB_STORE) are deleted only when no other course references
+    them.
+    """
+    from api._lib.blob_store import release_blobs
+    from api._lib.course_store import get_course_store
+    from api._lib.signed_urls import invalidate_signed_urls
+    from api._lib.supabase_admin import get_admin_client
+
+    log = get_logger(__name__)
+    user_id = user["id"]
+
+    log.info(f"DELETE /api/courses/{course_id} - userId={user_id}")
+
+    supabase = get_admin_client()
+    store = get_course_store(supabase)
+    manifest = store.get(user_id, course_id)
+    if manifest is None:
+        raise HTTPException(status_code=404, detail="Course not found")
+
+    try:
+        store.delete(user_id, manifest)
+    except Exception as e:
+        log.error(f"Failed to delete course {course_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to delete course: {str(e)}")
+
+    # Everything under the course folder (files/, parsed/, draft manifest)
+    bucket_api = supabase.storage.from_(COURSES_BUCKET)
+    prefix = f"{user_id}/{course_id}"
+    paths = [f"{prefix}/draft_manifest.json"]
+    released: List[str] = []
+    try:
+        for folder in ("files", "parsed"):
+            items = bucket_api.list(f"{prefix}/{folder}", {"limit": 1000})
+            paths += [f"{prefix}/{folder}/{item['name']}" for item in items or [] if item.get("id")]
+        bucket_api.remove(paths)
+        blob_paths = [f["storagePath"] for f in manifest.get("files", []) if is_blob_path(f.get("storagePath") or "")]
+        released = release_blobs(supabase, blob_paths, user_id, course_id)
+    except Exception as e:
+        # The course is gone already; leftovers only cost storage
+        log.warning(f"Could not remove all files of course {course_id}: {e}")
+    invalidate_signed_urls(COURSES_BUCKET, paths + released)
+    forget_draft_text(user_id, course_id)
+
+    return {"ok": True, "courseId": course_id, "deletedBlobs": len(released)}
+
+
+@router.get("/api/courses/{course_id}/files/{file_id}/download")
+async def download_course_file(
+    course_id: str,
+    file_id: str,
+    user: dict = Depends(get_current_user),
+):
+    """
+    Return a short-lived signed URL to download a course file.
+    file_id is the UUID filename stored in Storage (e.g. "abc123.pdf").
+    """
+    from api._lib.course_store import get_course_store
+    from api._lib.signed_urls import signed_urls
+    from api._lib.supabase_admin import get_admin_client
+
+    log = get_logger(__name__)
+    user_id = user["id"]
+
+    supabase = get_admin_client()
+
+    # Read manifest to verify the file belongs to this user's course
+    manifest = get_course_store(supabase).get(user_id, course_id)
+    if manifest is None:
+        raise HTTPException(status_code=404, detail="Course not found")
+
+    # Find matching file entry by fileId
+    file_entry = next(
+        (f for f in (manifest_file(user_id, course_id, e) for e in manifest.get("files", []))
+         if f.get("fileId") == file_id),
+        None,
+    )
+    if not file_entry:
+        raise HTTPException(status_code=404, detail="File not found in course")
+
+    storage_path = file_entry["storagePath"]
+
+    # Signed URL (SIGNED_URL_EXPIRES_SECONDS), reused from the cache while fresh
+    try:
+        signed = signed_urls(supabase, COURSES_BUCKET, [storage_path]).get(storage_path)
+        if signed is None:
+            raise ValueError("No signed URL in response")
+    except Exception as e:
+        log.error(f"Failed to create signed URL for {storage_path}: {e}")
+        raise HTTPException(status_code=500, detail=f"Could not generate download URL: {str(e)}")
+
+    return {
+        "ok": True,
+        "url": signed[0],
+        "expiresAt": signed[1],
+        "fileName": file_entry.get("name", file_id),
+    }
+
+
+@router.get("/api/courses/{course_id}/export")
+async def export_course(course_id: str, user: dict = Depends(get_current_user)):
+    """
+    Stream a ZIP of the course's source files, parsed text and manifest.
+    Objects are read from storage in chunks and zipped on the fly, so memory
+    use does not grow with course size (see api/_lib/course_export.py).
+    """
+    from urllib.parse import quote
+    from fastapi.responses import StreamingResponse
+    from api._lib.course_export import stream_course_zip
+    from api._lib.course_store import get_course_store
+    from api._lib.supabase_admin import get_admin_client
+
+    log = get_logger(__name__)
+    user_id = user["id"]
+
+    supabase = get_admin_client()
+    manifest = get_course_store(supabase).get(user_id, course_id)
+    if manifest is None:
+        raise HTTPException(status_code=404, detail="Course not found")
+
+    log.info(f"GET /api/courses/{course_id}/export - userId={user_id} files={len(manifest.get('files', []))}")
+
+    filename = f"{manifest.get('title') or course_id}.zip"
+    return StreamingResponse(
+        # Sync generator: Starlette iterates it in a worker thread
+        stream_course_zip(supabase, manifest, user_id),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f"attachment; filename=\"course-{course_id}.zip\"; "
+                                   f"filename*=UTF-8''{quote(filename)}",
+        },
+    )
+
+
+@router.get("/api/courses/{course_id}/files/urls")
+async def course_file_urls(course_id: str, user: dict = Depends(get_current_user)):
+    """
+    Signed download URLs for all files of a course in one request (one
+    create_signed_urls call for URLs not already cached).
+    """
+    from api._lib.course_store import get_course_store
+    from api._lib.signed_urls import signed_urls
+    from api._lib.supabase_admin import get_admin_client
+
+    log = get_logger(__name__)
+    user_id = user["id"]
+
+    supabase = get_admin_client()
+    manifest = get_course_store(supabase).get(user_id, course_id)
+    if manifest is None:
+        raise HTTPException(status_code=404, detail="Course not found")
+
+    files = [
+        f for f in (manifest_file(user_id, course_id, e) for e in manifest.get("files", []))
+        if f.get("fileId") and f.get("storagePath")
+    ]
+    try:
+        signed = signed_urls(supabase, COURSES_BUCKET, [f["storagePath"] for f in files])
+    except Exception as e:
+        log.error(f"Failed to create signed URLs for course {course_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Could not generate download URLs: {str(e)}")
+
+    return {
+        "ok": True,
+        "files": [
+            {
+                "fileId": f["fileId"],
+                "fileName": f.get("name", f["fileId"]),
+                "url": signed[f["storagePath"]][0],
+                "expiresAt": signed[f["storagePath"]][1],
+            }
+            for f in files
+            if f["storagePath"] in signed
+        ],
+    }
@@ -0,0 +1,269 @@
+"""
+Health, diagnostics and operational endpoints: API/Supabase/storage/Yandex
+health checks, the storage test upload, GET /api/metrics, storage cache
+stats and signed-URL serving for the local storage backend.
+"""
+from fastapi import APIRouter, HTTPException, Request
+
+from api._lib.settings import settings
+
+router = APIRouter()
+
+
+@router.get("/api/health")
+async def health_check():
+    """
+    Basic health check endpoint.
+    Returns application build information and environment identifier.
+    """
+    return {
+        "ok": True,
+        "build": settings.git_sha,
+        "env": settings.environment,
+        "vercel_env": settings.vercel_env,
+        "vercel_url": settings.vercel_url,
+    }
+
+
+@router.get("/api/supabase/health")
+async def supabase_health():
+    """
+    Database connectivity check.
+    Executes a simple query to verify database connection and measure latency.
+    """
+    import time
+    from api._lib.supabase_admin import get_admin_client
+    
+    try:
+        start_time = time.time()
+        
+        # Get admin client
+        supabase = get_admin_client()
+        
+        # Execute simple query to app_meta table (or any table that should exist)
+        # If app_meta doesn't exist yet, this will fail gracefully
+        try:
+            response = supabase.table("app_meta").select("*").limit(1).execute()
+            latency_ms = int((time.time() - start_time) * 1000)
+            
+            return {
+                "ok": True,
+                "message": "Database connected successfully",
+                "latency_ms": latency_ms,
+            }
+        except Exception as query_error:
+            # Table might not exist yet (migrations not applied)
+            latency_ms = int((time.time() - start_time) * 1000)
+            return {
+                "ok": False,
+                "message": f"Database query failed: {str(query_error)}",
+                "latency_ms": latency_ms,
+            }
+            
+    except ValueError as e:
+        # Missing environment variables
+        return {
+            "ok": False,
+            "message": f"Configuration error: {str(e)}",
+            "latency_ms": 0,
+        }
+    except Exception as e:
+        # Other connection errors
+        return {
+            "ok": False,
+            "message": f"Connection error: {str(e)}",
+            "latency_ms": 0,
+        }
+
+
+@router.get("/api/storage/health")
+async def storage_health():
+    """
+    Storage bucket health check.
+    Verifies bucket exists (creates if missing) and lists objects.
+    """
+    from api._lib.supabase_admin import get_admin_client
+    
+    bucket_name = "adapt-files"
+    
+    try:
+        supabase = get_admin_client()
+        
+        # Try to get bucket info
+        try:
+            buckets = supabase.storage.list_buckets()
+            bucket_exists = any(b.name == bucket_name for b in buckets)
+            
+            if not bucket_exists:
+                # Create bucket if it doesn't exist
+                supabase.storage.create_bucket(
+                    bucket_name,
+                    options={
+                        "public": False,
+                        "file_size_limit": 52428800,  # 50MB in bytes
+                        "allowed_mime_types": [
+                            "text/plain",
+                            "application/pdf",
+                            "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                            "audio/webm",
+                            "audio/mpeg",
+                        ],
+                    }
+                )
+                bucket_exists = True
+            
+            # List objects to verify read access
+            files = supabase.storage.from_(bucket_name).list()
+            objects_count = len(files) if files else 0
+            
+            return {
+                "ok": True,
+                "bucket": bucket_name,
+                "objects_count": objects_count,
+            }
+            
+        except Exception as storage_error:
+            return {
+                "ok": False,
+                "message": f"Storage operation failed: {str(storage_error)}",
+                "bucket": bucket_name,
+                "objects_count": 0,
+            }
+            
+    except Exception as e:
+        return {
+            "ok": False,
+            "message": f"Error: {str(e)}",
+            "bucket": bucket_name,
+            "objects_count": 0,
+        }
+
+
+@router.post("/api/storage/test-upload")
+async def test_upload():
+    """
+    Test file upload endpoint.
+    Uploads a small test file to verify storage write access.
+    """
+    from datetime import datetime
+    from api._lib.supabase_admin import get_admin_client
+    
+    bucket_name = "adapt-files"
+    
+    try:
+        supabase = get_admin_client()
+        
+        # Generate timestamped path
+        timestamp = datetime.utcnow().isoformat()
+        file_path = f"healthcheck/{timestamp}.txt"
+        
+        # Create test content
+        content = f"Health check at {timestamp}".encode('utf-8')
+        
+        # Upload to storage
+        try:
+            result = supabase.storage.from_(bucket_name).upload(
+                file_path,
+                content,
+                {"content-type": "text/plain"}
+            )
+            
+            return {
+                "ok": True,
+                "bucket": bucket_name,
+                "path": file_path,
+            }
+            
+        except Exception as upload_error:
+            return {
+                "ok": False,
+                "message": f"Upload failed: {str(upload_error)}",
+                "bucket": bucket_name,
+                "path": "",
+            }
+            
+    except Exception as e:
+        return {
+            "ok": False,
+            "message": f"Error: {str(e)}",
+            "bucket": bucket_name,
+            "path": "",
+        }
+
+
+@router.get("/api/metrics")
+async def metrics(request: Request):
+    """
+    Prometheus text exposition of in-process metrics (per instance).
+    Requires `Authorization: Bearer <METRICS_TOKEN>` when METRICS_TOKEN is set.
+    """
+    import hmac
+    from fastapi.responses import PlainTextResponse
+    from api._lib.metrics import render_metrics
+
+    if settings.metrics_token:
+        supplied = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        if not hmac.compare_digest(supplied, settings.metrics_token):
+            raise HTTPException(status_code=401, detail="Invalid metrics token")
+
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/api/storage/cache/stats")
+async def storage_cache_stats():
+    """Read-through storage cache counters: hit ratio and bytes served/fetched."""
+    from api._lib.storage_cache import cache_stats
+
+    return {"ok": True, **cache_stats()}
+
+
+@router.get("/api/storage/local/{bucket}/{path:path}")
+async def local_storage_object(
+    bucket: str, path: str, request: Request, token: str = "", expires: int = 0
+):
+    """
+    Serve an object from the local/memory storage backend via a signed URL.
+    Only active when STORAGE_BACKEND is "local" or "memory"; mirrors the
+    Supabase signed-URL download for local development and benchmarks.
+    Artifacts stored compressed are sent as-is with Content-Encoding when
+    the client accepts it.
+    """
+    import mimetypes
+    from api._lib.codec import CONTENT_TYPES
+    from api._lib.compression import stored_artifact_response
+    from api._lib.storage import verify_signature
+    from api._lib.supabase_admin import get_admin_client
+
+    if settings.storage_backend == "supabase":
+        raise HTTPException(status_code=404, detail="Not found")
+    if not verify_signature(bucket, path, token, expires):
+        raise HTTPException(status_code=400, detail="Invalid or expired signature")
+
+    bucket_api = get_admin_client().storage.from_(bucket)
+    try:
+        meta = bucket_api.info(path)
+        content = bucket_api.download(path)
+    except Exception:
+        raise HTTPException(status_code=404, detail="Object not found")
+
+    media_type = meta.get("mimetype") or "application/octet-stream"
+    if media_type in CONTENT_TYPES.values():
+        # Stored type is the codec's; serve the artifact under its own type
+        guessed = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        media_type = f"{guessed}; charset=utf-8" if guessed.startswith("text/") else guessed
+    return stored_artifact_response(content, media_type, request.headers.get("accept-encoding", ""))
+
+
+
+# ─── F) GET /api/yandex/health ───────────────────────────────────────────────
+
+@router.get("/api/yandex/health")
+async def yandex_health():
+    """Check if Yandex AI Studio credentials are configured (does not call the model)."""
+    return {
+        "ok": True,
+        "api_key_set": bool(settings.yandex_api_key),
+        "prompt_id": settings.yandex_prompt_id or None,
+        "project_id": settings.yandex_project_id or None,
+        "ready": bool(settings.yandex_api_key and settings.yandex_prompt_id),
+    }
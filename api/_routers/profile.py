@@ -0,0 +1,245 @@
+"""
+Role, profile and check-email endpoints.
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import BaseModel
+
+from api._lib.auth import get_current_user, get_current_user_with_profile
+from api._lib.logger import get_logger
+from api._lib.rate_limit import RateLimiter, client_ip
+from api._lib.settings import settings
+
+router = APIRouter()
+
+
+# =============================================================================
+# Role Endpoints (authenticated via Supabase JWT)
+# =============================================================================
+
+class RoleUpdate(BaseModel):
+    role: str
+
+
+@router.get("/api/profile/role")
+async def get_my_role(user: dict = Depends(get_current_user_with_profile)):
+    """Get the current authenticated user's role (served from the profile cache)."""
+    logger = get_logger(__name__)
+    user_id = user["id"]
+
+    # Database/connection errors surface as profile=None → null role
+    # (Frontend handles null by redirecting to role selection)
+    profile = user["profile"]
+    role = profile.get("role") if profile else None
+    logger.info(f"GET /api/profile/role - user_id={user_id}, role={role}")
+
+    return {"role": role}
+
+
+@router.post("/api/profile/role")
+async def set_my_role(body: RoleUpdate, user: dict = Depends(get_current_user)):
+    """Set the current authenticated user's role using atomic UPSERT."""
+    from api._lib.profiles import upsert_profile
+    from api._lib.supabase_admin import get_admin_client
+
+    logger = get_logger(__name__)
+    user_id = user["id"]
+
+    if body.role not in ("curator", "employee"):
+        logger.warning(f"POST /api/profile/role - user_id={user_id}, invalid_role={body.role}")
+        raise HTTPException(status_code=400, detail='Role must be "curator" or "employee"')
+
+    logger.info(f"POST /api/profile/role - user_id={user_id}, role={body.role}")
+
+    try:
+        supabase = get_admin_client()
+
+        # Atomic UPSERT; the row comes back in the same response (RETURNING *)
+        profile = upsert_profile(
+            supabase,
+            {
+                "id": user_id,
+                "email": user.get("email"),
+                "full_name": user.get("user_metadata", {}).get("full_name"),
+                "role": body.role,
+                "org_id": None,
+            },
+        )
+
+        if profile:
+            logger.info(f"POST /api/profile/role - user_id={user_id}, role={body.role}, success=True")
+            return {"ok": True, "profile": profile}
+        else:
+            logger.error(f"POST /api/profile/role - user_id={user_id}, profile not found after upsert")
+            raise HTTPException(status_code=500, detail="Profile not found after upsert")
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        error_type = type(e).__name__
+        error_msg = str(e)
+        logger.error(
+            f"POST /api/profile/role - user_id={user_id}, role={body.role}, "
+            f"error={error_type}, message={error_msg}"
+        )
+        raise HTTPException(status_code=500, detail=f"Failed to save role: {error_msg}")
+
+
+# =============================================================================
+# Auth Check Endpoints
+# =============================================================================
+
+class EmailCheckRequest(BaseModel):
+    """Request body for checking email status."""
+    email: str
+
+
+# Per-IP limit for the public, unauthenticated check-email endpoint
+_check_email_limiter = RateLimiter(limit=settings.check_email_rate_limit, window=60.0)
+
+
+@router.post("/api/auth/check-email")
+async def check_email_status(body: EmailCheckRequest, request: Request):
+    """
+    Check if an email is registered and if the account is confirmed.
+    Returns: { exists: bool, confirmed: bool | null }
+
+    Public endpoint: rate-limited per client IP, answers cached briefly
+    (see api/_lib/email_status.py).
+    """
+    from api._lib.email_status import lookup_email_status
+    from api._lib.supabase_admin import get_admin_client
+
+    allowed, retry_after = _check_email_limiter.hit(client_ip(request))
+    if not allowed:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+    try:
+        return lookup_email_status(get_admin_client(), body.email)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Auth check failed: {str(e)}")
+
+
+# =============================================================================
+# Profile Management Endpoints
+# =============================================================================
+
+class ProfileCreate(BaseModel):
+    """Request body for creating/updating a profile."""
+    user_id: str
+    email: Optional[str] = None
+    full_name: Optional[str] = None
+    role: str = "curator"
+
+
+class ProfileUpdate(BaseModel):
+    """Request body for updating profile fields."""
+    full_name: Optional[str] = None
+    role: Optional[str] = None
+    org_id: Optional[str] = None
+
+
+@router.post("/api/profiles/ensure")
+async def ensure_profile(profile: ProfileCreate):
+    """
+    Ensure a profile exists for the given user.
+    Creates if not exists, returns existing if found.
+    Uses service role key to bypass RLS.
+    """
+    from api._lib.profiles import ensure_profile as _ensure_profile
+    from api._lib.supabase_admin import get_admin_client
+    
+    try:
+        supabase = get_admin_client()
+
+        # INSERT ... ON CONFLICT DO NOTHING RETURNING *; existing rows are read back
+        new_profile = {
+            "id": profile.user_id,
+            "email": profile.email,
+            "full_name": profile.full_name,
+            "role": profile.role,
+            "org_id": None,
+        }
+        row, created = _ensure_profile(supabase, new_profile)
+
+        return {
+            "ok": True,
+            "profile": row,
+            "created": created,
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Profile operation failed: {str(e)}")
+
+
+@router.patch("/api/profiles/{user_id}")
+async def update_profile(user_id: str, updates: ProfileUpdate):
+    """
+    Update a user's profile.
+    Uses service role key to bypass RLS.
+    """
+    from api._lib.profiles import update_profile as _update_profile
+    from api._lib.supabase_admin import get_admin_client
+    
+    try:
+        supabase = get_admin_client()
+        
+        # Build update dict with only provided fields
+        update_data = {}
+        if updates.full_name is not None:
+            update_data["full_name"] = updates.full_name
+        if updates.role is not None:
+            update_data["role"] = updates.role
+        if updates.org_id is not None:
+            update_data["org_id"] = updates.org_id
+        
+        if not update_data:
+            raise HTTPException(status_code=400, detail="No fields to update")
+
+        # UPDATE ... RETURNING *: no matching row means no profile
+        updated = _update_profile(supabase, user_id, update_data)
+
+        if not updated:
+            raise HTTPException(status_code=404, detail="Profile not found")
+
+        return {
+            "ok": True,
+            "profile": updated,
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Update failed: {str(e)}")
+
+
+@router.get("/api/profiles/{user_id}")
+async def get_profile(user_id: str):
+    """
+    Get a user's profile.
+    Uses service role key to bypass RLS.
+    """
+    from api._lib.supabase_admin import get_admin_client
+    
+    try:
+        supabase = get_admin_client()
+        
+        result = supabase.table("profiles").select("*").eq("id", user_id).maybe_single().execute()
+        
+        if not result.data:
+            raise HTTPException(status_code=404, detail="Profile not found")
+        
+        return {
+            "ok": True,
+            "profile": result.data,
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Fetch failed: {str(e)}")
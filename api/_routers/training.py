@@ -0,0 +1,925 @@
+"""
+Course wizard and employee training endpoints: draft upload, question
+generation (Yandex AI Studio via the openai SDK, imported on first use),
+finalize, invite-code lookup and employee answers/progress/analytics.
+"""
+from enum import Enum as _Enum
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from pydantic import BaseModel
+
+from api._lib.auth import get_current_user
+from api._lib.blob_store import store_blob
+from api._lib.concurrency import gather_bounded
+from api._lib.course_files import (
+    COURSES_BUCKET,
+    cleanup_pages,
+    combined_text_path,
+    download_artifact,
+    draft_preview,
+    ensure_courses_bucket,
+    load_draft_text,
+    parse_docx_bytes,
+    parse_pdf_pages,
+    parse_txt_bytes,
+    parsed_text_path,
+    remember_draft_text,
+    upload_artifact,
+)
+from api._lib.jsonio import dumps, json_response, loads
+from api._lib.logger import get_logger
+from api._lib.metrics import record_blob_reuse, record_ingest
+from api._lib.settings import settings
+from api._lib.timing import span
+
+router = APIRouter()
+
+
+# =============================================================================
+# Training — new wizard endpoints
+# =============================================================================
+
+class _QuestionType(str, _Enum):
+    quiz = "quiz"
+    open = "open"
+
+
+class _Question(BaseModel):
+    id: str
+    type: _QuestionType
+    prompt: str
+    quizOptions: Optional[List[str]] = None   # exactly 4 for quiz
+    correctIndex: Optional[int] = None         # 0-3 for quiz
+    expectedAnswer: Optional[str] = None       # for open
+    explanation: Optional[str] = None          # mcq explanation
+    tag: Optional[str] = None                  # topic tag
+
+
+class _DraftUploadedFile(BaseModel):
+    path: str           # safe key, e.g. "uuid.pdf"
+    storagePath: str    # full bucket path
+    originalName: str
+    mime: str
+    size: int
+    sha256: Optional[str] = None   # set when BLOB_STORE keeps the file content-addressed
+
+
+class _GenerateRequest(BaseModel):
+    draftCourseId: str
+    title: str
+    size: str          # "small" | "medium" | "large"
+    # Omit to use the draft's parsed/combined.txt (older clients send it back)
+    extractedText: Optional[str] = None
+
+
+class _FinalizeRequest(BaseModel):
+    draftCourseId: str
+    title: str
+    size: str
+    uploadedFiles: List[_DraftUploadedFile]
+    questions: List[_Question]
+
+
+# ─── A) POST /api/courses/draft ──────────────────────────────────────────────
+
+@router.post("/api/courses/draft")
+async def create_course_draft(
+    title: str = Form(...),
+    size: str = Form(...),
+    files: List[UploadFile] = File(...),
+    user: dict = Depends(get_current_user),
+):
+    """
+    Receive multipart files, upload to Storage via service_role (no RLS issues),
+    parse text, save combined.txt, return draft payload.
+    """
+    import asyncio
+    import time
+    import uuid
+    from datetime import datetime, timezone
+    from api._lib.supabase_admin import get_admin_client
+
+    log = get_logger(__name__)
+    request_id = str(uuid.uuid4())[:8]
+    user_id = user["id"]
+    draft_course_id = str(uuid.uuid4())
+
+    log.info(
+        f"[{request_id}] POST /api/courses/draft - userId={user_id} "
+        f"draftCourseId={draft_course_id} title={title!r} size={size}"
+    )
+
+    supabase = get_admin_client()
+    ensure_courses_bucket(supabase)
+
+    # Guess MIME
+    mime_map = {
+        ".pdf": "application/pdf",
+        ".txt": "text/plain",
+        ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        ".doc": "application/msword",
+    }
+
+    def _parse(ext: str, file_bytes: bytes):
+        """Parse + clean one file (worker thread); None for formats without a parser."""
+        if ext == ".pdf":
+            pages = parse_pdf_pages(file_bytes)
+        elif ext == ".txt":
+            pages = [parse_txt_bytes(file_bytes)]
+        elif ext == ".docx":
+            pages = [parse_docx_bytes(file_bytes)]
+        else:
+            return None
+        return cleanup_pages(pages)
+
+    async def _ingest(upload_file: UploadFile) -> Optional[dict]:
+        """Upload the raw file while parsing it, then upload the parsed text."""
+        original_name = upload_file.filename or "file"
+        ext = ""
+        dot_pos = original_name.rfind(".")
+        if dot_pos >= 0:
+            ext = original_name[dot_pos:].lower()
+
+        safe_key = f"{uuid.uuid4()}{ext}"
+        storage_path = f"{user_id}/{draft_course_id}/files/{safe_key}"
+
+        content_type = upload_file.content_type or mime_map.get(ext, "application/octet-stream")
+        if content_type == "application/octet-stream" and ext in mime_map:
+            content_type = mime_map[ext]
+
+        file_bytes = await upload_file.read()
+        file_size = len(file_bytes)
+        record_ingest(ext.lstrip("."), file_size)
+
+        if settings.blob_store:
+            # One copy per content hash; known files skip the upload
+            upload = asyncio.to_thread(
+                store_blob, supabase, file_bytes, ext, content_type, user_id, draft_course_id
+            )
+        else:
+            upload = asyncio.to_thread(
+                supabase.storage.from_(COURSES_BUCKET).upload,
+                storage_path,
+                file_bytes,
+                {"content-type": content_type, "upsert": "true"},
+            )
+        uploaded, cleanup = await asyncio.gather(
+            upload,
+            asyncio.to_thread(_parse, ext, file_bytes),
+            return_exceptions=True,
+        )
+        if isinstance(uploaded, Exception):
+            log.error(f"[{request_id}] Upload failed for {original_name}: {uploaded}")
+            # Skip file but continue with others
+            return None
+        sha256 = None
+        if settings.blob_store:
+            storage_path, sha256, reused = uploaded
+            if reused:
+                record_blob_reuse(file_size)
+                log.info(f"[{request_id}] {original_name} already stored as {storage_path}, upload skipped")
+        if isinstance(cleanup, Exception):
+            log.warning(f"[{request_id}] Parse error for {original_name}: {cleanup}")
+            cleanup = None
+
+        part = None
+        parsed_path = None
+        if cleanup is not None:
+            log.info(
+                f"[{request_id}] Cleaned {original_name}: chars {cleanup.original_chars} -> "
+                f"{cleanup.cleaned_chars} (ratio={cleanup.ratio:.2f}, removed_lines={cleanup.removed_lines})"
+            )
+            if cleanup.text:
+                try:
+                    await asyncio.to_thread(
+                        upload_artifact,
+                        supabase,
+                        parsed_text_path(user_id, draft_course_id, safe_key),
+                        cleanup.text.encode("utf-8"),
+                        "text/plain; charset=utf-8",
+                    )
+                    parsed_path = parsed_text_path(user_id, draft_course_id, safe_key)
+                except Exception as e:
+                    log.warning(f"[{request_id}] Could not save parsed text: {e}")
+                part = f"=== {original_name} ===\n{cleanup.text}"
+
+        return {
+            "file": {
+                "path": safe_key,
+                "storagePath": storage_path,
+                "originalName": original_name,
+                "mime": content_type,
+                "size": file_size,
+                "sha256": sha256,
+                "parsedPath": parsed_path,
+            },
+            "part": part,
+            "cleanup": cleanup,
+        }
+
+    # Files go through the pipeline concurrently (STORAGE_CONCURRENCY at a
+    # time); results come back in upload order, so combined.txt keeps it
+    t_upload_start = time.monotonic()
+    results = [r for r in await gather_bounded(_ingest(f) for f in files) if r is not None]
+    uploaded_files = [r["file"] for r in results]
+    combined_parts = [r["part"] for r in results if r["part"]]
+    raw_chars = sum(r["cleanup"].original_chars for r in results if r["cleanup"] is not None)
+    cleaned_chars = sum(r["cleanup"].cleaned_chars for r in results if r["cleanup"] is not None)
+
+    upload_ms = int((time.monotonic() - t_upload_start) * 1000)
+
+    if not uploaded_files:
+        raise HTTPException(status_code=400, detail="No files could be uploaded")
+
+    # Build combined text, truncate to 100k chars to stay within LLM limits
+    combined_text = "\n\n".join(combined_parts)
+    cleanup_ratio = round(cleaned_chars / raw_chars, 3) if raw_chars else 1.0
+    MAX_CHARS = 100_000
+    truncated = False
+    if len(combined_text) > MAX_CHARS:
+        combined_text = combined_text[:MAX_CHARS]
+        truncated = True
+
+    # Save combined.txt
+    if combined_parts:
+        try:
+            upload_artifact(
+                supabase,
+                combined_text_path(user_id, draft_course_id),
+                combined_text.encode("utf-8"),
+                "text/plain; charset=utf-8",
+            )
+            remember_draft_text(user_id, draft_course_id, combined_text)
+        except Exception as e:
+            log.warning(f"[{request_id}] Could not save combined.txt: {e}")
+
+    # Save draft_manifest.json
+    draft_manifest = {
+        "draftCourseId": draft_course_id,
+        "title": title,
+        "size": size,
+        "createdAt": datetime.now(timezone.utc).isoformat(),
+        "status": "draft",
+        "uploadedFiles": uploaded_files,
+    }
+    try:
+        upload_artifact(
+            supabase,
+            f"{user_id}/{draft_course_id}/draft_manifest.json",
+            dumps(draft_manifest),
+            "application/json",
+        )
+    except Exception as e:
+        log.warning(f"[{request_id}] Could not save draft_manifest: {e}")
+
+    log.info(
+        f"[{request_id}] Draft complete - draftCourseId={draft_course_id} "
+        f"files={len(uploaded_files)} chars={len(combined_text)} "
+        f"truncated={truncated} upload_ms={upload_ms} "
+        f"rawChars={raw_chars} cleanupRatio={cleanup_ratio}"
+    )
+
+    return json_response({
+        "ok": True,
+        "draftCourseId": draft_course_id,
+        "uploadedFiles": uploaded_files,
+        "extractedPreview": draft_preview(combined_text),
+        "extractedStats": {
+            "chars": len(combined_text),
+            "filesCount": len(uploaded_files),
+            "truncated": truncated,
+            "rawChars": raw_chars,
+            "cleanupRatio": cleanup_ratio,
+        },
+    })
+
+
+# ─── B) POST /api/training/generate ─────────────────────────────────────────
+
+@router.post("/api/training/generate")
+async def generate_training(
+    body: _GenerateRequest,
+    user: dict = Depends(get_current_user),
+):
+    """
+    Call Yandex AI Studio to generate quiz/open questions from the draft's
+    extracted text (parsed/combined.txt, read server-side).
+    Returns validated List[Question].
+    """
+    import json
+    import time
+    import uuid
+
+    log = get_logger(__name__)
+    request_id = str(uuid.uuid4())[:8]
+    user_id = user["id"]
+
+    log.info(
+        f"[{request_id}] POST /api/training/generate - userId={user_id} "
+        f"draftCourseId={body.draftCourseId} size={body.size}"
+    )
+
+    if not settings.yandex_api_key or not settings.yandex_prompt_id:
+        raise HTTPException(
+            status_code=503,
+            detail="Yandex AI Studio не настроен: задайте YANDEX_API_KEY и YANDEX_PROMPT_ID в env",
+        )
+
+    if body.extractedText:
+        extracted_text = body.extractedText
+    else:
+        from api._lib.supabase_admin import get_admin_client
+
+        try:
+            extracted_text = load_draft_text(get_admin_client(), user_id, body.draftCourseId)
+        except Exception as e:
+            log.warning(f"[{request_id}] No combined text for draft {body.draftCourseId}: {e}")
+            raise HTTPException(
+                status_code=404,
+                detail="Текст черновика не найден. Загрузите материалы курса заново.",
+            )
+
+    # Determine question count by size
+    size_map = {"small": (8, 12), "medium": (12, 18), "large": (18, 30)}
+    n_min, n_max = size_map.get(body.size, (12, 18))
+    quota_mcq = round((n_min + n_max) / 2 * 0.7)
+    quota_open = round((n_min + n_max) / 2 * 0.3)
+
+    prompt_variables = {
+        "course_title": body.title,
+        "course_description": body.title,
+        "kb_chunks": extracted_text[:80_000],
+        "quota_mcq": str(quota_mcq),
+        "quota_open": str(quota_open),
+        "quota_roleplay": "0",
+        "expected_steps": str(quota_mcq + quota_open),
+        "batch_index": "0",
+        "total_batches": "1",
+    }
+
+    def _call_yandex(variables: dict) -> str:
+        from openai import OpenAI
+        client_kwargs = {
+            "api_key": settings.yandex_api_key,
+            "base_url": settings.yandex_base_url,
+        }
+        if settings.yandex_project_id:
+            client_kwargs["project"] = settings.yandex_project_id
+        client = OpenAI(**client_kwargs)
+        with span("yandex"):
+            response = client.responses.create(
+                prompt={
+                    "id": settings.yandex_prompt_id,
+                    "variables": variables,
+                },
+                input="Сгенерируй вопросы по учебному материалу",
+            )
+        return response.output_text or ""
+
+    t_start = time.monotonic()
+
+    # First attempt
+    raw = ""
+    try:
+        raw = _call_yandex(prompt_variables)
+    except Exception as e:
+        log.error(f"[{request_id}] Yandex call failed: {e}")
+        raise HTTPException(status_code=502, detail=f"Yandex AI Studio error: {str(e)}")
+
+    yandex_ms = int((time.monotonic() - t_start) * 1000)
+    log.info(f"[{request_id}] Yandex response received yandex_ms={yandex_ms} raw_len={len(raw)}")
+
+    # Try to extract JSON from response — handles both array and batch-object formats
+    def _extract_json(text: str) -> Optional[list]:
+        text = text.strip()
+        # Strip markdown code fences if present
+        for fence in ("```json", "```"):
+            if text.startswith(fence):
+                text = text[len(fence):]
+        if text.endswith("```"):
+            text = text[:-3]
+        text = text.strip()
+        data = None
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError:
+            # Try to find object/array boundaries
+            for start_char, end_char in (("[", "]"), ("{", "}")):
+                start = text.find(start_char)
+                end = text.rfind(end_char)
+                if start != -1 and end != -1 and end > start:
+                    try:
+                        data = json.loads(text[start:end + 1])
+                        break
+                    except Exception:
+                        pass
+        if data is None:
+            return None
+        # Unwrap any known wrapper dict formats:
+        # {"batch": {"steps": [...]}}, {"questions": [...]}, {"steps": [...]}, etc.
+        if isinstance(data, dict):
+            for key in ("batch", "questions", "steps", "data", "result", "items"):
+                val = data.get(key)
+                if isinstance(val, list):
+                    return val
+                if isinstance(val, dict):
+                    for inner_key in ("steps", "questions", "items"):
+                        inner = val.get(inner_key)
+                        if isinstance(inner, list):
+                            return inner
+            return None
+        if isinstance(data, list):
+            return data
+        return None
+
+    _QUIZ_TYPES = {"mcq", "quiz", "multiple_choice", "test"}
+    _OPEN_TYPES = {"open", "open_ended", "open-ended", "essay", "short_answer"}
+    _ROLEPLAY_TYPES = {"roleplay", "role_play", "scenario"}
+
+    def _first_non_empty(*values: object) -> str:
+        """Return the first truthy stripped string from values."""
+        for v in values:
+            if isinstance(v, str) and v.strip():
+                return v.strip()
+        return ""
+
+    def _normalize_step(step: dict, idx: int) -> Optional[dict]:
+        """Convert Yandex batch step format to _Question-compatible dict."""
+        step_type = (step.get("type") or "").lower().strip()
+        item: dict = {
+            "id": str(uuid.uuid4()),
+            "tag": step.get("tag", ""),
+        }
+
+        if step_type in _QUIZ_TYPES:
+            item["type"] = "quiz"
+            item["prompt"] = _first_non_empty(
+                step.get("question"), step.get("prompt"), step.get("text"), step.get("задание"),
+            )
+            opts = list(
+                step.get("options") or step.get("answers") or
+                step.get("choices") or step.get("варианты") or []
+            )
+            while len(opts) < 4:
+                opts.append("")
+            item["quizOptions"] = [str(o).strip() for o in opts[:4]]
+            # Accept multiple key names for correct index
+            ci = (
+                step.get("correct_index") if step.get("correct_index") is not None
+                else step.get("correctIndex") if step.get("correctIndex") is not None
+                else step.get("correct_answer_index") if step.get("correct_answer_index") is not None
+                else step.get("right_index") if step.get("right_index") is not None
+                else 0
+            )
+            try:
+                ci = int(ci)
+            except (TypeError, ValueError):
+                ci = 0
+            item["correctIndex"] = ci if 0 <= ci <= 3 else 0
+            item["expectedAnswer"] = _first_non_empty(
+                step.get("explanation"), step.get("объяснение"),
+            )
+
+        elif step_type in _OPEN_TYPES:
+            item["type"] = "open"
+            item["prompt"] = _first_non_empty(
+                step.get("prompt"), step.get("question"), step.get("text"), step.get("задание"),
+            )
+            rubric = step.get("rubric", [])
+            item["expectedAnswer"] = _first_non_empty(
+                step.get("sample_good_answer"), step.get("expectedAnswer"),
+                step.get("answer"), step.get("ответ"),
+                "; ".join(rubric) if isinstance(rubric, list) and rubric else "",
+            )
+
+        elif step_type in _ROLEPLAY_TYPES:
+            item["type"] = "open"
+            item["prompt"] = _first_non_empty(
+                step.get("scenario"), step.get("task"), step.get("prompt"),
+            )
+            item["expectedAnswer"] = _first_non_empty(
+                step.get("ideal_answer"), step.get("answer"),
+            )
+
+        else:
+            # Heuristic fallback: detect type from available keys
+            has_options = bool(step.get("options") or step.get("answers") or step.get("choices"))
+            has_text = bool(step.get("question") or step.get("prompt") or step.get("text"))
+            if has_options:
+                item["type"] = "quiz"
+                item["prompt"] = _first_non_empty(
+                    step.get("question"), step.get("prompt"), step.get("text"),
+                )
+                opts = list(step.get("options") or step.get("answers") or step.get("choices") or [])
+                while len(opts) < 4:
+                    opts.append("")
+                item["quizOptions"] = [str(o).strip() for o in opts[:4]]
+                ci = step.get("correct_index", step.get("correctIndex", 0))
+                try:
+                    ci = int(ci)
+                except (TypeError, ValueError):
+                    ci = 0
+                item["correctIndex"] = ci if 0 <= ci <= 3 else 0
+                item["expectedAnswer"] = _first_non_empty(step.get("explanation"))
+            elif has_text:
+                item["type"] = "open"
+                item["prompt"] = _first_non_empty(
+                    step.get("question"), step.get("prompt"), step.get("text"),
+                )
+                item["expectedAnswer"] = _first_non_empty(
+                    step.get("answer"), step.get("sample_good_answer"),
+                )
+            else:
+                return None
+
+        # Validate: skip items with empty prompt
+        if not item.get("prompt", "").strip():
+            return None
+
+        # Validate quiz: must have at least 2 non-empty options
+        if item.get("type") == "quiz":
+            opts = list(item.get("quizOptions") or [])
+            non_empty = [o for o in opts if str(o).strip()]
+            if len(non_empty) < 2:
+                return None
+            while len(opts) < 4:
+                opts.append("")
+            item["quizOptions"] = opts[:4]
+
+        return item
+
+    _ALL_KNOWN_TYPES = _QUIZ_TYPES | _OPEN_TYPES | _ROLEPLAY_TYPES
+
+    def _normalize_and_validate(parsed_list: list) -> list:
+        """Normalize Yandex steps and validate with Pydantic. Returns _Question models."""
+        # Normalize steps if they have a "type" field (Yandex batch format)
+        normalized = []
+        if parsed_list and isinstance(parsed_list[0], dict):
+            first_type = (parsed_list[0].get("type") or "").lower().strip()
+            # Always attempt normalization if items look like Yandex step dicts
+            needs_normalize = (
+                first_type in _ALL_KNOWN_TYPES
+                or any(k in parsed_list[0] for k in ("question", "options", "answers", "choices"))
+            )
+            if needs_normalize:
+                normalized = [n for i, s in enumerate(parsed_list)
+                              if isinstance(s, dict) and (n := _normalize_step(s, i)) is not None]
+            else:
+                normalized = parsed_list
+        else:
+            normalized = parsed_list
+
+        # Validate each question with Pydantic; skip invalid items
+        validated = []
+        for item in normalized:
+            if not isinstance(item, dict):
+                continue
+            if "id" not in item or not item["id"]:
+                item["id"] = str(uuid.uuid4())
+            if item.get("type") == "quiz":
+                opts = list(item.get("quizOptions") or [])
+                while len(opts) < 4:
+                    opts.append("")
+                item["quizOptions"] = opts[:4]
+                if item.get("correctIndex") is None:
+                    item["correctIndex"] = 0
+            try:
+                validated.append(_Question(**item))
+            except Exception as e:
+                log.warning(f"[{request_id}] Skipping invalid question: {e} | item={item}")
+        return validated
+
+    # ── Parse + validate with retry ──────────────────────────────────────────
+    MAX_ATTEMPTS = 2
+    validated_questions: list = []
+
+    for attempt in range(MAX_ATTEMPTS):
+        if attempt > 0:
+            log.warning(f"[{request_id}] Attempt {attempt+1}: retrying Yandex call (prev had {len(validated_questions)} valid Qs)")
+            try:
+                raw = _call_yandex(prompt_variables)
+            except Exception as e:
+                log.error(f"[{request_id}] Retry Yandex call failed: {e}")
+                break
+
+        parsed = _extract_json(raw)
+
+        # Retry JSON parse once within same attempt
+        if parsed is None and attempt == 0:
+            log.warning(f"[{request_id}] JSON parse failed, retrying Yandex call")
+            try:
+                raw = _call_yandex(prompt_variables)
+                parsed = _extract_json(raw)
+            except Exception as e:
+                log.error(f"[{request_id}] Retry failed: {e}")
+
+        if parsed is None or not isinstance(parsed, list):
+            if attempt < MAX_ATTEMPTS - 1:
+                continue
+            log.error(f"[{request_id}] Could not parse Yandex response as JSON array. raw={raw[:500]}")
+            raise HTTPException(
+                status_code=502,
+                detail="Не удалось разобрать ответ Yandex AI Studio как JSON. Попробуйте ещё раз.",
+            )
+
+        validated_questions = _normalize_and_validate(parsed)
+        if validated_questions:
+            break  # Success
+
+    quiz_count = sum(1 for q in validated_questions if q.type == _QuestionType.quiz)
+    open_count = sum(1 for q in validated_questions if q.type == _QuestionType.open)
+
+    log.info(
+        f"[{request_id}] extracted_text_length={len(extracted_text)} "
+        f"questions_total={len(validated_questions)} "
+        f"quiz_count={quiz_count} open_count={open_count} yandex_ms={yandex_ms}"
+    )
+
+    if not validated_questions:
+        log.error(f"[{request_id}] No valid questions after {MAX_ATTEMPTS} attempts. raw={raw[:500]}")
+        raise HTTPException(
+            status_code=502,
+            detail="Yandex AI Studio вернул вопросы в неожиданном формате. Попробуйте ещё раз.",
+        )
+
+    # Models go to JSON bytes directly (pydantic-core), no model_dump() pass
+    return json_response(
+        {"ok": True, "questions": validated_questions, "questionsCount": len(validated_questions)}
+    )
+
+
+# ─── C) POST /api/courses/finalize ───────────────────────────────────────────
+
+@router.post("/api/courses/finalize")
+async def finalize_course(
+    body: _FinalizeRequest,
+    user: dict = Depends(get_current_user),
+):
+    """
+    Save final course manifest with questions, generate invite code,
+    write code index for employee lookup.
+    """
+    import random
+    import string
+    import uuid
+    from datetime import datetime, timezone
+    from api._lib.course_store import CourseOwnedByOther, InviteCodeTaken, get_course_store
+    from api._lib.supabase_admin import get_admin_client
+
+    log = get_logger(__name__)
+    request_id = str(uuid.uuid4())[:8]
+    user_id = user["id"]
+    course_id = body.draftCourseId
+
+    log.info(
+        f"[{request_id}] POST /api/courses/finalize - userId={user_id} "
+        f"courseId={course_id} questions={len(body.questions)}"
+    )
+
+    # Reject empty questions list
+    if not body.questions:
+        raise HTTPException(
+            status_code=400,
+            detail="Нельзя сохранить курс без вопросов. Сгенерируйте или добавьте вопросы вручную.",
+        )
+
+    # Reject questions with empty prompt text
+    invalid_indices = [i for i, q in enumerate(body.questions) if not q.prompt.strip()]
+    if invalid_indices:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Вопрос(ы) #{', '.join(str(i + 1) for i in invalid_indices)} не имеют текста.",
+        )
+
+    supabase = get_admin_client()
+
+    def _generate_invite_code(length: int = 6) -> str:
+        chars = string.ascii_uppercase + string.digits
+        return "".join(random.choices(chars, k=length))
+
+    invite_code = _generate_invite_code()
+
+    # Build final manifest
+    quiz_count = sum(1 for q in body.questions if q.type == _QuestionType.quiz)
+    open_count = sum(1 for q in body.questions if q.type == _QuestionType.open)
+
+    manifest = {
+        "courseId": course_id,
+        "title": body.title,
+        "size": body.size,
+        "createdAt": datetime.now(timezone.utc).isoformat(),
+        "overallStatus": "ready",
+        "textBytes": 0,
+        "inviteCode": invite_code,
+        "employeesCount": 0,
+        "files": [f.model_dump() for f in body.uploadedFiles],
+        "questions": [q.model_dump() for q in body.questions],
+        "quizCount": quiz_count,
+        "openCount": open_count,
+    }
+
+    # File and parsed-text locations recorded server-side by draft/process
+    # win over the client's copy: with BLOB_STORE the originals live under _blobs/
+    stored_files = {}
+    try:
+        draft_bytes = download_artifact(
+            supabase, f"{user_id}/{course_id}/draft_manifest.json"
+        )
+        draft_data = loads(draft_bytes)
+        for f in draft_data.get("uploadedFiles", []):
+            stored_files[f.get("path")] = f
+    except Exception:
+        pass
+
+    store = get_course_store(supabase)
+    if not stored_files:
+        try:
+            processed = store.get(user_id, course_id) or {}
+            for f in processed.get("files", []):
+                stored_files[f.get("fileId")] = f
+        except Exception as e:
+            log.warning(f"[{request_id}] Could not read processed manifest: {e}")
+    # Files with no server-side record are kept only inside this course's
+    # own folder; the URL routes sign whatever storagePath the manifest holds
+    own_prefix = f"{user_id}/{course_id}/"
+    files = []
+    for f in manifest["files"]:
+        stored = stored_files.get(f["path"]) or {}
+        if stored.get("storagePath"):
+            f["storagePath"] = stored["storagePath"]
+            f["sha256"] = stored.get("sha256")
+        elif f["storagePath"].startswith(own_prefix) and ".." not in f["storagePath"].split("/"):
+            f["sha256"] = None
+        else:
+            log.warning(f"[{request_id}] Dropping file {f['path']}: no record of {f['storagePath']}")
+            continue
+        # Same keys as files written by /api/courses/process
+        f["fileId"] = f["path"]
+        f["name"] = f["originalName"]
+        f["parsedPath"] = stored.get("parsedPath")
+        files.append(f)
+    manifest["files"] = files
+
+    # Save manifest (and the invite-code lookup) through the course store;
+    # the DB store rejects codes already taken, so draw a new one and retry.
+    for attempt in range(5):
+        try:
+            store.save(user_id, manifest)
+            break
+        except InviteCodeTaken:
+            log.warning(f"[{request_id}] Invite code {invite_code} taken, retrying")
+            invite_code = _generate_invite_code()
+            manifest["inviteCode"] = invite_code
+        except CourseOwnedByOther:
+            log.warning(f"[{request_id}] Course {course_id} belongs to another user")
+            raise HTTPException(status_code=403, detail="Course belongs to another user")
+        except Exception as e:
+            log.error(f"[{request_id}] Failed to save manifest: {e}")
+            raise HTTPException(status_code=500, detail=f"Failed to save manifest: {str(e)}")
+    else:
+        raise HTTPException(status_code=500, detail="Failed to save manifest: no free invite code")
+
+    log.info(
+        f"[{request_id}] Course finalized - courseId={course_id} "
+        f"inviteCode={invite_code} questions={len(body.questions)}"
+    )
+
+    return {"ok": True, "courseId": course_id, "courseCode": invite_code}
+
+
+# ─── D) GET /api/courses/by-code/{code} ──────────────────────────────────────
+
+@router.get("/api/courses/by-code/{code}")
+async def get_course_by_code(code: str):
+    """
+    Public endpoint: resolve invite code → return full course manifest.
+    Used by employees to access a course without knowing courseId.
+    """
+    from api._lib.course_store import get_course_store
+
+    log = get_logger(__name__)
+
+    try:
+        manifest = get_course_store().get_by_code(code)
+    except Exception as e:
+        log.error(f"Could not resolve course code {code}: {e}")
+        raise HTTPException(status_code=404, detail="Курс не найден")
+    if manifest is None:
+        raise HTTPException(status_code=404, detail="Курс с таким кодом не найден")
+
+    return json_response({"ok": True, "manifest": manifest})
+
+
+# ─── E) Employee answers / progress ──────────────────────────────────────────
+
+class _AnswerIn(BaseModel):
+    questionId: str
+    answerOption: Optional[int] = None   # quiz: chosen option index
+    answerText: Optional[str] = None     # open: free-text answer
+
+
+class _AnswersRequest(BaseModel):
+    answers: List[_AnswerIn]
+    complete: bool = False               # mark the enrollment completed
+
+
+def _require_db_course_store() -> None:
+    if settings.course_store != "db":
+        raise HTTPException(
+            status_code=501,
+            detail="Progress tracking requires COURSE_STORE=db",
+        )
+
+
+@router.post("/api/courses/{course_id}/answers")
+async def submit_course_answers(
+    course_id: str,
+    body: _AnswersRequest,
+    user: dict = Depends(get_current_user),
+):
+    """
+    Save a batch of answers for the current employee in one bulk upsert.
+    Quiz answers are graded server-side; the enrollment is created on first
+    submission and completed when `complete` is set or every question is answered.
+    """
+    from api._lib.course_store import DbCourseStore
+    from api._lib.enrollments import UnknownQuestion, submit_answers
+    from api._lib.supabase_admin import get_admin_client
+
+    log = get_logger(__name__)
+    _require_db_course_store()
+    user_id = user["id"]
+
+    supabase = get_admin_client()
+    try:
+        questions = DbCourseStore(supabase).get_questions(course_id)
+    except Exception as e:
+        log.error(f"Could not load questions for course {course_id}: {e}")
+        raise HTTPException(status_code=404, detail="Курс не найден")
+    if not questions:
+        raise HTTPException(status_code=404, detail="Курс не найден")
+
+    try:
+        result = submit_answers(
+            supabase,
+            course_id,
+            user_id,
+            questions,
+            [a.model_dump() for a in body.answers],
+            complete=body.complete,
+        )
+    except UnknownQuestion as e:
+        raise HTTPException(status_code=400, detail=f"Unknown question: {e}")
+    except Exception as e:
+        log.error(f"Failed to save answers for course {course_id} user {user_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to save answers: {str(e)}")
+
+    log.info(
+        f"Answers saved - courseId={course_id} userId={user_id} "
+        f"saved={result['saved']} status={result['status']}"
+    )
+    return {"ok": True, **result}
+
+
+@router.get("/api/courses/{course_id}/progress")
+async def get_course_progress(course_id: str, user: dict = Depends(get_current_user)):
+    """Current employee's enrollment status and saved answers for a course."""
+    from api._lib.enrollments import get_progress
+    from api._lib.supabase_admin import get_admin_client
+
+    _require_db_course_store()
+    try:
+        progress = get_progress(get_admin_client(), course_id, user["id"])
+    except Exception as e:
+        get_logger(__name__).error(f"Failed to load progress for course {course_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to load progress: {str(e)}")
+    if progress is None:
+        return {"ok": True, "status": "not_started", "answered": 0, "answers": []}
+    return {"ok": True, **progress}
+
+
+@router.get("/api/courses/{course_id}/analytics")
+async def get_course_analytics(course_id: str, user: dict = Depends(get_current_user)):
+    """
+    Curator analytics for a course: completion rate, per-question accuracy and
+    score distribution, read from trigger-maintained aggregates.
+    """
+    import uuid
+    from api._lib.analytics import get_course_analytics as _load_analytics
+    from api._lib.supabase_admin import get_admin_client
+
+    _require_db_course_store()
+    try:
+        uuid.UUID(course_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Course not found")
+
+    try:
+        report = _load_analytics(get_admin_client(), course_id, user["id"])
+    except Exception as e:
+        get_logger(__name__).error(f"Failed to load analytics for course {course_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to load analytics: {str(e)}")
+    if report is None:
+        raise HTTPException(status_code=404, detail="Course not found")
+    return {"ok": True, "analytics": report}
@@ -1,14 +1,21 @@
 """
 FastAPI application entrypoint for Vercel serverless deployment.
-Provides health check endpoints for system monitoring.
+
+Builds the app, installs the middleware stack and includes the per-area
+routers from api/_routers/. Router modules only define routes and request
+models; heavy dependencies (pypdf, python-docx, openai, the Supabase
+clients) are imported on first use, so a cold start that serves
+/api/health loads none of them. scripts/import_budget.py guards this.
 """
-from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Form
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional, List
-from api._lib.settings import settings
-from api._lib.auth import get_current_user
-from api._lib.logger import get_logger
+from api._lib.compression import CompressionMiddleware
+from api._lib.jsonio import JSONBytesResponse
+from api._lib.logger import RequestContextMiddleware, get_logger
+from api._lib.timing import ServerTimingMiddleware
+from api._lib.metrics import MetricsMiddleware
+from api._lib.profiling import ProfilerMiddleware
+from api._routers import courses, demo, health, profile, training
 
 # Initialize logger for this module
 logger = get_logger(__name__)
@@ -18,6 +25,7 @@ app = FastAPI(
     title="Adapt MVP API",
     description="Backend API for Adapt training platform",
     version="0.1.0",
+    default_response_class=JSONBytesResponse,
 )
 
 # Configure CORS for Next.js frontend
@@ -27,1739 +35,28 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Request-ID", "X-Profile-Id"],
 )
 
+# gzip/br/zstd for JSON and text bodies per Accept-Encoding (api/_lib/compression.py)
+app.add_middleware(CompressionMiddleware)
 
-@app.get("/api/health")
-async def health_check():
-    """
-    Basic health check endpoint.
-    Returns application build information and environment identifier.
-    """
-    return {
-        "ok": True,
-        "build": settings.git_sha,
-        "env": settings.environment,
-        "vercel_env": settings.vercel_env,
-        "vercel_url": settings.vercel_url,
-    }
-
-
-@app.get("/api/supabase/health")
-async def supabase_health():
-    """
-    Database connectivity check.
-    Executes a simple query to verify database connection and measure latency.
-    """
-    import time
-    from api._lib.supabase_admin import get_admin_client
-    
-    try:
-        start_time = time.time()
-        
-        # Get admin client
-        supabase = get_admin_client()
-        
-        # Execute simple query to app_meta table (or any table that should exist)
-        # If app_meta doesn't exist yet, this will fail gracefully
-        try:
-            response = supabase.table("app_meta").select("*").limit(1).execute()
-            latency_ms = int((time.time() - start_time) * 1000)
-            
-            return {
-                "ok": True,
-                "message": "Database connected successfully",
-                "latency_ms": latency_ms,
-            }
-        except Exception as query_error:
-            # Table might not exist yet (migrations not applied)
-            latency_ms = int((time.time() - start_time) * 1000)
-            return {
-                "ok": False,
-                "message": f"Database query failed: {str(query_error)}",
-                "latency_ms": latency_ms,
-            }
-            
-    except ValueError as e:
-        # Missing environment variables
-        return {
-            "ok": False,
-            "message": f"Configuration error: {str(e)}",
-            "latency_ms": 0,
-        }
-    except Exception as e:
-        # Other connection errors
-        return {
-            "ok": False,
-            "message": f"Connection error: {str(e)}",
-            "latency_ms": 0,
-        }
-
-
-@app.get("/api/storage/health")
-async def storage_health():
-    """
-    Storage bucket health check.
-    Verifies bucket exists (creates if missing) and lists objects.
-    """
-    from api._lib.supabase_admin import get_admin_client
-    
-    bucket_name = "adapt-files"
-    
-    try:
-        supabase = get_admin_client()
-        
-        # Try to get bucket info
-        try:
-            buckets = supabase.storage.list_buckets()
-            bucket_exists = any(b.name == bucket_name for b in buckets)
-            
-            if not bucket_exists:
-                # Create bucket if it doesn't exist
-                supabase.storage.create_bucket(
-                    bucket_name,
-                    options={
-                        "public": False,
-                        "file_size_limit": 52428800,  # 50MB in bytes
-                        "allowed_mime_types": [
-                            "text/plain",
-                            "application/pdf",
-                            "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                            "audio/webm",
-                            "audio/mpeg",
-                        ],
-                    }
-                )
-                bucket_exists = True
-            
-            # List objects to verify read access
-            files = supabase.storage.from_(bucket_name).list()
-            objects_count = len(files) if files else 0
-            
-            return {
-                "ok": True,
-                "bucket": bucket_name,
-                "objects_count": objects_count,
-            }
-            
-        except Exception as storage_error:
-            return {
-                "ok": False,
-                "message": f"Storage operation failed: {str(storage_error)}",
-                "bucket": bucket_name,
-                "objects_count": 0,
-            }
-            
-    except Exception as e:
-        return {
-            "ok": False,
-            "message": f"Error: {str(e)}",
-            "bucket": bucket_name,
-            "objects_count": 0,
-        }
-
-
-@app.post("/api/storage/test-upload")
-async def test_upload():
-    """
-    Test file upload endpoint.
-    Uploads a small test file to verify storage write access.
-    """
-    from datetime import datetime
-    from api._lib.supabase_admin import get_admin_client
-    
-    bucket_name = "adapt-files"
-    
-    try:
-        supabase = get_admin_client()
-        
-        # Generate timestamped path
-        timestamp = datetime.utcnow().isoformat()
-        file_path = f"healthcheck/{timestamp}.txt"
-        
-        # Create test content
-        content = f"Health check at {timestamp}".encode('utf-8')
-        
-        # Upload to storage
-        try:
-            result = supabase.storage.from_(bucket_name).upload(
-                file_path,
-                content,
-                {"content-type": "text/plain"}
-            )
-            
-            return {
-                "ok": True,
-                "bucket": bucket_name,
-                "path": file_path,
-            }
-            
-        except Exception as upload_error:
-            return {
-                "ok": False,
-                "message": f"Upload failed: {str(upload_error)}",
-                "bucket": bucket_name,
-                "path": "",
-            }
-            
-    except Exception as e:
-        return {
-            "ok": False,
-            "message": f"Error: {str(e)}",
-            "bucket": bucket_name,
-            "path": "",
-        }
-
-
-# =============================================================================
-# Role Endpoints (authenticated via Supabase JWT)
-# =============================================================================
-
-class RoleUpdate(BaseModel):
-    role: str
-
-
-@app.get("/api/profile/role")
-async def get_my_role(user: dict = Depends(get_current_user)):
-    """Get the current authenticated user's role."""
-    from api._lib.supabase_admin import get_admin_client
-
-    logger = get_logger(__name__)
-    user_id = user["id"]
-
-    logger.info(f"GET /api/profile/role - user_id={user_id}")
-
-    try:
-        supabase = get_admin_client()
-        result = supabase.table("profiles").select("role").eq("id", user_id).maybe_single().execute()
-
-        role = result.data["role"] if result.data else None
-        logger.info(f"GET /api/profile/role - user_id={user_id}, role={role}")
-
-        return {"role": role}
-
-    except HTTPException:
-        # Re-raise auth errors from get_current_user
-        raise
-    except Exception as e:
-        # Log database/connection errors but still return null role
-        # (Frontend handles null by redirecting to role selection)
-        logger.error(f"GET /api/profile/role - user_id={user_id}, error={type(e).__name__}: {str(e)}")
-        return {"role": None}
-
-
-@app.post("/api/profile/role")
-async def set_my_role(body: RoleUpdate, user: dict = Depends(get_current_user)):
-    """Set the current authenticated user's role using atomic UPSERT."""
-    from api._lib.supabase_admin import get_admin_client
-
-    logger = get_logger(__name__)
-    user_id = user["id"]
-
-    if body.role not in ("curator", "employee"):
-        logger.warning(f"POST /api/profile/role - user_id={user_id}, invalid_role={body.role}")
-        raise HTTPException(status_code=400, detail='Role must be "curator" or "employee"')
-
-    logger.info(f"POST /api/profile/role - user_id={user_id}, role={body.role}")
-
-    try:
-        supabase = get_admin_client()
-
-        # Use UPSERT to atomically insert or update
-        # Supabase upsert automatically handles ON CONFLICT
-        # Note: In supabase-py, .select() after .upsert() is not supported
-        # We perform upsert first, then fetch the result with a separate SELECT
-        supabase.table("profiles").upsert(
-            {
-                "id": user_id,
-                "email": user.get("email"),
-                "full_name": user.get("user_metadata", {}).get("full_name"),
-                "role": body.role,
-                "org_id": None,
-            }
-        ).execute()
-
-        # Fetch the updated profile with a separate SELECT query
-        result = supabase.table("profiles").select("*").eq("id", user_id).maybe_single().execute()
-
-        # Check if we got data back
-        if result.data:
-            logger.info(f"POST /api/profile/role - user_id={user_id}, role={body.role}, success=True")
-            return {"ok": True, "profile": result.data}
-        else:
-            logger.error(f"POST /api/profile/role - user_id={user_id}, profile not found after upsert")
-            raise HTTPException(status_code=500, detail="Profile not found after upsert")
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        error_type = type(e).__name__
-        error_msg = str(e)
-        logger.error(
-            f"POST /api/profile/role - user_id={user_id}, role={body.role}, "
-            f"error={error_type}, message={error_msg}"
-        )
-        raise HTTPException(status_code=500, detail=f"Failed to save role: {error_msg}")
-
-
-# =============================================================================
-# Auth Check Endpoints
-# =============================================================================
-
-class EmailCheckRequest(BaseModel):
-    """Request body for checking email status."""
-    email: str
-
-
-@app.post("/api/auth/check-email")
-async def check_email_status(body: EmailCheckRequest):
-    """
-    Check if an email is registered and if the account is confirmed.
-    Returns: { exists: bool, confirmed: bool | null }
-    """
-    from api._lib.supabase_admin import get_admin_client
-
-    try:
-        supabase = get_admin_client()
-
-        # Use admin API to get users list
-        try:
-            # List users and find by email
-            # Note: In production, consider pagination for large user bases
-            response = supabase.auth.admin.list_users()
-
-            # Extract users from response
-            users = response if isinstance(response, list) else getattr(response, 'users', [])
-
-            # Find user with matching email (case-insensitive)
-            user = next((u for u in users if u.email and u.email.lower() == body.email.lower()), None)
-
-            if not user:
-                return {
-                    "exists": False,
-                    "confirmed": None,
-                }
-
-            # Check if email is confirmed
-            is_confirmed = user.email_confirmed_at is not None
-
-            return {
-                "exists": True,
-                "confirmed": is_confirmed,
-            }
-
-        except Exception as auth_error:
-            raise HTTPException(status_code=500, detail=f"Auth check failed: {str(auth_error)}")
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
-
-
-# =============================================================================
-# Profile Management Endpoints
-# =============================================================================
-
-class ProfileCreate(BaseModel):
-    """Request body for creating/updating a profile."""
-    user_id: str
-    email: Optional[str] = None
-    full_name: Optional[str] = None
-    role: str = "curator"
-
-
-class ProfileUpdate(BaseModel):
-    """Request body for updating profile fields."""
-    full_name: Optional[str] = None
-    role: Optional[str] = None
-    org_id: Optional[str] = None
-
-
-@app.post("/api/profiles/ensure")
-async def ensure_profile(profile: ProfileCreate):
-    """
-    Ensure a profile exists for the given user.
-    Creates if not exists, returns existing if found.
-    Uses service role key to bypass RLS.
-    """
-    from api._lib.supabase_admin import get_admin_client
-    
-    try:
-        supabase = get_admin_client()
-        
-        # Check if profile exists
-        result = supabase.table("profiles").select("*").eq("id", profile.user_id).maybe_single().execute()
-        
-        if result.data:
-            # Profile exists, return it
-            return {
-                "ok": True,
-                "profile": result.data,
-                "created": False,
-            }
-        
-        # Create new profile
-        new_profile = {
-            "id": profile.user_id,
-            "email": profile.email,
-            "full_name": profile.full_name,
-            "role": profile.role,
-            "org_id": None,
-        }
-
-        # Insert the profile (supabase-py doesn't support .select() after .insert())
-        supabase.table("profiles").insert(new_profile).execute()
-
-        # Fetch the inserted profile with a separate SELECT query
-        fetch_result = supabase.table("profiles").select("*").eq("id", profile.user_id).maybe_single().execute()
-
-        return {
-            "ok": True,
-            "profile": fetch_result.data if fetch_result.data else new_profile,
-            "created": True,
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Profile operation failed: {str(e)}")
-
-
-@app.patch("/api/profiles/{user_id}")
-async def update_profile(user_id: str, updates: ProfileUpdate):
-    """
-    Update a user's profile.
-    Uses service role key to bypass RLS.
-    """
-    from api._lib.supabase_admin import get_admin_client
-    
-    try:
-        supabase = get_admin_client()
-        
-        # Build update dict with only provided fields
-        update_data = {}
-        if updates.full_name is not None:
-            update_data["full_name"] = updates.full_name
-        if updates.role is not None:
-            update_data["role"] = updates.role
-        if updates.org_id is not None:
-            update_data["org_id"] = updates.org_id
-        
-        if not update_data:
-            raise HTTPException(status_code=400, detail="No fields to update")
-
-        # Perform update (supabase-py doesn't guarantee .data in response)
-        supabase.table("profiles").update(update_data).eq("id", user_id).execute()
-
-        # Fetch the updated profile with a separate SELECT query
-        result = supabase.table("profiles").select("*").eq("id", user_id).maybe_single().execute()
-
-        if not result.data:
-            raise HTTPException(status_code=404, detail="Profile not found")
-
-        return {
-            "ok": True,
-            "profile": result.data,
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Update failed: {str(e)}")
-
-
-@app.get("/api/profiles/{user_id}")
-async def get_profile(user_id: str):
-    """
-    Get a user's profile.
-    Uses service role key to bypass RLS.
-    """
-    from api._lib.supabase_admin import get_admin_client
-    
-    try:
-        supabase = get_admin_client()
-        
-        result = supabase.table("profiles").select("*").eq("id", user_id).maybe_single().execute()
-        
-        if not result.data:
-            raise HTTPException(status_code=404, detail="Profile not found")
-        
-        return {
-            "ok": True,
-            "profile": result.data,
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Fetch failed: {str(e)}")
-
-
-# =============================================================================
-# Demo Request Endpoints
-# =============================================================================
-
-class DemoRequestCreate(BaseModel):
-    """Request body for creating a demo request from landing page."""
-    name: str
-    email: str
-    company: str
-    telegram: str
-    source: Optional[str] = "landing_page"
-
-@app.post("/api/demo-request")
-async def create_demo_request(body: DemoRequestCreate):
-    """
-    Create a new demo request from the landing page.
-    Public endpoint (no auth required).
-    Stores request in database for follow-up.
-
-    Returns:
-        {"ok": true, "message": "..."}
-
-    Raises:
-        HTTPException: 400 for validation errors, 500 for database errors
-    """
-    from api._lib.supabase_admin import get_admin_client
-
-    # Validate email format
-    import re
-    email_pattern = r'^[^\s@]+@[^\s@]+\.[^\s@]+$'
-    if not re.match(email_pattern, body.email):
-        raise HTTPException(status_code=400, detail="Invalid email format")
-
-    # Validate required fields
-    if not body.name.strip():
-        raise HTTPException(status_code=400, detail="Name is required")
-    if not body.company.strip():
-        raise HTTPException(status_code=400, detail="Company is required")
-    if not body.telegram.strip():
-        raise HTTPException(status_code=400, detail="Telegram is required")
-
-    try:
-        supabase = get_admin_client()
-
-        # Create demo request record
-        demo_request = {
-            "name": body.name.strip(),
-            "email": body.email.strip().lower(),
-            "company": body.company.strip(),
-            "telegram": body.telegram.strip(),
-            "source": body.source,
-            "status": "new",
-        }
-
-        result = supabase.table("demo_requests").insert(demo_request).execute()
-
-        logger.info(
-            f"Demo request created - email={body.email}, company={body.company}, source={body.source}"
-        )
-
-        return {
-            "ok": True,
-            "message": "Спасибо! Мы свяжемся с вами в Telegram.",
-        }
-
-    except Exception as e:
-        logger.error(f"Failed to create demo request - error={type(e).__name__}: {str(e)}")
-        raise HTTPException(status_code=500, detail="Failed to submit request")
-
-
-# =============================================================================
-# Courses Endpoints (Storage-based, no DB)
-# =============================================================================
-#
-# STORAGE SETUP REQUIRED:
-# Create a bucket named "courses" in your Supabase project:
-#   1. Go to Storage → Create bucket → Name: "courses", Public: false
-#   2. Set file size limit: 30MB
-#   3. Allowed MIME types: application/pdf, text/plain,
-#      application/vnd.openxmlformats-officedocument.wordprocessingml.document,
-#      application/msword
-#
-# File structure in bucket:
-#   {userId}/{courseId}/files/{filename}       ← original files
-#   {userId}/{courseId}/parsed/{filename}.txt  ← parsed text per file
-#   {userId}/{courseId}/parsed/combined.txt    ← all text combined
-#   {userId}/{courseId}/manifest.json          ← course metadata
-# =============================================================================
-
-COURSES_BUCKET = "courses"
-MAX_FILE_SIZE = 30 * 1024 * 1024  # 30MB
-ALLOWED_EXTENSIONS = {".pdf", ".txt", ".doc", ".docx"}
-ALLOWED_MIME_TYPES = {
-    "application/pdf",
-    "text/plain",
-    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-    "application/msword",
-}
-
-
-def _parse_pdf_bytes(content: bytes) -> str:
-    """Extract text from PDF bytes using pypdf."""
-    try:
-        from pypdf import PdfReader
-        import io
-        reader = PdfReader(io.BytesIO(content))
-        texts = []
-        for page in reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                texts.append(page_text)
-        return "\n".join(texts)
-    except Exception as e:
-        raise ValueError(f"PDF parse error: {str(e)}")
-
-
-def _parse_docx_bytes(content: bytes) -> str:
-    """Extract text from DOCX bytes using python-docx."""
-    try:
-        from docx import Document
-        import io
-        doc = Document(io.BytesIO(content))
-        paragraphs = [para.text for para in doc.paragraphs if para.text.strip()]
-        return "\n".join(paragraphs)
-    except Exception as e:
-        raise ValueError(f"DOCX parse error: {str(e)}")
-
-
-def _parse_txt_bytes(content: bytes) -> str:
-    """Decode TXT bytes to string."""
-    for encoding in ("utf-8", "utf-16", "latin-1"):
-        try:
-            return content.decode(encoding)
-        except UnicodeDecodeError:
-            continue
-    return content.decode("latin-1", errors="replace")
-
-
-def _ensure_courses_bucket(supabase) -> None:
-    """Ensure the courses bucket exists. Creates/updates it without MIME restrictions.
-
-    We intentionally do NOT set allowed_mime_types here — MIME validation is
-    performed at the application level. Setting it on the bucket has caused
-    InvalidMimeType 415 errors (e.g. when the browser reports an empty or
-    vendor-prefixed MIME type for DOCX files).
-    """
-    try:
-        buckets = supabase.storage.list_buckets()
-        exists = any(b.name == COURSES_BUCKET for b in buckets)
-        if not exists:
-            supabase.storage.create_bucket(
-                COURSES_BUCKET,
-                options={
-                    "public": False,
-                    "file_size_limit": MAX_FILE_SIZE,
-                    # No allowed_mime_types — allow all; app validates by extension.
-                },
-            )
-            logger.info(f"Created bucket '{COURSES_BUCKET}'")
-        else:
-            # If the bucket already exists with stale allowed_mime_types restrictions
-            # (e.g. created without the application/ prefix), clear them so uploads
-            # are not blocked at the storage layer.
-            try:
-                supabase.storage.update_bucket(
-                    COURSES_BUCKET,
-                    options={
-                        "public": False,
-                        "file_size_limit": MAX_FILE_SIZE,
-                        "allowed_mime_types": [],  # empty = no restriction
-                    },
-                )
-            except Exception as update_err:
-                logger.warning(f"Could not update bucket mime settings (non-fatal): {update_err}")
-    except Exception as e:
-        logger.warning(f"Could not ensure bucket: {e}")
-
-
-class FileInfo(BaseModel):
-    name: str
-    originalName: str
-    storagePath: str
-    mimeType: str
-    size: int
-
-
-class CourseProcessRequest(BaseModel):
-    courseId: str
-    userId: str
-    title: str
-    size: str
-    files: List[FileInfo]
-
-
-class CourseManifestFile(BaseModel):
-    fileId: str           # UUID filename in storage e.g. "abc123.pdf"
-    name: str             # original file name
-    type: str
-    size: int
-    storagePath: str
-    parseStatus: str  # "parsed" | "skipped" | "error"
-    parsedPath: Optional[str] = None
-    parseError: Optional[str] = None
-
-
-class CourseManifest(BaseModel):
-    courseId: str
-    title: str
-    size: str
-    createdAt: str
-    overallStatus: str  # "ready" | "partial" | "error" | "processing"
-    textBytes: int
-    inviteCode: str
-    employeesCount: int = 0
-    files: List[CourseManifestFile]
-
-
-@app.post("/api/courses/process")
-async def process_course(
-    body: CourseProcessRequest,
-    user: dict = Depends(get_current_user),
-):
-    """
-    Process uploaded course files: parse text, save results, create manifest.
-
-    Called after client has already uploaded files to Supabase Storage.
-    Downloads each file, parses it, saves parsed text and manifest.json.
-    """
-    import json
-    import random
-    import string
-    from datetime import datetime, timezone
-    from api._lib.supabase_admin import get_admin_client
-
-    log = get_logger(__name__)
-    user_id = user["id"]
-    course_id = body.courseId
-
-    def _generate_invite_code(length: int = 6) -> str:
-        chars = string.ascii_uppercase + string.digits
-        return "".join(random.choices(chars, k=length))
-
-    log.info(f"POST /api/courses/process - userId={user_id}, courseId={course_id}")
-
-    # Security: ensure user can only process their own courses
-    if body.userId != user_id:
-        raise HTTPException(status_code=403, detail="Forbidden")
-
-    # Enforce file size limits before downloading anything
-    MAX_TOTAL_SIZE = 300 * 1024 * 1024  # 300 MB
-    for f in body.files:
-        if f.size > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=413,
-                detail=f"Файл «{f.originalName}» ({f.size // (1024*1024)} МБ) превышает лимит 30 МБ.",
-            )
-    total_upload_size = sum(f.size for f in body.files)
-    if total_upload_size > MAX_TOTAL_SIZE:
-        raise HTTPException(
-            status_code=413,
-            detail=f"Суммарный размер файлов ({total_upload_size // (1024*1024)} МБ) превышает лимит 300 МБ.",
-        )
-
-    supabase = get_admin_client()
-    _ensure_courses_bucket(supabase)
-
-    parsed_files: List[CourseManifestFile] = []
-    combined_parts: List[str] = []
-    total_text_bytes = 0
-
-    for file_info in body.files:
-        file_path = file_info.storagePath
-        name_lower = file_info.originalName.lower()
-        ext = "." + name_lower.rsplit(".", 1)[-1] if "." in name_lower else ""
-
-        log.info(f"Processing file: {file_info.originalName} (ext={ext})")
-
-        # Download file from Storage
-        try:
-            file_bytes = supabase.storage.from_(COURSES_BUCKET).download(file_path)
-        except Exception as e:
-            log.error(f"Failed to download {file_path}: {e}")
-            parsed_files.append(CourseManifestFile(
-                fileId=file_info.name,
-                name=file_info.originalName,
-                type=file_info.mimeType,
-                size=file_info.size,
-                storagePath=file_path,
-                parseStatus="error",
-                parseError=f"Download failed: {str(e)}",
-            ))
-            continue
-
-        # Parse based on extension
-        parsed_text: Optional[str] = None
-        parse_status = "parsed"
-        parse_error: Optional[str] = None
-
-        try:
-            if ext == ".pdf":
-                parsed_text = _parse_pdf_bytes(file_bytes)
-            elif ext in (".txt",):
-                parsed_text = _parse_txt_bytes(file_bytes)
-            elif ext == ".docx":
-                parsed_text = _parse_docx_bytes(file_bytes)
-            elif ext == ".doc":
-                parse_status = "skipped"
-                parse_error = ".doc загружен, парсинг будет позже"
-            else:
-                parse_status = "skipped"
-                parse_error = f"Неподдерживаемый формат: {ext}"
-        except ValueError as e:
-            parse_status = "error"
-            parse_error = str(e)
-            log.warning(f"Parse error for {file_info.originalName}: {e}")
-
-        # Save parsed text to Storage
-        parsed_path: Optional[str] = None
-        if parsed_text is not None:
-            parsed_path = f"{user_id}/{course_id}/parsed/{file_info.name}.txt"
-            text_bytes = parsed_text.encode("utf-8")
-            total_text_bytes += len(text_bytes)
-            try:
-                supabase.storage.from_(COURSES_BUCKET).upload(
-                    parsed_path,
-                    text_bytes,
-                    {"content-type": "text/plain; charset=utf-8", "upsert": "true"},
-                )
-                combined_parts.append(
-                    f"=== {file_info.originalName} ===\n{parsed_text}"
-                )
-            except Exception as e:
-                log.error(f"Failed to save parsed text for {file_info.originalName}: {e}")
-                parse_error = f"Parsed text save failed: {str(e)}"
-
-        parsed_files.append(CourseManifestFile(
-            fileId=file_info.name,
-            name=file_info.originalName,
-            type=file_info.mimeType,
-            size=file_info.size,
-            storagePath=file_path,
-            parseStatus=parse_status,
-            parsedPath=parsed_path,
-            parseError=parse_error,
-        ))
-
-    # Save combined.txt
-    if combined_parts:
-        combined_text = "\n\n".join(combined_parts).encode("utf-8")
-        combined_path = f"{user_id}/{course_id}/parsed/combined.txt"
-        try:
-            supabase.storage.from_(COURSES_BUCKET).upload(
-                combined_path,
-                combined_text,
-                {"content-type": "text/plain; charset=utf-8", "upsert": "true"},
-            )
-        except Exception as e:
-            log.error(f"Failed to save combined.txt: {e}")
-
-    # Determine overall status
-    statuses = [f.parseStatus for f in parsed_files]
-    if all(s == "parsed" for s in statuses):
-        overall_status = "ready"
-    elif any(s == "error" for s in statuses):
-        overall_status = "partial" if any(s == "parsed" for s in statuses) else "error"
-    else:
-        overall_status = "ready"
-
-    # Build and save manifest
-    manifest = CourseManifest(
-        courseId=course_id,
-        title=body.title,
-        size=body.size,
-        createdAt=datetime.now(timezone.utc).isoformat(),
-        overallStatus=overall_status,
-        textBytes=total_text_bytes,
-        inviteCode=_generate_invite_code(),
-        employeesCount=0,
-        files=[f.model_dump() for f in parsed_files],
-    )
-
-    manifest_path = f"{user_id}/{course_id}/manifest.json"
-    manifest_bytes = json.dumps(manifest.model_dump(), ensure_ascii=False, indent=2).encode("utf-8")
-
-    try:
-        supabase.storage.from_(COURSES_BUCKET).upload(
-            manifest_path,
-            manifest_bytes,
-            {"content-type": "application/json", "upsert": "true"},
-        )
-    except Exception as e:
-        log.error(f"Failed to save manifest: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to save manifest: {str(e)}")
-
-    # Build extractedText for question generation (truncate to 100k chars)
-    combined_str = "\n\n".join(combined_parts) if combined_parts else ""
-    MAX_CHARS = 100_000
-    truncated = len(combined_str) > MAX_CHARS
-    if truncated:
-        combined_str = combined_str[:MAX_CHARS]
-
-    log.info(
-        f"Course processed - courseId={course_id}, status={overall_status}, "
-        f"files={len(parsed_files)}, extractedChars={len(combined_str)}, truncated={truncated}"
-    )
-
-    return {
-        "ok": True,
-        "manifest": manifest.model_dump(),
-        "extractedText": combined_str,
-        "extractedStats": {
-            "chars": len(combined_str),
-            "filesCount": len([f for f in parsed_files if f.parseStatus == "parsed"]),
-            "truncated": truncated,
-        },
-    }
-
-
-@app.get("/api/courses/list")
-async def list_courses(user: dict = Depends(get_current_user)):
-    """
-    List all courses for the authenticated user.
-    Reads manifest.json from Storage for each course folder.
-    Returns courses sorted by createdAt descending.
-    """
-    import json
-    from api._lib.supabase_admin import get_admin_client
-
-    log = get_logger(__name__)
-    user_id = user["id"]
-
-    log.info(f"GET /api/courses/list - userId={user_id}")
-
-    supabase = get_admin_client()
-    _ensure_courses_bucket(supabase)
-
-    # List course folders for this user
-    try:
-        items = supabase.storage.from_(COURSES_BUCKET).list(user_id)
-    except Exception as e:
-        log.error(f"Failed to list courses for user {user_id}: {e}")
-        return {"ok": True, "courses": []}
-
-    if not items:
-        return {"ok": True, "courses": []}
-
-    courses = []
-    for item in items:
-        # Each item is a folder representing a courseId
-        course_id = item.get("name") if isinstance(item, dict) else getattr(item, "name", None)
-        if not course_id:
-            continue
-
-        # Try to download manifest.json
-        manifest_path = f"{user_id}/{course_id}/manifest.json"
-        try:
-            manifest_bytes = supabase.storage.from_(COURSES_BUCKET).download(manifest_path)
-            manifest = json.loads(manifest_bytes.decode("utf-8"))
-            courses.append(manifest)
-        except Exception as e:
-            log.warning(f"Could not read manifest for course {course_id}: {e}")
-            # Include a placeholder for courses without manifest
-            courses.append({
-                "courseId": course_id,
-                "title": "Неполный курс",
-                "size": "unknown",
-                "createdAt": "",
-                "overallStatus": "error",
-                "textBytes": 0,
-                "inviteCode": "",
-                "employeesCount": 0,
-                "files": [],
-            })
-            continue
-
-    # Sort by createdAt descending (newest first)
-    courses.sort(key=lambda c: c.get("createdAt", ""), reverse=True)
-
-    return {"ok": True, "courses": courses}
-
-
-@app.get("/api/courses/{course_id}")
-async def get_course(course_id: str, user: dict = Depends(get_current_user)):
-    """
-    Get a single course manifest by courseId.
-    """
-    import json
-    from api._lib.supabase_admin import get_admin_client
-
-    log = get_logger(__name__)
-    user_id = user["id"]
-
-    supabase = get_admin_client()
-    manifest_path = f"{user_id}/{course_id}/manifest.json"
-    try:
-        manifest_bytes = supabase.storage.from_(COURSES_BUCKET).download(manifest_path)
-        manifest = json.loads(manifest_bytes.decode("utf-8"))
-    except Exception as e:
-        log.error(f"Could not read manifest for course {course_id}: {e}")
-        raise HTTPException(status_code=404, detail="Course not found")
-
-    return {"ok": True, "manifest": manifest}
-
-
-@app.get("/api/courses/{course_id}/files/{file_id}/download")
-async def download_course_file(
-    course_id: str,
-    file_id: str,
-    user: dict = Depends(get_current_user),
-):
-    """
-    Return a short-lived signed URL to download a course file.
-    file_id is the UUID filename stored in Storage (e.g. "abc123.pdf").
-    """
-    import json
-    from fastapi.responses import JSONResponse
-    from api._lib.supabase_admin import get_admin_client
-
-    log = get_logger(__name__)
-    user_id = user["id"]
-
-    supabase = get_admin_client()
-
-    # Read manifest to verify the file belongs to this user's course
-    manifest_path = f"{user_id}/{course_id}/manifest.json"
-    try:
-        manifest_bytes = supabase.storage.from_(COURSES_BUCKET).download(manifest_path)
-        manifest = json.loads(manifest_bytes.decode("utf-8"))
-    except Exception:
-        raise HTTPException(status_code=404, detail="Course not found")
-
-    # Find matching file entry by fileId
-    file_entry = next(
-        (f for f in manifest.get("files", []) if f.get("fileId") == file_id),
-        None,
-    )
-    if not file_entry:
-        raise HTTPException(status_code=404, detail="File not found in course")
-
-    storage_path = file_entry["storagePath"]
-
-    # Create a signed URL valid for 60 seconds
-    try:
-        result = supabase.storage.from_(COURSES_BUCKET).create_signed_url(
-            storage_path, expires_in=60
-        )
-        signed_url = result.get("signedURL") or result.get("signedUrl")
-        if not signed_url:
-            raise ValueError(f"No signed URL in response: {result}")
-    except Exception as e:
-        log.error(f"Failed to create signed URL for {storage_path}: {e}")
-        raise HTTPException(status_code=500, detail=f"Could not generate download URL: {str(e)}")
-
-    return {
-        "ok": True,
-        "url": signed_url,
-        "fileName": file_entry.get("name", file_id),
-    }
-
-
-# =============================================================================
-# Training — new wizard endpoints
-# =============================================================================
-
-from enum import Enum as _Enum
-
-
-class _QuestionType(str, _Enum):
-    quiz = "quiz"
-    open = "open"
-
-
-class _Question(BaseModel):
-    id: str
-    type: _QuestionType
-    prompt: str
-    quizOptions: Optional[List[str]] = None   # exactly 4 for quiz
-    correctIndex: Optional[int] = None         # 0-3 for quiz
-    expectedAnswer: Optional[str] = None       # for open
-    explanation: Optional[str] = None          # mcq explanation
-    tag: Optional[str] = None                  # topic tag
-
-
-class _DraftUploadedFile(BaseModel):
-    path: str           # safe key, e.g. "uuid.pdf"
-    storagePath: str    # full bucket path
-    originalName: str
-    mime: str
-    size: int
-
-
-class _GenerateRequest(BaseModel):
-    draftCourseId: str
-    title: str
-    size: str          # "small" | "medium" | "large"
-    extractedText: str
-
-
-class _FinalizeRequest(BaseModel):
-    draftCourseId: str
-    title: str
-    size: str
-    uploadedFiles: List[_DraftUploadedFile]
-    questions: List[_Question]
-
-
-# ─── A) POST /api/courses/draft ──────────────────────────────────────────────
-
-@app.post("/api/courses/draft")
-async def create_course_draft(
-    title: str = Form(...),
-    size: str = Form(...),
-    files: List[UploadFile] = File(...),
-    user: dict = Depends(get_current_user),
-):
-    """
-    Receive multipart files, upload to Storage via service_role (no RLS issues),
-    parse text, save combined.txt, return draft payload.
-    """
-    import json
-    import time
-    import uuid
-    from datetime import datetime, timezone
-    from api._lib.supabase_admin import get_admin_client
-
-    log = get_logger(__name__)
-    request_id = str(uuid.uuid4())[:8]
-    user_id = user["id"]
-    draft_course_id = str(uuid.uuid4())
-
-    log.info(
-        f"[{request_id}] POST /api/courses/draft - userId={user_id} "
-        f"draftCourseId={draft_course_id} title={title!r} size={size}"
-    )
-
-    supabase = get_admin_client()
-    _ensure_courses_bucket(supabase)
-
-    uploaded_files = []
-    combined_parts = []
-    t_upload_start = time.monotonic()
-
-    for upload_file in files:
-        original_name = upload_file.filename or "file"
-        ext = ""
-        dot_pos = original_name.rfind(".")
-        if dot_pos >= 0:
-            ext = original_name[dot_pos:].lower()
-
-        safe_key = f"{uuid.uuid4()}{ext}"
-        storage_path = f"{user_id}/{draft_course_id}/files/{safe_key}"
-
-        # Guess MIME
-        mime_map = {
-            ".pdf": "application/pdf",
-            ".txt": "text/plain",
-            ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            ".doc": "application/msword",
-        }
-        content_type = upload_file.content_type or mime_map.get(ext, "application/octet-stream")
-        if content_type == "application/octet-stream" and ext in mime_map:
-            content_type = mime_map[ext]
-
-        file_bytes = await upload_file.read()
-        file_size = len(file_bytes)
-
-        # Upload raw file
-        try:
-            supabase.storage.from_(COURSES_BUCKET).upload(
-                storage_path,
-                file_bytes,
-                {"content-type": content_type, "upsert": "true"},
-            )
-        except Exception as e:
-            log.error(f"[{request_id}] Upload failed for {original_name}: {e}")
-            # Skip file but continue with others
-            continue
-
-        # Parse text
-        parsed_text: Optional[str] = None
-        try:
-            if ext == ".pdf":
-                parsed_text = _parse_pdf_bytes(file_bytes)
-            elif ext == ".txt":
-                parsed_text = _parse_txt_bytes(file_bytes)
-            elif ext == ".docx":
-                parsed_text = _parse_docx_bytes(file_bytes)
-        except Exception as e:
-            log.warning(f"[{request_id}] Parse error for {original_name}: {e}")
-
-        if parsed_text:
-            parsed_path = f"{user_id}/{draft_course_id}/parsed/{safe_key}.txt"
-            try:
-                supabase.storage.from_(COURSES_BUCKET).upload(
-                    parsed_path,
-                    parsed_text.encode("utf-8"),
-                    {"content-type": "text/plain; charset=utf-8", "upsert": "true"},
-                )
-            except Exception as e:
-                log.warning(f"[{request_id}] Could not save parsed text: {e}")
-            combined_parts.append(f"=== {original_name} ===\n{parsed_text}")
-
-        uploaded_files.append({
-            "path": safe_key,
-            "storagePath": storage_path,
-            "originalName": original_name,
-            "mime": content_type,
-            "size": file_size,
-        })
-
-    upload_ms = int((time.monotonic() - t_upload_start) * 1000)
-
-    if not uploaded_files:
-        raise HTTPException(status_code=400, detail="No files could be uploaded")
-
-    # Build combined text, truncate to 100k chars to stay within LLM limits
-    combined_text = "\n\n".join(combined_parts)
-    MAX_CHARS = 100_000
-    truncated = False
-    if len(combined_text) > MAX_CHARS:
-        combined_text = combined_text[:MAX_CHARS]
-        truncated = True
-
-    # Save combined.txt
-    if combined_parts:
-        combined_path = f"{user_id}/{draft_course_id}/parsed/combined.txt"
-        try:
-            supabase.storage.from_(COURSES_BUCKET).upload(
-                combined_path,
-                combined_text.encode("utf-8"),
-                {"content-type": "text/plain; charset=utf-8", "upsert": "true"},
-            )
-        except Exception as e:
-            log.warning(f"[{request_id}] Could not save combined.txt: {e}")
-
-    # Save draft_manifest.json
-    draft_manifest = {
-        "draftCourseId": draft_course_id,
-        "title": title,
-        "size": size,
-        "createdAt": datetime.now(timezone.utc).isoformat(),
-        "status": "draft",
-        "uploadedFiles": uploaded_files,
-    }
-    try:
-        supabase.storage.from_(COURSES_BUCKET).upload(
-            f"{user_id}/{draft_course_id}/draft_manifest.json",
-            json.dumps(draft_manifest, ensure_ascii=False).encode("utf-8"),
-            {"content-type": "application/json", "upsert": "true"},
-        )
-    except Exception as e:
-        log.warning(f"[{request_id}] Could not save draft_manifest: {e}")
-
-    log.info(
-        f"[{request_id}] Draft complete - draftCourseId={draft_course_id} "
-        f"files={len(uploaded_files)} chars={len(combined_text)} "
-        f"truncated={truncated} upload_ms={upload_ms}"
-    )
-
-    return {
-        "ok": True,
-        "draftCourseId": draft_course_id,
-        "uploadedFiles": uploaded_files,
-        "extractedText": combined_text,
-        "extractedStats": {
-            "chars": len(combined_text),
-            "filesCount": len(uploaded_files),
-            "truncated": truncated,
-        },
-    }
-
-
-# ─── B) POST /api/training/generate ─────────────────────────────────────────
-
-@app.post("/api/training/generate")
-async def generate_training(
-    body: _GenerateRequest,
-    user: dict = Depends(get_current_user),
-):
-    """
-    Call Yandex AI Studio to generate quiz/open questions from extracted text.
-    Returns validated List[Question].
-    """
-    import json
-    import time
-    import uuid
-
-    log = get_logger(__name__)
-    request_id = str(uuid.uuid4())[:8]
-    user_id = user["id"]
-
-    log.info(
-        f"[{request_id}] POST /api/training/generate - userId={user_id} "
-        f"draftCourseId={body.draftCourseId} size={body.size}"
-    )
-
-    if not settings.yandex_api_key or not settings.yandex_prompt_id:
-        raise HTTPException(
-            status_code=503,
-            detail="Yandex AI Studio не настроен: задайте YANDEX_API_KEY и YANDEX_PROMPT_ID в env",
-        )
-
-    # Determine question count by size
-    size_map = {"small": (8, 12), "medium": (12, 18), "large": (18, 30)}
-    n_min, n_max = size_map.get(body.size, (12, 18))
-    quota_mcq = round((n_min + n_max) / 2 * 0.7)
-    quota_open = round((n_min + n_max) / 2 * 0.3)
-
-    prompt_variables = {
-        "course_title": body.title,
-        "course_description": body.title,
-        "kb_chunks": body.extractedText[:80_000],
-        "quota_mcq": str(quota_mcq),
-        "quota_open": str(quota_open),
-        "quota_roleplay": "0",
-        "expected_steps": str(quota_mcq + quota_open),
-        "batch_index": "0",
-        "total_batches": "1",
-    }
-
-    def _call_yandex(variables: dict) -> str:
-        from openai import OpenAI
-        client_kwargs = {
-            "api_key": settings.yandex_api_key,
-            "base_url": "https://rest-assistant.api.cloud.yandex.net/v1",
-        }
-        if settings.yandex_project_id:
-            client_kwargs["project"] = settings.yandex_project_id
-        client = OpenAI(**client_kwargs)
-        response = client.responses.create(
-            prompt={
-                "id": settings.yandex_prompt_id,
-                "variables": variables,
-            },
-            input="Сгенерируй вопросы по учебному материалу",
-        )
-        return response.output_text or ""
-
-    t_start = time.monotonic()
-
-    # First attempt
-    raw = ""
-    try:
-        raw = _call_yandex(prompt_variables)
-    except Exception as e:
-        log.error(f"[{request_id}] Yandex call failed: {e}")
-        raise HTTPException(status_code=502, detail=f"Yandex AI Studio error: {str(e)}")
-
-    yandex_ms = int((time.monotonic() - t_start) * 1000)
-    log.info(f"[{request_id}] Yandex response received yandex_ms={yandex_ms} raw_len={len(raw)}")
-
-    # Try to extract JSON from response — handles both array and batch-object formats
-    def _extract_json(text: str) -> Optional[list]:
-        text = text.strip()
-        # Strip markdown code fences if present
-        for fence in ("```json", "```"):
-            if text.startswith(fence):
-                text = text[len(fence):]
-        if text.endswith("```"):
-            text = text[:-3]
-        text = text.strip()
-        data = None
-        try:
-            data = json.loads(text)
-        except json.JSONDecodeError:
-            # Try to find object/array boundaries
-            for start_char, end_char in (("[", "]"), ("{", "}")):
-                start = text.find(start_char)
-                end = text.rfind(end_char)
-                if start != -1 and end != -1 and end > start:
-                    try:
-                        data = json.loads(text[start:end + 1])
-                        break
-                    except Exception:
-                        pass
-        if data is None:
-            return None
-        # Unwrap any known wrapper dict formats:
-        # {"batch": {"steps": [...]}}, {"questions": [...]}, {"steps": [...]}, etc.
-        if isinstance(data, dict):
-            for key in ("batch", "questions", "steps", "data", "result", "items"):
-                val = data.get(key)
-                if isinstance(val, list):
-                    return val
-                if isinstance(val, dict):
-                    for inner_key in ("steps", "questions", "items"):
-                        inner = val.get(inner_key)
-                        if isinstance(inner, list):
-                            return inner
-            return None
-        if isinstance(data, list):
-            return data
-        return None
-
-    _QUIZ_TYPES = {"mcq", "quiz", "multiple_choice", "test"}
-    _OPEN_TYPES = {"open", "open_ended", "open-ended", "essay", "short_answer"}
-    _ROLEPLAY_TYPES = {"roleplay", "role_play", "scenario"}
-
-    def _first_non_empty(*values: object) -> str:
-        """Return the first truthy stripped string from values."""
-        for v in values:
-            if isinstance(v, str) and v.strip():
-                return v.strip()
-        return ""
-
-    def _normalize_step(step: dict, idx: int) -> Optional[dict]:
-        """Convert Yandex batch step format to _Question-compatible dict."""
-        step_type = (step.get("type") or "").lower().strip()
-        item: dict = {
-            "id": str(uuid.uuid4()),
-            "tag": step.get("tag", ""),
-        }
-
-        if step_type in _QUIZ_TYPES:
-            item["type"] = "quiz"
-            item["prompt"] = _first_non_empty(
-                step.get("question"), step.get("prompt"), step.get("text"), step.get("задание"),
-            )
-            opts = list(
-                step.get("options") or step.get("answers") or
-                step.get("choices") or step.get("варианты") or []
-            )
-            while len(opts) < 4:
-                opts.append("")
-            item["quizOptions"] = [str(o).strip() for o in opts[:4]]
-            # Accept multiple key names for correct index
-            ci = (
-                step.get("correct_index") if step.get("correct_index") is not None
-                else step.get("correctIndex") if step.get("correctIndex") is not None
-                else step.get("correct_answer_index") if step.get("correct_answer_index") is not None
-                else step.get("right_index") if step.get("right_index") is not None
-                else 0
-            )
-            try:
-                ci = int(ci)
-            except (TypeError, ValueError):
-                ci = 0
-            item["correctIndex"] = ci if 0 <= ci <= 3 else 0
-            item["expectedAnswer"] = _first_non_empty(
-                step.get("explanation"), step.get("объяснение"),
-            )
-
-        elif step_type in _OPEN_TYPES:
-            item["type"] = "open"
-            item["prompt"] = _first_non_empty(
-                step.get("prompt"), step.get("question"), step.get("text"), step.get("задание"),
-            )
-            rubric = step.get("rubric", [])
-            item["expectedAnswer"] = _first_non_empty(
-                step.get("sample_good_answer"), step.get("expectedAnswer"),
-                step.get("answer"), step.get("ответ"),
-                "; ".join(rubric) if isinstance(rubric, list) and rubric else "",
-            )
-
-        elif step_type in _ROLEPLAY_TYPES:
-            item["type"] = "open"
-            item["prompt"] = _first_non_empty(
-                step.get("scenario"), step.get("task"), step.get("prompt"),
-            )
-            item["expectedAnswer"] = _first_non_empty(
-                step.get("ideal_answer"), step.get("answer"),
-            )
-
-        else:
-            # Heuristic fallback: detect type from available keys
-            has_options = bool(step.get("options") or step.get("answers") or step.get("choices"))
-            has_text = bool(step.get("question") or step.get("prompt") or step.get("text"))
-            if has_options:
-                item["type"] = "quiz"
-                item["prompt"] = _first_non_empty(
-                    step.get("question"), step.get("prompt"), step.get("text"),
-                )
-                opts = list(step.get("options") or step.get("answers") or step.get("choices") or [])
-                while len(opts) < 4:
-                    opts.append("")
-                item["quizOptions"] = [str(o).strip() for o in opts[:4]]
-                ci = step.get("correct_index", step.get("correctIndex", 0))
-                try:
-                    ci = int(ci)
-                except (TypeError, ValueError):
-                    ci = 0
-                item["correctIndex"] = ci if 0 <= ci <= 3 else 0
-                item["expectedAnswer"] = _first_non_empty(step.get("explanation"))
-            elif has_text:
-                item["type"] = "open"
-                item["prompt"] = _first_non_empty(
-                    step.get("question"), step.get("prompt"), step.get("text"),
-                )
-                item["expectedAnswer"] = _first_non_empty(
-                    step.get("answer"), step.get("sample_good_answer"),
-                )
-            else:
-                return None
-
-        # Validate: skip items with empty prompt
-        if not item.get("prompt", "").strip():
-            return None
-
-        # Validate quiz: must have at least 2 non-empty options
-        if item.get("type") == "quiz":
-            opts = list(item.get("quizOptions") or [])
-            non_empty = [o for o in opts if str(o).strip()]
-            if len(non_empty) < 2:
-                return None
-            while len(opts) < 4:
-                opts.append("")
-            item["quizOptions"] = opts[:4]
-
-        return item
-
-    _ALL_KNOWN_TYPES = _QUIZ_TYPES | _OPEN_TYPES | _ROLEPLAY_TYPES
-
-    def _normalize_and_validate(parsed_list: list) -> list:
-        """Normalize Yandex steps and validate with Pydantic. Returns validated dicts."""
-        # Normalize steps if they have a "type" field (Yandex batch format)
-        normalized = []
-        if parsed_list and isinstance(parsed_list[0], dict):
-            first_type = (parsed_list[0].get("type") or "").lower().strip()
-            # Always attempt normalization if items look like Yandex step dicts
-            needs_normalize = (
-                first_type in _ALL_KNOWN_TYPES
-                or any(k in parsed_list[0] for k in ("question", "options", "answers", "choices"))
-            )
-            if needs_normalize:
-                normalized = [n for i, s in enumerate(parsed_list)
-                              if isinstance(s, dict) and (n := _normalize_step(s, i)) is not None]
-            else:
-                normalized = parsed_list
-        else:
-            normalized = parsed_list
-
-        # Validate each question with Pydantic; skip invalid items
-        validated = []
-        for item in normalized:
-            if not isinstance(item, dict):
-                continue
-            if "id" not in item or not item["id"]:
-                item["id"] = str(uuid.uuid4())
-            if item.get("type") == "quiz":
-                opts = list(item.get("quizOptions") or [])
-                while len(opts) < 4:
-                    opts.append("")
-                item["quizOptions"] = opts[:4]
-                if item.get("correctIndex") is None:
-                    item["correctIndex"] = 0
-            try:
-                q = _Question(**item)
-                validated.append(q.model_dump())
-            except Exception as e:
-                log.warning(f"[{request_id}] Skipping invalid question: {e} | item={item}")
-        return validated
-
-    # ── Parse + validate with retry ──────────────────────────────────────────
-    MAX_ATTEMPTS = 2
-    validated_questions: list = []
-
-    for attempt in range(MAX_ATTEMPTS):
-        if attempt > 0:
-            log.warning(f"[{request_id}] Attempt {attempt+1}: retrying Yandex call (prev had {len(validated_questions)} valid Qs)")
-            try:
-                raw = _call_yandex(prompt_variables)
-            except Exception as e:
-                log.error(f"[{request_id}] Retry Yandex call failed: {e}")
-                break
-
-        parsed = _extract_json(raw)
-
-        # Retry JSON parse once within same attempt
-        if parsed is None and attempt == 0:
-            log.warning(f"[{request_id}] JSON parse failed, retrying Yandex call")
-            try:
-                raw = _call_yandex(prompt_variables)
-                parsed = _extract_json(raw)
-            except Exception as e:
-                log.error(f"[{request_id}] Retry failed: {e}")
-
-        if parsed is None or not isinstance(parsed, list):
-            if attempt < MAX_ATTEMPTS - 1:
-                continue
-            log.error(f"[{request_id}] Could not parse Yandex response as JSON array. raw={raw[:500]}")
-            raise HTTPException(
-                status_code=502,
-                detail="Не удалось разобрать ответ Yandex AI Studio как JSON. Попробуйте ещё раз.",
-            )
-
-        validated_questions = _normalize_and_validate(parsed)
-        if validated_questions:
-            break  # Success
-
-    quiz_count = sum(1 for q in validated_questions if q.get("type") == "quiz")
-    open_count = sum(1 for q in validated_questions if q.get("type") == "open")
-
-    log.info(
-        f"[{request_id}] extracted_text_length={len(body.extractedText)} "
-        f"questions_total={len(validated_questions)} "
-        f"quiz_count={quiz_count} open_count={open_count} yandex_ms={yandex_ms}"
-    )
-
-    if not validated_questions:
-        log.error(f"[{request_id}] No valid questions after {MAX_ATTEMPTS} attempts. raw={raw[:500]}")
-        raise HTTPException(
-            status_code=502,
-            detail="Yandex AI Studio вернул вопросы в неожиданном формате. Попробуйте ещё раз.",
-        )
-
-    return {"ok": True, "questions": validated_questions, "questionsCount": len(validated_questions)}
-
-
-# ─── C) POST /api/courses/finalize ───────────────────────────────────────────
-
-@app.post("/api/courses/finalize")
-async def finalize_course(
-    body: _FinalizeRequest,
-    user: dict = Depends(get_current_user),
-):
-    """
-    Save final course manifest with questions, generate invite code,
-    write code index for employee lookup.
-    """
-    import json
-    import random
-    import string
-    import uuid
-    from datetime import datetime, timezone
-    from api._lib.supabase_admin import get_admin_client
-
-    log = get_logger(__name__)
-    request_id = str(uuid.uuid4())[:8]
-    user_id = user["id"]
-    course_id = body.draftCourseId
-
-    log.info(
-        f"[{request_id}] POST /api/courses/finalize - userId={user_id} "
-        f"courseId={course_id} questions={len(body.questions)}"
-    )
-
-    # Reject empty questions list
-    if not body.questions:
-        raise HTTPException(
-            status_code=400,
-            detail="Нельзя сохранить курс без вопросов. Сгенерируйте или добавьте вопросы вручную.",
-        )
-
-    # Reject questions with empty prompt text
-    invalid_indices = [i for i, q in enumerate(body.questions) if not q.prompt.strip()]
-    if invalid_indices:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Вопрос(ы) #{', '.join(str(i + 1) for i in invalid_indices)} не имеют текста.",
-        )
-
-    supabase = get_admin_client()
-
-    def _generate_invite_code(length: int = 6) -> str:
-        chars = string.ascii_uppercase + string.digits
-        return "".join(random.choices(chars, k=length))
-
-    invite_code = _generate_invite_code()
-
-    # Build final manifest
-    quiz_count = sum(1 for q in body.questions if q.type == _QuestionType.quiz)
-    open_count = sum(1 for q in body.questions if q.type == _QuestionType.open)
-
-    manifest = {
-        "courseId": course_id,
-        "title": body.title,
-        "size": body.size,
-        "createdAt": datetime.now(timezone.utc).isoformat(),
-        "overallStatus": "ready",
-        "textBytes": 0,
-        "inviteCode": invite_code,
-        "employeesCount": 0,
-        "files": [f.model_dump() for f in body.uploadedFiles],
-        "questions": [q.model_dump() for q in body.questions],
-        "quizCount": quiz_count,
-        "openCount": open_count,
-    }
-
-    # Try to get textBytes from existing draft_manifest
-    try:
-        draft_bytes = supabase.storage.from_(COURSES_BUCKET).download(
-            f"{user_id}/{course_id}/draft_manifest.json"
-        )
-        draft_data = json.loads(draft_bytes.decode("utf-8"))
-        # Carry over any useful fields
-    except Exception:
-        pass
-
-    manifest_path = f"{user_id}/{course_id}/manifest.json"
-    try:
-        supabase.storage.from_(COURSES_BUCKET).upload(
-            manifest_path,
-            json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8"),
-            {"content-type": "application/json", "upsert": "true"},
-        )
-    except Exception as e:
-        log.error(f"[{request_id}] Failed to save manifest: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to save manifest: {str(e)}")
-
-    # Save code index for employee lookup: _index/{inviteCode}.json
-    index_data = {"userId": user_id, "courseId": course_id}
-    try:
-        supabase.storage.from_(COURSES_BUCKET).upload(
-            f"_index/{invite_code}.json",
-            json.dumps(index_data).encode("utf-8"),
-            {"content-type": "application/json", "upsert": "true"},
-        )
-    except Exception as e:
-        log.warning(f"[{request_id}] Could not save code index: {e}")
-
-    log.info(
-        f"[{request_id}] Course finalized - courseId={course_id} "
-        f"inviteCode={invite_code} questions={len(body.questions)}"
-    )
-
-    return {"ok": True, "courseId": course_id, "courseCode": invite_code}
-
-
-# ─── D) GET /api/courses/by-code/{code} ──────────────────────────────────────
-
-@app.get("/api/courses/by-code/{code}")
-async def get_course_by_code(code: str):
-    """
-    Public endpoint: resolve invite code → return full course manifest.
-    Used by employees to access a course without knowing courseId.
-    """
-    import json
-    from api._lib.supabase_admin import get_admin_client
-
-    log = get_logger(__name__)
-
-    supabase = get_admin_client()
-
-    # Lookup index file
-    index_path = f"_index/{code.upper()}.json"
-    try:
-        index_bytes = supabase.storage.from_(COURSES_BUCKET).download(index_path)
-        index_data = json.loads(index_bytes.decode("utf-8"))
-    except Exception:
-        raise HTTPException(status_code=404, detail="Курс с таким кодом не найден")
-
-    user_id = index_data.get("userId")
-    course_id = index_data.get("courseId")
-    if not user_id or not course_id:
-        raise HTTPException(status_code=404, detail="Курс с таким кодом не найден")
+# Opt-in cProfile of single requests → X-Profile-Id (api/_lib/profiling.py)
+app.add_middleware(ProfilerMiddleware)
 
-    manifest_path = f"{user_id}/{course_id}/manifest.json"
-    try:
-        manifest_bytes = supabase.storage.from_(COURSES_BUCKET).download(manifest_path)
-        manifest = json.loads(manifest_bytes.decode("utf-8"))
-    except Exception as e:
-        log.error(f"Could not read manifest for code {code}: {e}")
-        raise HTTPException(status_code=404, detail="Курс не найден")
+# Per-request spans → Server-Timing header + summary log line (api/_lib/timing.py)
+app.add_middleware(ServerTimingMiddleware)
 
-    return {"ok": True, "manifest": manifest}
+# Request counts / latency histograms for GET /api/metrics (api/_lib/metrics.py)
+app.add_middleware(MetricsMiddleware)
 
+# Outermost: request id for every log record of the request (api/_lib/logger.py)
+app.add_middleware(RequestContextMiddleware)
 
-# ─── E) GET /api/yandex/health ───────────────────────────────────────────────
 
-@app.get("/api/yandex/health")
-async def yandex_health():
-    """Check if Yandex AI Studio credentials are configured (does not call the model)."""
-    return {
-        "ok": True,
-        "api_key_set": bool(settings.yandex_api_key),
-        "prompt_id": settings.yandex_prompt_id or None,
-        "project_id": settings.yandex_project_id or None,
-        "ready": bool(settings.yandex_api_key and settings.yandex_prompt_id),
-    }
+# Routers (include order is route-match order)
+app.include_router(health.router)
+app.include_router(profile.router)
+app.include_router(demo.router)
+app.include_router(courses.router)
+app.include_router(training.router)
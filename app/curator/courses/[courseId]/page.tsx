@@ -16,8 +16,9 @@ import {
   AlertCircle,
   CheckCircle2,
   Calendar,
+  Trash2,
 } from 'lucide-react';
-import { CourseManifest, CourseManifestFile, Question } from '@/lib/types';
+import { CourseFileLink, CourseManifest, CourseManifestFile, Question } from '@/lib/types';
 import { apiFetch, safeJson } from '@/lib/api';
 import { cn } from '@/lib/utils';
 import { Skeleton } from '@/components/ui/skeleton';
@@ -88,6 +89,7 @@ export default function CourseDetailPage() {
   const [error, setError] = useState('');
   const [activeTab, setActiveTab] = useState<Tab>('training');
   const [codeCopied, setCodeCopied] = useState(false);
+  const [deleting, setDeleting] = useState(false);
 
   useEffect(() => {
     if (!courseId) return;
@@ -110,6 +112,18 @@ export default function CourseDetailPage() {
     });
   };
 
+  const handleDelete = async () => {
+    if (!window.confirm('Удалить курс вместе с материалами? Это действие нельзя отменить.')) return;
+    setDeleting(true);
+    try {
+      await safeJson(await apiFetch(`/api/courses/${courseId}`, { method: 'DELETE' }));
+      router.push('/curator/courses');
+    } catch (e: unknown) {
+      window.alert(e instanceof Error ? e.message : 'Не удалось удалить курс');
+      setDeleting(false);
+    }
+  };
+
   // ── Loading ──────────────────────────────────────────────────────────────
   if (loading) {
     return (
@@ -192,15 +206,25 @@ export default function CourseDetailPage() {
             </div>
           </div>
 
-          {/* Invite code */}
-          <button
-            onClick={copyCode}
-            className="flex items-center gap-2 rounded-xl border border-gray-200 bg-gray-50 px-3.5 py-2 text-[12px] font-mono text-gray-600 hover:bg-lime/10 hover:border-lime/30 hover:text-[#0B0B0F] transition-colors shadow-sm shrink-0"
-            title="Скопировать код для сотрудников"
-          >
-            <Copy size={12} />
-            {codeCopied ? 'Скопировано!' : manifest.inviteCode}
-          </button>
+          <div className="flex flex-col items-end gap-2 shrink-0">
+            {/* Invite code */}
+            <button
+              onClick={copyCode}
+              className="flex items-center gap-2 rounded-xl border border-gray-200 bg-gray-50 px-3.5 py-2 text-[12px] font-mono text-gray-600 hover:bg-lime/10 hover:border-lime/30 hover:text-[#0B0B0F] transition-colors shadow-sm"
+              title="Скопировать код для сотрудников"
+            >
+              <Copy size={12} />
+              {codeCopied ? 'Скопировано!' : manifest.inviteCode}
+            </button>
+            <button
+              onClick={handleDelete}
+              disabled={deleting}
+              className="inline-flex items-center gap-1.5 text-[12px] text-gray-400 hover:text-red-500 transition-colors disabled:opacity-50"
+            >
+              {deleting ? <Loader2 size={12} className="animate-spin" /> : <Trash2 size={12} />}
+              Удалить курс
+            </button>
+          </div>
         </div>
       </div>
 
@@ -389,18 +413,37 @@ function MaterialsTab({
 }) {
   const [downloading, setDownloading] = useState<string | null>(null);
   const [downloadError, setDownloadError] = useState<string | null>(null);
+  const [links, setLinks] = useState<Record<string, CourseFileLink>>({});
+  const [exporting, setExporting] = useState(false);
+
+  // All download links in one request; refetched when a link is about to expire
+  const fetchLinks = async (): Promise<Record<string, CourseFileLink>> => {
+    const res = await apiFetch(`/api/courses/${courseId}/files/urls`);
+    const data = await safeJson<{ ok: boolean; files: CourseFileLink[]; detail?: string }>(res);
+    if (!data.ok) throw new Error(data.detail ?? 'Не удалось получить ссылки');
+    const next = Object.fromEntries(data.files.map((l) => [l.fileId, l]));
+    setLinks(next);
+    return next;
+  };
+
+  useEffect(() => {
+    if (files.some((f) => f.fileId)) fetchLinks().catch(() => {});
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [courseId]);
 
   const handleDownload = async (file: CourseManifestFile) => {
     if (!file.fileId) return;
     setDownloading(file.fileId);
     setDownloadError(null);
     try {
-      const res = await apiFetch(`/api/courses/${courseId}/files/${file.fileId}/download`);
-      const data = await safeJson<{ ok: boolean; url: string; fileName: string; detail?: string }>(res);
-      if (!data.ok) throw new Error(data.detail ?? 'Не удалось получить ссылку');
+      let link: CourseFileLink | undefined = links[file.fileId];
+      if (!link || link.expiresAt * 1000 - Date.now() < 15_000) {
+        link = (await fetchLinks())[file.fileId];
+      }
+      if (!link) throw new Error('Не удалось получить ссылку');
       const a = document.createElement('a');
-      a.href = data.url;
-      a.download = data.fileName ?? file.name;
+      a.href = link.url;
+      a.download = link.fileName ?? file.name;
       a.target = '_blank';
       document.body.appendChild(a);
       a.click();
@@ -412,6 +455,28 @@ function MaterialsTab({
     }
   };
 
+  // Whole course as one ZIP, streamed by the API (files, parsed text, manifest)
+  const handleExport = async () => {
+    setExporting(true);
+    setDownloadError(null);
+    try {
+      const res = await apiFetch(`/api/courses/${courseId}/export`);
+      if (!res.ok) await safeJson(res);
+      const url = URL.createObjectURL(await res.blob());
+      const a = document.createElement('a');
+      a.href = url;
+      a.download = `course-${courseId}.zip`;
+      document.body.appendChild(a);
+      a.click();
+      document.body.removeChild(a);
+      URL.revokeObjectURL(url);
+    } catch (e: unknown) {
+      setDownloadError(e instanceof Error ? e.message : 'Ошибка экспорта');
+    } finally {
+      setExporting(false);
+    }
+  };
+
   if (files.length === 0) {
     return (
       <TabEmptyState
@@ -432,10 +497,23 @@ function MaterialsTab({
         </div>
       )}
 
-      <div className="px-5 py-3.5 border-b border-gray-50">
+      <div className="flex items-center justify-between px-5 py-3.5 border-b border-gray-50">
         <h2 className="text-[13px] font-semibold text-gray-700">
           Файлы курса <span className="text-gray-400 font-normal">({files.length})</span>
         </h2>
+        <button
+          onClick={handleExport}
+          disabled={exporting}
+          className={cn(
+            'flex items-center gap-1.5 rounded-lg px-3 py-1.5 text-[12px] font-medium transition-colors',
+            exporting
+              ? 'bg-gray-100 text-gray-400 cursor-not-allowed'
+              : 'bg-gray-50 text-gray-600 border border-gray-200 hover:bg-lime/10 hover:border-lime/30 hover:text-[#0B0B0F]'
+          )}
+        >
+          {exporting ? <Loader2 size={12} className="animate-spin" /> : <Download size={12} />}
+          Скачать всё (ZIP)
+        </button>
       </div>
 
       <ul className="divide-y divide-gray-50">
@@ -1100,10 +1100,11 @@ export function CreateCourseWizard({ open, onClose, onSuccess, userId }: Props)
       return;
     }
 
-    // ── Step 1: Call /api/courses/process to parse files + get extractedText ─
+    // ── Step 1: Call /api/courses/process to parse files (text stays server-side)
     setLoadingStep(1);
 
-    let extractedText = '';
+    let extractedPreview = '';
+    let extractedStats: DraftPayload['extractedStats'] = { chars: 0, filesCount: 0, truncated: false };
     try {
       const res = await apiFetch('/api/courses/process', {
         method: 'POST',
@@ -1117,10 +1118,11 @@ export function CreateCourseWizard({ open, onClose, onSuccess, userId }: Props)
       });
       const data = await safeJson<{
         ok: boolean; manifest: CourseManifest;
-        extractedText?: string; extractedStats?: { chars: number; filesCount: number; truncated: boolean };
+        extractedPreview?: string; extractedStats?: DraftPayload['extractedStats'];
       }>(res);
       if (!data.ok) throw new Error('Ошибка парсинга файлов');
-      extractedText = data.extractedText ?? '';
+      extractedPreview = data.extractedPreview ?? '';
+      extractedStats = data.extractedStats ?? extractedStats;
     } catch (err: unknown) {
       const msg = err instanceof Error ? err.message : String(err);
       setError(msg);
@@ -1128,7 +1130,7 @@ export function CreateCourseWizard({ open, onClose, onSuccess, userId }: Props)
       return;
     }
 
-    if (!extractedText || extractedText.trim().length < 100) {
+    if (extractedStats.chars < 100) {
       setError('Не удалось извлечь достаточно текста из загруженных файлов. Возможно, PDF — скан. Загрузите текстовый PDF, DOCX или TXT.');
       setPhase('form');
       return;
@@ -1140,8 +1142,8 @@ export function CreateCourseWizard({ open, onClose, onSuccess, userId }: Props)
       uploadedFiles: uploadedFiles.map(f => ({
         path: f.name, storagePath: f.storagePath, originalName: f.originalName, mime: f.mimeType, size: f.size,
       })),
-      extractedText,
-      extractedStats: { chars: extractedText.length, filesCount: uploadedFiles.length, truncated: false },
+      extractedPreview,
+      extractedStats,
     };
     setDraft(draftPayload);
 
@@ -1155,7 +1157,6 @@ export function CreateCourseWizard({ open, onClose, onSuccess, userId }: Props)
           draftCourseId: courseId,
           title: title.trim(),
           size: courseSize,
-          extractedText,
         }),
       });
       const data = await safeJson<{ ok: boolean; questions: Question[] }>(res);
@@ -1223,7 +1224,6 @@ export function CreateCourseWizard({ open, onClose, onSuccess, userId }: Props)
           draftCourseId: draft.draftCourseId,
           title: title.trim(),
           size: courseSize,
-          extractedText: draft.extractedText,
         }),
       });
       const data = await safeJson<{ ok: boolean; questions: Question[] }>(res);
@@ -17,10 +17,19 @@ export interface CourseManifestFile {
   name: string;          // original file name
   type: string;          // MIME type
   size: number;          // bytes
-  storagePath: string;   // path in bucket: {userId}/{courseId}/files/{fileId}
+  storagePath: string;   // path in bucket: {userId}/{courseId}/files/{fileId}, or _blobs/… with BLOB_STORE
   parseStatus: FileParseStatus;
   parsedPath?: string;   // path in bucket: {userId}/{courseId}/parsed/{fileId}.txt
   parseError?: string;
+  sha256?: string;       // content hash when the file is stored content-addressed
+}
+
+/** Signed download URL from GET /api/courses/{courseId}/files/urls */
+export interface CourseFileLink {
+  fileId: string;
+  fileName: string;
+  url: string;
+  expiresAt: number;     // epoch seconds
 }
 
 // ─── Training / Questions ─────────────────────────────────────────────────────
@@ -61,12 +70,13 @@ export interface DraftUploadedFile {
   originalName: string;
   mime: string;
   size: number;
+  sha256?: string;
 }
 
 export interface DraftPayload {
   draftCourseId: string;
   uploadedFiles: DraftUploadedFile[];
-  extractedText: string;
+  extractedPreview: string;  // first chars only; the full text stays server-side
   extractedStats: { chars: number; filesCount: number; truncated: boolean };
 }
 
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark for POST /api/training/generate against the local
+Yandex stand-in (scripts/yandex_standin.py). No Yandex quota is used.
+
+By default the FastAPI app is driven in-process (httpx ASGI transport) with
+auth short-circuited, and a stand-in is started on a random port:
+
+    python scripts/bench_generate.py --requests 50 --concurrency 8 \\
+        --latency lognormal:1500,0.4 --malformed-rate 0.1 --truncation-rate 0.05
+
+To drive a running deployment instead, pass --url and --token; the server
+must have YANDEX_BASE_URL pointing at a stand-in given by --standin-url.
+
+Reports latency percentiles, status codes, Yandex retries (stand-in calls
+beyond one per request) and the valid-question yield (questions returned /
+questions requested by the size quota).
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+from typing import List, Optional
+
+from benchlib import latency_summary, print_table, sample_course_text
+from yandex_standin import StandinConfig, StandinServer
+
+SIZE_QUOTAS = {"small": (8, 12), "medium": (12, 18), "large": (18, 30)}
+
+
+def expected_questions(size: str) -> int:
+    """Question count requested from the model for a course size (mirrors generate_training)."""
+    n_min, n_max = SIZE_QUOTAS.get(size, (12, 18))
+    return round((n_min + n_max) / 2 * 0.7) + round((n_min + n_max) / 2 * 0.3)
+
+
+async def _run(args: argparse.Namespace) -> None:
+    import httpx
+
+    standin: Optional[StandinServer] = None
+    if args.url:
+        base_url = args.url.rstrip("/")
+        transport = None
+        headers = {"Authorization": f"Bearer {args.token}"}
+        standin_url = args.standin_url
+    else:
+        standin = StandinServer(StandinConfig(
+            args.latency, args.malformed_rate, args.truncation_rate, args.seed,
+        )).start()
+        standin_url = standin.base_url
+
+        from api._lib.auth import get_current_user
+        from api._lib.settings import settings
+        from api.index import app
+
+        settings.yandex_api_key = settings.yandex_api_key or "standin"
+        settings.yandex_prompt_id = settings.yandex_prompt_id or "standin"
+        settings.yandex_base_url = standin.base_url
+        app.dependency_overrides[get_current_user] = lambda: {
+            "id": "00000000-0000-0000-0000-00000000bench",
+            "email": "bench@example.com",
+            "user_metadata": {},
+        }
+        base_url = "http://bench"
+        transport = httpx.ASGITransport(app=app)
+        headers = {}
+
+    # No draft exists here, so send the text inline (the route still accepts
+    # it) instead of having generate read parsed/combined.txt
+    text = sample_course_text(args.text_chars)
+    payload = {
+        "draftCourseId": "bench-draft",
+        "title": "Бенчмарк курса",
+        "size": args.size,
+        "extractedText": text,
+    }
+
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    yields: List[float] = []
+    expected = expected_questions(args.size)
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(args.requests):
+        queue.put_nowait(i)
+
+    async def worker(client: "httpx.AsyncClient") -> None:
+        while True:
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            t0 = time.perf_counter()
+            try:
+                resp = await client.post("/api/training/generate", json=payload, headers=headers)
+                status = resp.status_code
+                body = resp.json() if status == 200 else {}
+            except httpx.HTTPError as e:
+                status, body = f"error:{type(e).__name__}", {}
+            latencies.append((time.perf_counter() - t0) * 1000)
+            statuses[status] += 1
+            yields.append(min(body.get("questionsCount", 0) / expected, 1.0) if expected else 0.0)
+
+    calls_before = _standin_calls(standin, standin_url)
+    t_start = time.perf_counter()
+    async with httpx.AsyncClient(base_url=base_url, transport=transport, timeout=args.timeout) as client:
+        await asyncio.gather(*(worker(client) for _ in range(args.concurrency)))
+    wall_s = time.perf_counter() - t_start
+    calls = _standin_calls(standin, standin_url) - calls_before
+
+    summary = latency_summary(latencies)
+    print(f"\n/api/training/generate  requests={args.requests} concurrency={args.concurrency} "
+          f"size={args.size} text_chars={len(text)}")
+    print_table(
+        ["metric", "value"],
+        [
+            ["wall_s", round(wall_s, 2)],
+            ["throughput_rps", round(args.requests / wall_s, 2) if wall_s else 0],
+            ["p50_ms", summary["p50"]],
+            ["p95_ms", summary["p95"]],
+            ["p99_ms", summary["p99"]],
+            ["max_ms", summary["max"]],
+            ["statuses", dict(statuses)],
+            ["yandex_calls", calls if calls >= 0 else "n/a"],
+            ["retries", max(calls - args.requests, 0) if calls >= 0 else "n/a"],
+            ["valid_question_yield", round(sum(yields) / len(yields), 3) if yields else 0],
+        ],
+    )
+    if standin is not None:
+        print(f"stand-in: {standin.stats.snapshot()}")
+        standin.stop()
+
+
+def _standin_calls(standin: Optional[StandinServer], standin_url: Optional[str]) -> int:
+    """Total calls seen by the stand-in, or -1 when it cannot be queried."""
+    if standin is not None:
+        return standin.stats.snapshot()["calls"]
+    if not standin_url:
+        return -1
+    import urllib.request
+
+    try:
+        with urllib.request.urlopen(f"{standin_url.rstrip('/')}/stats", timeout=5) as resp:
+            return int(json.loads(resp.read())["calls"])
+    except Exception:
+        return -1
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark /api/training/generate offline")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--size", default="medium", choices=sorted(SIZE_QUOTAS))
+    parser.add_argument("--text-chars", type=int, default=40_000)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--latency", default="lognormal:1500,0.4")
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--truncation-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--url", help="drive a running server instead of the in-process app")
+    parser.add_argument("--token", default="", help="bearer token for --url")
+    parser.add_argument("--standin-url", help="stand-in base URL used by the --url server (for retry counts)")
+    args = parser.parse_args()
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
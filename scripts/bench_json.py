@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Benchmark response and manifest serialization (api/_lib/jsonio.py) against
+the previous path on representative payloads:
+
+- GET /api/courses/list with 50 manifests
+- GET /api/courses/by-code/{code}: one manifest with questions
+- a ~100k-char text field (what draft/process used to return as extractedText)
+- POST /api/training/generate: _Question models
+- POST /api/courses/process: a CourseManifest model
+
+"before" is what FastAPI did for a plain dict return (model_dump() where
+the route used to call it, jsonable_encoder, stdlib JSONResponse); "after"
+is json_response() with each available backend. Also prints stored
+manifest sizes (the old indent=2 encoding vs compact):
+
+    python scripts/bench_json.py --repeat 200
+"""
+import argparse
+import importlib.util
+import json
+import statistics
+import time
+import uuid
+from typing import Any, Callable, Dict, List
+
+from benchlib import print_table, sample_course_text
+
+from api._lib import jsonio
+from api._routers.courses import CourseManifest
+from api._routers.training import _Question
+
+
+def make_manifest(n: int, questions: int = 0) -> Dict[str, Any]:
+    manifest = CourseManifest(
+        courseId=str(uuid.UUID(int=n)),
+        title=f"Курс по стандартам обслуживания №{n}",
+        size="medium",
+        createdAt="2026-01-15T10:00:00+00:00",
+        overallStatus="ready",
+        textBytes=120_000 + n,
+        inviteCode=f"AB{n:04d}",
+        files=[{
+            "fileId": f"{uuid.UUID(int=n * 10 + i).hex}.pdf",
+            "name": f"Регламент {i}.pdf",
+            "type": "application/pdf",
+            "size": 1_500_000,
+            "storagePath": f"user/{n}/{i}.pdf",
+            "parseStatus": "parsed",
+            "parsedPath": f"user/{n}/parsed/{i}.txt",
+        } for i in range(3)],
+    ).model_dump()
+    if questions:
+        manifest["questions"] = [q.model_dump() for q in make_questions(questions)]
+        manifest["quizCount"] = manifest["openCount"] = questions // 2
+    return manifest
+
+
+def make_questions(n: int) -> List[_Question]:
+    questions = []
+    for i in range(n):
+        if i % 2:
+            questions.append(_Question(id=str(uuid.UUID(int=i)), type="open",
+                                       prompt=f"Опишите порядок действий при возврате товара, случай {i}."))
+        else:
+            questions.append(_Question(
+                id=str(uuid.UUID(int=i)), type="quiz",
+                prompt=f"Какой срок гарантии на товар категории {i}?",
+                quizOptions=["14 дней", "30 дней", "6 месяцев", "1 год"], correctIndex=2,
+            ))
+    return questions
+
+
+def build_cases(text_chars: int) -> List[Dict[str, Any]]:
+    """(name, payload for the old path, payload for the new path)."""
+    manifests = [make_manifest(n) for n in range(50)]
+    by_code = make_manifest(1, questions=30)
+    text = sample_course_text(text_chars)
+    draft = {
+        "ok": True,
+        "draftCourseId": str(uuid.UUID(int=7)),
+        "uploadedFiles": by_code["files"],
+        "extractedText": text,
+        "extractedStats": {"chars": len(text), "filesCount": 3, "truncated": False,
+                           "rawChars": len(text), "cleanupRatio": 1.0},
+    }
+    questions = make_questions(25)
+    model = CourseManifest(**make_manifest(3))
+    return [
+        {"name": "courses/list (50)", "old": {"ok": True, "courses": manifests},
+         "new": {"ok": True, "courses": manifests}},
+        {"name": "by-code (30 q)", "old": {"ok": True, "manifest": by_code},
+         "new": {"ok": True, "manifest": by_code}},
+        {"name": f"text ({len(text) // 1000}k chars)", "old": draft, "new": draft},
+        {"name": "generate (25 models)",
+         "old": {"ok": True, "questions": [q.model_dump() for q in questions], "questionsCount": 25},
+         "new": {"ok": True, "questions": questions, "questionsCount": 25}},
+        {"name": "process (manifest model)",
+         "old": {"ok": True, "manifest": model.model_dump()}, "new": {"ok": True, "manifest": model}},
+    ]
+
+
+def old_render(payload: Any) -> bytes:
+    from fastapi.encoders import jsonable_encoder
+    from starlette.responses import JSONResponse
+
+    return JSONResponse(jsonable_encoder(payload)).body
+
+
+def set_backend(name: str) -> None:
+    if name == "json":
+        jsonio._backend = None
+    else:
+        import orjson
+
+        jsonio._backend = orjson
+
+
+def timed(fn: Callable[[], Any], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+    return statistics.median(timings) * 1000
+
+
+def available_backends() -> List[str]:
+    if importlib.util.find_spec("orjson") is None:
+        return ["json"]
+    return ["orjson", "json"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--text-chars", type=int, default=100_000)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    backends = available_backends()
+    results: Dict[str, Dict[str, Any]] = {}
+    for case in build_cases(args.text_chars):
+        before = old_render(case["old"])
+        row: Dict[str, Any] = {"bytes_before": len(before),
+                               "before_ms": round(timed(lambda: old_render(case["old"]), args.repeat), 3)}
+        for backend in backends:
+            set_backend(backend)
+            after = jsonio.json_response(case["new"]).body
+            if json.loads(after) != json.loads(before):
+                raise SystemExit(f"{case['name']}: {backend} output differs from the old path")
+            row[f"{backend}_ms"] = round(timed(lambda: jsonio.json_response(case["new"]).body, args.repeat), 3)
+            row["bytes_after"] = len(after)
+        results[case["name"]] = row
+
+    manifest = make_manifest(1, questions=30)
+    sizes = {"indent=2": len(json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8"))}
+    for backend in backends:
+        set_backend(backend)
+        sizes[f"compact ({backend})"] = len(jsonio.dumps(manifest))
+
+    if args.json:
+        print(json.dumps({"responses": results, "manifest_bytes": sizes}, indent=2, ensure_ascii=False))
+        return
+
+    headers = ["payload", "bytes", "before ms"] + [f"{b} ms" for b in backends] + ["speedup"]
+    rows = []
+    for name, r in results.items():
+        best = min(r[f"{b}_ms"] for b in backends)
+        rows.append([name, r["bytes_after"], r["before_ms"]] + [r[f"{b}_ms"] for b in backends]
+                    + [f"{r['before_ms'] / best:.1f}x" if best else "-"])
+    print_table(headers, rows)
+    print("\nstored manifest (30 questions): " + ", ".join(f"{k} {v} B" for k, v in sizes.items()))
+
+
+if __name__ == "__main__":
+    main()
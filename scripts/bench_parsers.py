@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Benchmark the course file parsers (api/_lib/course_files.py) on a
+reproducible synthetic corpus. The corpus is generated in-process; no
+fixtures are committed.
+
+- PDF: 1..1000 pages of Latin text (hand-built PDF, Helvetica, no extra deps)
+- DOCX: long paragraph lists, with and without tables (python-docx)
+- TXT: the same Russian text encoded as UTF-8, UTF-16 and cp1251
+
+For every document it reports median parse time, throughput (MB/s, and
+pages/s for PDFs), peak Python memory during the parse (tracemalloc, a
+separate run), and extracted characters vs. source characters:
+
+    python scripts/bench_parsers.py --repeat 3
+    python scripts/bench_parsers.py --save-baseline scripts/baselines/parsers.json
+    python scripts/bench_parsers.py --baseline scripts/baselines/parsers.json --tolerance 0.2
+
+With --baseline, a case regresses when throughput drops or peak memory
+grows by more than --tolerance, or when the extracted character count
+changes; the script then exits non-zero. Record baselines on the machine
+you compare on.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+from benchlib import print_table, sample_course_text
+
+from api._lib.course_files import parse_docx_bytes, parse_pdf_pages, parse_txt_bytes
+
+LATIN_WORDS = (
+    "client manager order contract payment delivery warehouse return warranty "
+    "discount policy employee department quality service request supplier "
+    "process standard training document review report deadline price product"
+).split()
+
+
+def _latin_lines(n: int, rng: random.Random) -> List[str]:
+    return [
+        " ".join(rng.choice(LATIN_WORDS) for _ in range(rng.randint(8, 13))).capitalize() + "."
+        for _ in range(n)
+    ]
+
+
+def make_pdf(pages: int, seed: int = 7, lines_per_page: int = 45) -> Tuple[bytes, int]:
+    """A text PDF with `pages` pages; returns (bytes, source chars)."""
+    rng = random.Random(seed)
+    objects: List[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(b"")  # patched below once the page tree id is known
+    page_tree = add(b"")
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    page_ids = []
+    source_chars = 0
+    for number in range(1, pages + 1):
+        lines = [f"Section {number}"] + _latin_lines(lines_per_page, rng)
+        source_chars += sum(len(line) for line in lines)
+        ops = ["BT", "/F1 9 Tf", "11 TL", "40 800 Td"]
+        for line in lines:
+            escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            ops.append(f"({escaped}) Tj T*")
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1")
+        content = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (page_tree, font, content)
+        ))
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % page_tree
+    kids = b" ".join(b"%d 0 R" % i for i in page_ids)
+    objects[page_tree - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % i + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref)
+    return bytes(out), source_chars
+
+
+def make_docx(paragraphs: int, tables: int, seed: int = 7) -> Tuple[bytes, int]:
+    """A DOCX with a paragraph list and `tables` 10x5 tables; returns (bytes, source chars)."""
+    import io
+
+    from docx import Document
+
+    rng = random.Random(seed)
+    doc = Document()
+    source_chars = 0
+    text = sample_course_text(paragraphs * 120, seed=seed)
+    for block in text.split("\n"):
+        if block.strip():
+            doc.add_paragraph(block)
+            source_chars += len(block)
+    for _ in range(tables):
+        table = doc.add_table(rows=10, cols=5)
+        for row in table.rows:
+            for cell in row.cells:
+                cell.text = rng.choice(LATIN_WORDS)
+                source_chars += len(cell.text)
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue(), source_chars
+
+
+def make_txt(encoding: str, chars: int, seed: int = 7) -> Tuple[bytes, int, str]:
+    text = sample_course_text(chars, seed=seed)
+    return text.encode(encoding), len(text), text
+
+
+def build_corpus(args: argparse.Namespace) -> List[Dict]:
+    corpus: List[Dict] = []
+    for pages in args.pdf_pages:
+        data, chars = make_pdf(pages, args.seed)
+        corpus.append({"name": f"pdf-{pages}p", "kind": "pdf", "data": data, "chars": chars, "pages": pages})
+    for paragraphs, tables in ((200, 0), (args.docx_paragraphs, 0), (args.docx_paragraphs, 20)):
+        data, chars = make_docx(paragraphs, tables, args.seed)
+        name = f"docx-{paragraphs}par" + (f"-{tables}tbl" if tables else "")
+        corpus.append({"name": name, "kind": "docx", "data": data, "chars": chars})
+    for encoding in ("utf-8", "utf-16", "cp1251"):
+        data, chars, text = make_txt(encoding, args.txt_chars, args.seed)
+        corpus.append({"name": f"txt-{encoding}", "kind": "txt", "data": data, "chars": chars, "text": text})
+    return corpus
+
+
+PARSERS: Dict[str, Callable[[bytes], object]] = {
+    "pdf": parse_pdf_pages,
+    "docx": parse_docx_bytes,
+    "txt": parse_txt_bytes,
+}
+
+
+def _extracted_chars(result: object) -> int:
+    if isinstance(result, list):
+        return sum(len(page) for page in result)
+    return len(result)  # type: ignore[arg-type]
+
+
+def bench_case(case: Dict, repeat: int) -> Dict:
+    parser = PARSERS[case["kind"]]
+    timings = []
+    result: object = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = parser(case["data"])
+        timings.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    parser(case["data"])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    seconds = statistics.median(timings)
+    size_mb = len(case["data"]) / (1024 * 1024)
+    row = {
+        "kind": case["kind"],
+        "bytes": len(case["data"]),
+        "seconds": round(seconds, 4),
+        "mb_s": round(size_mb / seconds, 2) if seconds else 0.0,
+        "pages_s": round(case["pages"] / seconds, 1) if case.get("pages") and seconds else None,
+        "peak_mb": round(peak / (1024 * 1024), 2),
+        "source_chars": case["chars"],
+        "chars": _extracted_chars(result),
+    }
+    if "text" in case:
+        row["exact"] = result == case["text"]  # decoded back to the original text
+    return row
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    problems = []
+    for name, row in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if base["mb_s"] and row["mb_s"] < base["mb_s"] * (1 - tolerance):
+            problems.append(f"{name}: throughput {row['mb_s']} MB/s vs baseline {base['mb_s']}")
+        if base["peak_mb"] and row["peak_mb"] > base["peak_mb"] * (1 + tolerance):
+            problems.append(f"{name}: peak memory {row['peak_mb']} MB vs baseline {base['peak_mb']}")
+        if row["chars"] != base["chars"]:
+            problems.append(f"{name}: extracted {row['chars']} chars vs baseline {base['chars']}")
+    return problems
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--pdf-pages", type=_int_list, default=[1, 10, 100, 1000], help="comma-separated")
+    parser.add_argument("--docx-paragraphs", type=int, default=5000)
+    parser.add_argument("--txt-chars", type=int, default=2_000_000)
+    parser.add_argument("--only", choices=sorted(PARSERS), help="benchmark one parser kind")
+    parser.add_argument("--baseline", help="compare against this baseline JSON")
+    parser.add_argument("--save-baseline", help="write results to this baseline JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    corpus = [c for c in build_corpus(args) if not args.only or c["kind"] == args.only]
+    results = {case["name"]: bench_case(case, args.repeat) for case in corpus}
+
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    else:
+        rows = []
+        for name, r in results.items():
+            rows.append([
+                name, f"{r['bytes'] / 1024:.0f} KiB", f"{r['seconds'] * 1000:.1f}", r["mb_s"],
+                r["pages_s"] if r["pages_s"] is not None else "-", r["peak_mb"],
+                f"{r['chars']}/{r['source_chars']}", {True: "yes", False: "NO"}.get(r.get("exact"), "-"),
+            ])
+        print_table(["case", "size", "ms", "MB/s", "pages/s", "peak MB", "chars/source", "exact"], rows)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_baseline)), exist_ok=True)
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\nbaseline written to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            problems = compare(results, json.load(f), args.tolerance)
+        if problems:
+            print("\nREGRESSIONS:")
+            for problem in problems:
+                print(f"  {problem}")
+            raise SystemExit(1)
+        print(f"\nno regressions vs {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
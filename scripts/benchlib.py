@@ -0,0 +1,69 @@
+"""
+Shared helpers for the local benchmark and load-test scripts in scripts/.
+Puts the repository root on sys.path so `api.*` is importable when a
+script is run directly (python scripts/<name>.py).
+"""
+import math
+import os
+import sys
+from typing import Dict, List, Sequence
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile (pct in 0..100). Returns 0.0 for empty input."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), math.ceil(pct / 100.0 * len(ordered))))
+    return ordered[rank - 1]
+
+
+def latency_summary(values_ms: Sequence[float]) -> Dict[str, float]:
+    """p50/p95/p99/max summary of a list of latencies in milliseconds."""
+    return {
+        "count": len(values_ms),
+        "p50": round(percentile(values_ms, 50), 1),
+        "p95": round(percentile(values_ms, 95), 1),
+        "p99": round(percentile(values_ms, 99), 1),
+        "max": round(max(values_ms), 1) if values_ms else 0.0,
+    }
+
+
+def print_table(headers: List[str], rows: List[List[object]]) -> None:
+    """Print a plain fixed-width table to stdout."""
+    cells = [[str(h) for h in headers]] + [[str(c) for c in row] for row in rows]
+    widths = [max(len(r[i]) for r in cells) for i in range(len(headers))]
+    for n, row in enumerate(cells):
+        print("  ".join(c.ljust(w) for c, w in zip(row, widths)))
+        if n == 0:
+            print("  ".join("-" * w for w in widths))
+
+
+def sample_course_text(chars: int = 20_000, seed: int = 7) -> str:
+    """Deterministic Russian-looking course material of roughly `chars` characters."""
+    import random
+
+    rng = random.Random(seed)
+    words = (
+        "клиент менеджер продажа договор оплата доставка склад возврат гарантия "
+        "скидка регламент сотрудник отдел качество сервис заявка звонок поставщик "
+        "процесс стандарт обучение документ проверка отчёт срок цена товар"
+    ).split()
+    parts: List[str] = []
+    total = 0
+    section = 1
+    while total < chars:
+        heading = f"Раздел {section}. {rng.choice(words).capitalize()} и {rng.choice(words)}"
+        sentences = [
+            " ".join(rng.choice(words) for _ in range(rng.randint(8, 16))).capitalize() + "."
+            for _ in range(rng.randint(4, 8))
+        ]
+        block = heading + "\n" + " ".join(sentences)
+        parts.append(block)
+        total += len(block) + 2
+        section += 1
+    return "\n\n".join(parts)[:chars]
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Cold-start import budget for the API.
+
+Each run starts a fresh interpreter with `-X importtime`, imports api.index
+and serves one GET /api/health through the raw ASGI interface (no test
+client, so nothing extra is imported). Reports the median import wall time,
+the packages that dominate it, and fails when
+
+- the median import time exceeds --budget-ms, or
+- any module in HEAVY_MODULES is loaded by the import or the health request
+  (those must stay function-local imports in the routers/_lib modules):
+
+    python scripts/import_budget.py --runs 5 --budget-ms 1500
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import benchlib
+from benchlib import print_table
+
+# Loaded on first use only; never on a /api/health cold start
+HEAVY_MODULES = ("pypdf", "docx", "openai", "gotrue", "postgrest", "storage3", "httpx", "zstandard")
+
+_PROBE = r"""
+import asyncio, json, sys, time
+
+t0 = time.perf_counter()
+import api.index
+import_ms = (time.perf_counter() - t0) * 1000
+after_import = set(sys.modules)
+
+messages = []
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+async def send(message):
+    messages.append(message)
+
+scope = {
+    "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+    "method": "GET", "scheme": "http", "path": "/api/health", "raw_path": b"/api/health",
+    "query_string": b"", "root_path": "", "headers": [],
+    "client": ("127.0.0.1", 0), "server": ("budget", 80),
+}
+asyncio.run(api.index.app(scope, receive, send))
+
+print("IMPORT_BUDGET " + json.dumps({
+    "import_ms": import_ms,
+    "status": messages[0]["status"] if messages else None,
+    "after_import": sorted(after_import),
+    "after_health": sorted(sys.modules),
+}))
+"""
+
+
+def _run_probe() -> Tuple[dict, Dict[str, int]]:
+    """One cold interpreter: probe result + self time (us) per top-level package."""
+    env = {**os.environ, "STORAGE_BACKEND": os.environ.get("STORAGE_BACKEND", "memory"), "LOG_LEVEL": "WARNING"}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE],
+        cwd=benchlib.REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    result = None
+    for line in proc.stdout.splitlines():
+        if line.startswith("IMPORT_BUDGET "):
+            result = json.loads(line[len("IMPORT_BUDGET "):])
+    if proc.returncode != 0 or result is None:
+        sys.stderr.write(proc.stderr[-4000:])
+        raise SystemExit(f"probe failed (exit {proc.returncode})")
+
+    self_us: Dict[str, int] = defaultdict(int)
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        # "import time: <self us> | <cumulative us> | <indented module name>"
+        self_col, _, name = line.removeprefix("import time:").split("|")
+        self_us[name.strip().split(".")[0]] += int(self_col)
+    return result, self_us
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="max median import time of api.index")
+    parser.add_argument("--top", type=int, default=12, help="packages to list by import self time")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args()
+
+    import_times: List[float] = []
+    totals: Dict[str, List[int]] = defaultdict(list)
+    heavy: Dict[str, set] = {"import": set(), "health": set()}
+    for _ in range(args.runs):
+        result, self_us = _run_probe()
+        if result["status"] != 200:
+            raise SystemExit(f"/api/health returned {result['status']}")
+        import_times.append(result["import_ms"])
+        for package, us in self_us.items():
+            totals[package].append(us)
+        for stage, key in (("import", "after_import"), ("health", "after_health")):
+            loaded = {m.split(".")[0] for m in result[key]}
+            heavy[stage] |= {m for m in HEAVY_MODULES if m in loaded}
+
+    median_ms = statistics.median(import_times)
+    packages = sorted(
+        ((p, statistics.median(v) / 1000) for p, v in totals.items()), key=lambda item: item[1], reverse=True
+    )[: args.top]
+    over_budget = median_ms > args.budget_ms
+    leaked = sorted(heavy["import"] | heavy["health"])
+
+    if args.json:
+        print(json.dumps({
+            "import_ms_median": round(median_ms, 1),
+            "import_ms_runs": [round(t, 1) for t in import_times],
+            "budget_ms": args.budget_ms,
+            "heavy_on_import": sorted(heavy["import"]),
+            "heavy_on_health": sorted(heavy["health"]),
+            "top_packages_ms": {p: round(ms, 1) for p, ms in packages},
+        }, indent=2))
+    else:
+        print(f"api.index import: median {median_ms:.1f} ms over {args.runs} runs "
+              f"(min {min(import_times):.1f}, max {max(import_times):.1f}); budget {args.budget_ms:.0f} ms")
+        print()
+        print_table(["package", "self ms (median)"], [[p, f"{ms:.1f}"] for p, ms in packages])
+        print()
+        print(f"heavy modules on import: {', '.join(sorted(heavy['import'])) or 'none'}")
+        print(f"heavy modules after /api/health: {', '.join(sorted(heavy['health'])) or 'none'}")
+
+    if over_budget or leaked:
+        reasons = []
+        if over_budget:
+            reasons.append(f"import {median_ms:.1f} ms > budget {args.budget_ms:.0f} ms")
+        if leaked:
+            reasons.append(f"heavy modules loaded on cold start: {', '.join(leaked)}")
+        raise SystemExit("FAIL: " + "; ".join(reasons))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Full-stack load test: the FastAPI app in-process (httpx ASGI transport)
+against local stand-ins, with no Supabase project or Yandex quota:
+
+- GoTrue + PostgREST: scripts/supabase_standin.py (real HTTP, in-memory tables)
+- Storage: STORAGE_BACKEND=memory
+- Yandex AI Studio: scripts/yandex_standin.py
+
+Virtual users replay realistic flows concurrently:
+
+- curator: sign in -> ensure profile -> role -> draft upload -> generate
+  -> finalize -> list courses
+- employee: sign in -> role -> join by invite code (a few times)
+
+    python scripts/loadtest.py --curators 4 --employees 16 --iterations 3 \\
+        --yandex-latency lognormal:1500,0.4 --rest-latency const:15
+
+Reports throughput, per-endpoint latency percentiles and status codes, and
+event-loop lag sampled by a monitor task. Synchronous I/O on the event loop
+(a blocking HTTP call inside an async route, say) shows up as lag far
+above the sampling interval and as a large share of wall time spent
+blocked; a blocked loop also delays the client side, since the virtual
+users share it. --max-loop-lag-ms makes the run fail when the p99 lag
+exceeds it.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+from benchlib import latency_summary, print_table, sample_course_text
+from supabase_standin import SupabaseStandinConfig, SupabaseStandinServer
+from yandex_standin import StandinConfig, StandinServer
+
+
+class Recorder:
+    """Latencies and statuses per endpoint label."""
+
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+
+    async def call(self, label: str, coro) -> Optional[dict]:
+        t0 = time.perf_counter()
+        try:
+            resp = await coro
+            status = resp.status_code
+            body = resp.json() if status < 300 else None
+        except Exception as e:
+            status, body = f"error:{type(e).__name__}", None
+        self.latencies[label].append((time.perf_counter() - t0) * 1000)
+        self.statuses[label][status] += 1
+        return body
+
+
+class LoopLagMonitor:
+    """Samples how late asyncio.sleep(interval) wakes up."""
+
+    def __init__(self, interval: float = 0.01) -> None:
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            t0 = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max((time.perf_counter() - t0 - self.interval) * 1000, 0.0))
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+
+async def sign_in(auth, email: str) -> Dict[str, str]:
+    """Password sign-in against the GoTrue stand-in (what the browser does via supabase-js)."""
+    resp = await auth.post("/auth/v1/token", params={"grant_type": "password"},
+                           json={"email": email, "password": "loadtest"})
+    resp.raise_for_status()
+    data = resp.json()
+    return {"id": data["user"]["id"], "email": email, "token": data["access_token"]}
+
+
+async def curator_flow(api, auth, rec: Recorder, n: int, args, codes: List[str]) -> None:
+    user = await rec_sign_in(rec, auth, f"curator{n}@loadtest.local")
+    if user is None:
+        return
+    headers = {"Authorization": f"Bearer {user['token']}"}
+    await rec.call("POST /api/profiles/ensure", api.post(
+        "/api/profiles/ensure", json={"user_id": user["id"], "email": user["email"], "role": "curator"}))
+    await rec.call("GET /api/profile/role", api.get("/api/profile/role", headers=headers))
+
+    text = sample_course_text(args.text_chars, seed=n)
+    for i in range(args.iterations):
+        title = f"Нагрузочный курс {n}-{i}"
+        draft = await rec.call("POST /api/courses/draft", api.post(
+            "/api/courses/draft", headers=headers, data={"title": title, "size": args.size},
+            files=[("files", (f"material-{n}-{i}.txt", text.encode("utf-8"), "text/plain"))]))
+        if not draft:
+            continue
+        generated = await rec.call("POST /api/training/generate", api.post(
+            "/api/training/generate", headers=headers, json={
+                "draftCourseId": draft["draftCourseId"], "title": title, "size": args.size,
+            }))
+        if not generated:
+            continue
+        finalized = await rec.call("POST /api/courses/finalize", api.post(
+            "/api/courses/finalize", headers=headers, json={
+                "draftCourseId": draft["draftCourseId"], "title": title, "size": args.size,
+                "uploadedFiles": draft.get("uploadedFiles", []), "questions": generated["questions"],
+            }))
+        if finalized:
+            codes.append(finalized["courseCode"])
+        await rec.call("GET /api/courses/list", api.get("/api/courses/list", headers=headers))
+
+
+async def employee_flow(api, auth, rec: Recorder, n: int, args, codes: List[str]) -> None:
+    rng = random.Random(n)
+    user = await rec_sign_in(rec, auth, f"employee{n}@loadtest.local")
+    if user is None:
+        return
+    headers = {"Authorization": f"Bearer {user['token']}"}
+    await rec.call("GET /api/profile/role", api.get("/api/profile/role", headers=headers))
+    for _ in range(args.iterations * args.joins):
+        await rec.call("GET /api/courses/by-code/{code}", api.get(f"/api/courses/by-code/{rng.choice(codes)}"))
+
+
+async def rec_sign_in(rec: Recorder, auth, email: str) -> Optional[Dict[str, str]]:
+    t0 = time.perf_counter()
+    try:
+        user = await sign_in(auth, email)
+        status = 200
+    except Exception as e:
+        user, status = None, f"error:{type(e).__name__}"
+    rec.latencies["sign-in (GoTrue)"].append((time.perf_counter() - t0) * 1000)
+    rec.statuses["sign-in (GoTrue)"][status] += 1
+    return user
+
+
+async def _run(args: argparse.Namespace) -> int:
+    supabase = SupabaseStandinServer(SupabaseStandinConfig(args.auth_latency, args.rest_latency, args.seed)).start()
+    yandex = StandinServer(StandinConfig(args.yandex_latency, args.malformed_rate, 0.0, args.seed)).start()
+
+    # Settings are read at import time, so configure the environment first
+    os.environ.update({
+        "SUPABASE_URL": supabase.base_url,
+        "SUPABASE_SERVICE_ROLE_KEY": "standin",
+        "STORAGE_BACKEND": "memory",
+        "YANDEX_API_KEY": "standin",
+        "YANDEX_PROMPT_ID": "standin",
+        "YANDEX_BASE_URL": yandex.base_url,
+        "LOG_LEVEL": os.environ.get("LOG_LEVEL", "WARNING"),
+    })
+    import httpx
+
+    from api.index import app
+
+    rec = Recorder()
+    monitor = LoopLagMonitor(args.lag_interval_ms / 1000)
+    codes: List[str] = []
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest",
+                                 timeout=args.timeout) as api, \
+            httpx.AsyncClient(base_url=supabase.base_url, timeout=args.timeout, limits=limits) as auth:
+        # Seed invite codes so employees have courses to join from the start
+        seed_rec = Recorder()
+        await curator_flow(api, auth, seed_rec, 0, argparse.Namespace(**{**vars(args), "iterations": 1}), codes)
+        if not codes:
+            print(f"seeding failed: {dict(seed_rec.statuses)}")
+            return 1
+
+        monitor.start()
+        t_start = time.perf_counter()
+        await asyncio.gather(
+            *(curator_flow(api, auth, rec, n, args, codes) for n in range(1, args.curators + 1)),
+            *(employee_flow(api, auth, rec, n, args, codes) for n in range(1, args.employees + 1)),
+        )
+        wall_s = time.perf_counter() - t_start
+        await monitor.stop()
+
+    total = sum(len(v) for v in rec.latencies.values())
+    lag = latency_summary(monitor.samples)
+    blocked = sum(1 for s in monitor.samples if s >= args.blocked_ms)
+    blocked_share = sum(monitor.samples) / (wall_s * 1000) if wall_s else 0.0
+    report = {
+        "curators": args.curators,
+        "employees": args.employees,
+        "iterations": args.iterations,
+        "wall_s": round(wall_s, 2),
+        "requests": total,
+        "throughput_rps": round(total / wall_s, 2) if wall_s else 0.0,
+        "endpoints": {
+            label: {**latency_summary(values), "statuses": {str(k): v for k, v in rec.statuses[label].items()}}
+            for label, values in rec.latencies.items()
+        },
+        "loop_lag_ms": {**lag, f"samples_over_{args.blocked_ms:g}ms": blocked,
+                        "blocked_share": round(blocked_share, 3)},
+        "supabase_standin_calls": supabase.state.snapshot(),
+        "yandex_standin": yandex.stats.snapshot(),
+    }
+    supabase.stop()
+    yandex.stop()
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print(f"\ncurators={args.curators} employees={args.employees} iterations={args.iterations} "
+              f"wall_s={report['wall_s']} requests={total} throughput_rps={report['throughput_rps']}\n")
+        print_table(
+            ["endpoint", "count", "p50_ms", "p95_ms", "p99_ms", "max_ms", "statuses"],
+            [[label, s["count"], s["p50"], s["p95"], s["p99"], s["max"], s["statuses"]]
+             for label, s in sorted(report["endpoints"].items())],
+        )
+        print(f"\nevent-loop lag (interval {args.lag_interval_ms:g} ms): p50={lag['p50']} p95={lag['p95']} "
+              f"p99={lag['p99']} max={lag['max']} ms, {blocked}/{lag['count']} samples >= {args.blocked_ms:g} ms, "
+              f"blocked {blocked_share:.0%} of wall time")
+        print(f"supabase stand-in: {report['supabase_standin_calls']}")
+        print(f"yandex stand-in: {report['yandex_standin']}")
+
+    if args.max_loop_lag_ms is not None and lag["p99"] > args.max_loop_lag_ms:
+        print(f"\nFAIL: event-loop lag p99 {lag['p99']} ms > {args.max_loop_lag_ms:g} ms")
+        return 1
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--curators", type=int, default=4)
+    parser.add_argument("--employees", type=int, default=16)
+    parser.add_argument("--iterations", type=int, default=2, help="courses per curator")
+    parser.add_argument("--joins", type=int, default=3, help="by-code joins per employee per iteration")
+    parser.add_argument("--size", default="small", choices=["small", "medium", "large"])
+    parser.add_argument("--text-chars", type=int, default=30_000)
+    parser.add_argument("--yandex-latency", default="lognormal:1500,0.4")
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--auth-latency", default="const:20")
+    parser.add_argument("--rest-latency", default="const:10")
+    parser.add_argument("--lag-interval-ms", type=float, default=10.0)
+    parser.add_argument("--blocked-ms", type=float, default=100.0, help="lag counted as a blocked loop")
+    parser.add_argument("--max-loop-lag-ms", type=float, help="fail when the p99 event-loop lag exceeds this")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(_run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Copy finalized course manifests from Storage into the courses/course_items
+tables (COURSE_STORE=db). Apply supabase/migrations/0006_course_store.sql
+first.
+
+    python scripts/migrate_manifests.py --dry-run
+    python scripts/migrate_manifests.py --user <userId>
+
+Walks {userId}/{courseId}/manifest.json in the courses bucket and saves each
+manifest through DbCourseStore, keeping course ids, question ids and invite
+codes, so existing invite links keep resolving. Re-running is safe: courses
+and their questions are upserted by id. Storage objects are left in
+place; switch COURSE_STORE=db once the run reports no failures.
+"""
+import argparse
+import sys
+import uuid
+from collections import Counter
+from typing import Iterator, List, Optional, Tuple
+
+from benchlib import print_table  # also puts the repo root on sys.path
+
+
+PAGE_SIZE = 100
+
+
+def _names(bucket, prefix: str) -> Iterator[str]:
+    """Every entry name under prefix; storage lists return one page at a time."""
+    offset = 0
+    while True:
+        items: List[dict] = bucket.list(prefix, {"limit": PAGE_SIZE, "offset": offset}) or []
+        for item in items:
+            if item.get("name"):
+                yield item["name"]
+        if len(items) < PAGE_SIZE:
+            return
+        offset += PAGE_SIZE
+
+
+def _iter_manifests(store, user_filter: Optional[str]) -> Iterator[Tuple[str, str]]:
+    """Yield (userId, courseId) pairs for every course folder in the bucket."""
+    bucket = store._bucket()
+    users = [user_filter] if user_filter else list(_names(bucket, ""))
+    for user_id in users:
+        if user_id.startswith("_"):
+            continue  # _index/, _blobs/ and other non-user prefixes
+        for course_id in list(_names(bucket, user_id)):
+            yield user_id, course_id
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Migrate Storage course manifests into Postgres")
+    parser.add_argument("--user", help="only migrate courses of this userId")
+    parser.add_argument("--dry-run", action="store_true", help="read and validate manifests without writing")
+    args = parser.parse_args()
+
+    from api._lib.course_store import DbCourseStore, InviteCodeTaken, StorageCourseStore
+    from api._lib.supabase_admin import get_admin_client
+
+    client = get_admin_client()
+    source = StorageCourseStore(client)
+    target = DbCourseStore(client)
+    results: Counter = Counter()
+
+    for user_id, course_id in _iter_manifests(source, args.user):
+        label = f"{user_id}/{course_id}"
+        try:
+            uuid.UUID(course_id)
+            uuid.UUID(user_id)
+        except ValueError:
+            print(f"skip   {label}: not a course folder")
+            results["skipped"] += 1
+            continue
+
+        manifest = source.get(user_id, course_id)
+        if manifest is None:
+            print(f"skip   {label}: no manifest.json (draft or incomplete course)")
+            results["skipped"] += 1
+            continue
+
+        questions = len(manifest.get("questions") or [])
+        if args.dry_run:
+            print(f"would  {label}: code={manifest.get('inviteCode') or '-'} questions={questions}")
+            results["pending"] += 1
+            continue
+
+        try:
+            try:
+                target.save(user_id, manifest)
+            except InviteCodeTaken:
+                # Keep the course reachable by id; its old code points elsewhere now.
+                print(f"warn   {label}: invite code {manifest.get('inviteCode')} already used, migrated without it")
+                manifest["inviteCode"] = ""
+                target.save(user_id, manifest)
+                results["code_conflicts"] += 1
+        except Exception as e:
+            print(f"FAIL   {label}: {e}")
+            results["failed"] += 1
+            continue
+        print(f"ok     {label}: code={manifest.get('inviteCode') or '-'} questions={questions}")
+        results["migrated"] += 1
+
+    print_table(["result", "courses"], [[k, v] for k, v in sorted(results.items())])
+    return 1 if results["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
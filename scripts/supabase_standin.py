@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Supabase GoTrue and PostgREST endpoints the API uses,
+backed by in-memory tables. Storage is covered by STORAGE_BACKEND=memory.
+
+GoTrue (`/auth/v1`):
+- POST /token?grant_type=password and POST /signup: any email/password signs
+  in; the user id is derived from the email, the access token is
+  "standin.<user id>"
+- GET /user (Bearer token) and GET /admin/users/{id}
+
+PostgREST (`/rest/v1/{table}`): GET/POST/PATCH/DELETE with `col=eq.value`
+filters, `limit`, upserts (Prefer: resolution=merge-duplicates /
+ignore-duplicates, `on_conflict`), `return=representation|minimal` and
+single-object responses. `select` is ignored (full rows, no embedding);
+RPCs answer PGRST202 so callers take their non-RPC fallback.
+
+    python scripts/supabase_standin.py --port 8798 --auth-latency const:20 --rest-latency const:10
+
+Then point the API at it:
+
+    SUPABASE_URL=http://127.0.0.1:8798 SUPABASE_SERVICE_ROLE_KEY=standin STORAGE_BACKEND=memory
+
+GET /stats returns per-endpoint call counters as JSON.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from yandex_standin import parse_latency
+
+_USER_NAMESPACE = uuid.UUID("6f1c2a4e-8d7b-4c1e-9a55-3b2f0e9d7c10")
+
+
+class SupabaseStandinConfig:
+    """Latency knobs for the stand-in (spec strings as in yandex_standin.parse_latency)."""
+
+    def __init__(self, auth_latency: str = "const:0", rest_latency: str = "const:0", seed: int = 1) -> None:
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._auth = parse_latency(auth_latency, self.rng)
+        self._rest = parse_latency(rest_latency, self.rng)
+
+    def delay(self, kind: str) -> float:
+        with self._lock:
+            return self._auth() if kind == "auth" else self._rest()
+
+
+class SupabaseStandinState:
+    """Users, tables and call counters shared by all handler threads."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.users: Dict[str, Dict[str, Any]] = {}
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}
+        self.calls: Counter = Counter()
+
+    def bump(self, key: str) -> None:
+        with self._lock:
+            self.calls[key] += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.calls)
+
+    def sign_in(self, email: str) -> Dict[str, Any]:
+        user_id = str(uuid.uuid5(_USER_NAMESPACE, email.lower()))
+        now = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            return self.users.setdefault(user_id, {
+                "id": user_id,
+                "aud": "authenticated",
+                "role": "authenticated",
+                "email": email.lower(),
+                "email_confirmed_at": now,
+                "created_at": now,
+                "app_metadata": {"provider": "email"},
+                "user_metadata": {},
+            })
+
+    def user_for_token(self, token: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self.users.get(token.removeprefix("standin."))
+
+
+def _matches(row: Dict[str, Any], filters: List[Tuple[str, str]]) -> bool:
+    for column, value in filters:
+        if str(row.get(column)) != value:
+            return False
+    return True
+
+
+def make_handler(config: SupabaseStandinConfig, state: SupabaseStandinState):
+    """Create a request handler class bound to the given config and state."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args) -> None:  # noqa: A002 - stdlib signature
+            pass
+
+        def _send_json(self, status: int, payload: Any) -> None:
+            body = b"" if payload is None else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _body(self) -> Any:
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            return json.loads(raw) if raw else None
+
+        def _bearer(self) -> str:
+            return (self.headers.get("Authorization") or "").removeprefix("Bearer ").strip()
+
+        # ── dispatch ────────────────────────────────────────────────────────
+
+        def _route(self, method: str) -> None:
+            url = urlsplit(self.path)
+            # Always drain the body: postgrest-py sends `{}` even with GET,
+            # and leftover bytes would corrupt the next keep-alive request
+            body = self._body()
+            if url.path.rstrip("/") == "/stats":
+                self._send_json(200, state.snapshot())
+            elif url.path.startswith("/auth/v1/"):
+                time.sleep(config.delay("auth"))
+                self._auth(method, url.path[len("/auth/v1"):], body)
+            elif url.path.startswith("/rest/v1/"):
+                time.sleep(config.delay("rest"))
+                self._rest(method, url.path[len("/rest/v1/"):], parse_qsl(url.query), body)
+            else:
+                self._send_json(404, {"message": "not found"})
+
+        def do_GET(self) -> None:
+            self._route("GET")
+
+        def do_POST(self) -> None:
+            self._route("POST")
+
+        def do_PATCH(self) -> None:
+            self._route("PATCH")
+
+        def do_DELETE(self) -> None:
+            self._route("DELETE")
+
+        # ── GoTrue ──────────────────────────────────────────────────────────
+
+        def _auth(self, method: str, path: str, body: Any) -> None:
+            state.bump(f"auth {method} {path.split('/')[1] if path.count('/') > 1 else path}")
+            if method == "POST" and path in ("/token", "/signup"):
+                user = state.sign_in((body or {}).get("email") or "user@example.com")
+                self._send_json(200, {
+                    "access_token": f"standin.{user['id']}",
+                    "token_type": "bearer",
+                    "expires_in": 3600,
+                    "refresh_token": uuid.uuid4().hex,
+                    "user": user,
+                })
+            elif method == "GET" and path == "/user":
+                user = state.user_for_token(self._bearer())
+                if user is None:
+                    self._send_json(401, {"code": 401, "msg": "invalid JWT"})
+                else:
+                    self._send_json(200, user)
+            elif method == "GET" and path.startswith("/admin/users/"):
+                user = state.user_for_token(path.rsplit("/", 1)[-1])
+                self._send_json(200, user) if user else self._send_json(404, {"code": 404, "msg": "User not found"})
+            else:
+                self._send_json(404, {"code": 404, "msg": "not found"})
+
+        # ── PostgREST ───────────────────────────────────────────────────────
+
+        def _rest(self, method: str, table: str, params: List[Tuple[str, str]], body: Any) -> None:
+            state.bump(f"rest {method} {table}")
+            if table.startswith("rpc/"):
+                self._send_json(404, {"code": "PGRST202", "message": f"Could not find the function {table[4:]}",
+                                      "details": None, "hint": None})
+                return
+
+            prefer = self.headers.get("Prefer") or ""
+            single = "vnd.pgrst.object" in (self.headers.get("Accept") or "")
+            filters = [(k, v[3:]) for k, v in params if v.startswith("eq.")]
+            limit = next((int(v) for k, v in params if k == "limit"), None)
+            on_conflict = next((v for k, v in params if k == "on_conflict"), "id")
+
+            with state._lock:
+                rows = state.tables.setdefault(table, [])
+                if method == "GET":
+                    result = [r for r in rows if _matches(r, filters)][:limit]
+                elif method == "POST":
+                    result = []
+                    for new in body if isinstance(body, list) else [body]:
+                        keys = [c.strip() for c in on_conflict.split(",")]
+                        existing = next(
+                            (r for r in rows if all(r.get(k) == new.get(k) for k in keys) and new.get(keys[0]) is not None),
+                            None,
+                        )
+                        if existing is not None:
+                            if "ignore-duplicates" in prefer:
+                                continue
+                            if "merge-duplicates" not in prefer:
+                                self._send_json(409, {"code": "23505", "message": "duplicate key value",
+                                                      "details": None, "hint": None})
+                                return
+                            existing.update(new)
+                            result.append(dict(existing))
+                        else:
+                            row = {"id": str(uuid.uuid4()), "created_at": datetime.now(timezone.utc).isoformat(), **new}
+                            rows.append(row)
+                            result.append(dict(row))
+                elif method == "PATCH":
+                    result = []
+                    for row in rows:
+                        if _matches(row, filters):
+                            row.update(body or {})
+                            result.append(dict(row))
+                else:  # DELETE
+                    result = [r for r in rows if _matches(r, filters)]
+                    state.tables[table] = [r for r in rows if not _matches(r, filters)]
+
+            status = 201 if method == "POST" else 200
+            if method != "GET" and "return=minimal" in prefer:
+                self._send_json(status, None)
+            elif single:
+                if len(result) == 1:
+                    self._send_json(200, result[0])
+                else:
+                    self._send_json(406, {"code": "PGRST116", "message": "JSON object requested, multiple (or no) rows returned",
+                                          "details": f"The result contains {len(result)} rows", "hint": None})
+            else:
+                self._send_json(status, result)
+
+    return Handler
+
+
+class SupabaseStandinServer:
+    """Run the stand-in on a background thread (for use from benchmark scripts)."""
+
+    def __init__(
+        self, config: Optional[SupabaseStandinConfig] = None, host: str = "127.0.0.1", port: int = 0
+    ) -> None:
+        self.config = config or SupabaseStandinConfig()
+        self.state = SupabaseStandinState()
+        self._httpd = ThreadingHTTPServer((host, port), make_handler(self.config, self.state))
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "SupabaseStandinServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local Supabase GoTrue/PostgREST stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8798)
+    parser.add_argument("--auth-latency", default="const:0", help="const:MS | uniform:LO,HI | lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--rest-latency", default="const:0")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    server = SupabaseStandinServer(SupabaseStandinConfig(args.auth_latency, args.rest_latency, args.seed),
+                                   args.host, args.port)
+    print(f"Supabase stand-in listening on {server.base_url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
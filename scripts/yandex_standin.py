@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Yandex AI Studio Responses API.
+
+Implements the `POST {base}/responses` surface that `_call_yandex` in
+api/_routers/training.py uses via `openai.OpenAI(...).responses.create(prompt=...)`.
+It answers with batch-format questions sized from the prompt's quota
+variables, with configurable latency and failure injection:
+
+    python scripts/yandex_standin.py --port 8799 \\
+        --latency lognormal:1500,0.4 --malformed-rate 0.05 --truncation-rate 0.05
+
+Then point the API at it:
+
+    YANDEX_BASE_URL=http://127.0.0.1:8799/v1 YANDEX_API_KEY=x YANDEX_PROMPT_ID=x
+
+GET {base}/stats returns call/failure counters as JSON.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+
+
+def parse_latency(spec: str, rng: random.Random) -> Callable[[], float]:
+    """
+    Build a latency sampler (seconds) from a spec string.
+
+    Supported forms (all values in milliseconds):
+        const:800
+        uniform:500,3000
+        lognormal:1500,0.4     (median, sigma)
+    """
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",") if v.strip()] if params else []
+    if kind == "const":
+        ms = values[0] if values else 0.0
+        return lambda: ms / 1000.0
+    if kind == "uniform":
+        lo, hi = values
+        return lambda: rng.uniform(lo, hi) / 1000.0
+    if kind == "lognormal":
+        import math
+
+        median, sigma = values
+        mu = math.log(median)
+        return lambda: rng.lognormvariate(mu, sigma) / 1000.0
+    raise ValueError(f"Unknown latency spec: {spec!r}")
+
+
+class StandinConfig:
+    """Failure injection and sizing knobs for the stand-in."""
+
+    def __init__(
+        self,
+        latency: str = "const:0",
+        malformed_rate: float = 0.0,
+        truncation_rate: float = 0.0,
+        seed: int = 1,
+    ) -> None:
+        self.rng = random.Random(seed)
+        self.sample_latency = parse_latency(latency, self.rng)
+        self.malformed_rate = malformed_rate
+        self.truncation_rate = truncation_rate
+
+
+class StandinStats:
+    """Thread-safe counters exposed on GET /stats."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.malformed = 0
+        self.truncated = 0
+
+    def bump(self, field: str) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {"calls": self.calls, "malformed": self.malformed, "truncated": self.truncated}
+
+
+def _build_steps(quota_mcq: int, quota_open: int, rng: random.Random) -> list:
+    """Questions in the Yandex batch step format that _normalize_step understands."""
+    steps = []
+    for i in range(quota_mcq):
+        steps.append({
+            "type": "mcq",
+            "tag": f"topic-{i % 4}",
+            "question": f"Какое утверждение о разделе {i + 1} верно?",
+            "options": [f"Вариант {k + 1} для вопроса {i + 1}" for k in range(4)],
+            "correct_index": rng.randint(0, 3),
+            "explanation": "Так сказано в материале курса.",
+        })
+    for i in range(quota_open):
+        steps.append({
+            "type": "open",
+            "tag": f"topic-{i % 4}",
+            "prompt": f"Опишите своими словами процесс из раздела {i + 1}.",
+            "sample_good_answer": "Ответ должен перечислить ключевые шаги процесса.",
+        })
+    return steps
+
+
+def _response_body(output_text: str) -> dict:
+    """Minimal Responses API object; `output_text` is derived from output[].content[]."""
+    return {
+        "id": f"resp_{uuid.uuid4().hex}",
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": "standin",
+        "status": "completed",
+        "parallel_tool_calls": False,
+        "tool_choice": "auto",
+        "tools": [],
+        "output": [{
+            "type": "message",
+            "id": f"msg_{uuid.uuid4().hex}",
+            "role": "assistant",
+            "status": "completed",
+            "content": [{"type": "output_text", "text": output_text, "annotations": []}],
+        }],
+    }
+
+
+def make_handler(config: StandinConfig, stats: StandinStats):
+    """Create a request handler class bound to the given config and stats."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args) -> None:  # noqa: A002 - stdlib signature
+            pass
+
+        def _send_json(self, status: int, payload: dict) -> None:
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:
+            if self.path.rstrip("/").endswith("/stats"):
+                self._send_json(200, stats.snapshot())
+            else:
+                self._send_json(404, {"error": {"message": "not found"}})
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            if not self.path.rstrip("/").endswith("/responses"):
+                self._send_json(404, {"error": {"message": "not found"}})
+                return
+
+            stats.bump("calls")
+            try:
+                request = json.loads(raw or b"{}")
+            except json.JSONDecodeError:
+                self._send_json(400, {"error": {"message": "invalid JSON body"}})
+                return
+
+            variables = (request.get("prompt") or {}).get("variables") or {}
+            quota_mcq = int(variables.get("quota_mcq") or 10)
+            quota_open = int(variables.get("quota_open") or 4)
+
+            with stats._lock:
+                roll = config.rng.random()
+                delay = config.sample_latency()
+                steps = _build_steps(quota_mcq, quota_open, config.rng)
+                cut = config.rng.uniform(0.2, 0.9)
+            time.sleep(delay)
+
+            text = json.dumps({"batch": {"steps": steps}}, ensure_ascii=False)
+            if roll < config.malformed_rate:
+                stats.bump("malformed")
+                text = "Вот вопросы по материалу: шаг 1 — " + text.replace("{", "(").replace("[", "(")
+            elif roll < config.malformed_rate + config.truncation_rate:
+                stats.bump("truncated")
+                text = "```json\n" + text[: int(len(text) * cut)]
+            else:
+                text = "```json\n" + text + "\n```"
+
+            self._send_json(200, _response_body(text))
+
+    return Handler
+
+
+class StandinServer:
+    """Run the stand-in on a background thread (for use from benchmark scripts)."""
+
+    def __init__(self, config: Optional[StandinConfig] = None, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.config = config or StandinConfig()
+        self.stats = StandinStats()
+        self._httpd = ThreadingHTTPServer((host, port), make_handler(self.config, self.stats))
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "StandinServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local Yandex AI Studio stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--latency", default="lognormal:1500,0.4",
+                        help="const:MS | uniform:LO,HI | lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--truncation-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    config = StandinConfig(args.latency, args.malformed_rate, args.truncation_rate, args.seed)
+    server = StandinServer(config, args.host, args.port)
+    print(f"Yandex stand-in listening on {server.base_url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+-- Adapt MVP - Database-backed course store
+-- Migration: 0006_course_store.sql
+-- Description: Lets the API keep finalized courses in `courses`/`course_items`
+-- (COURSE_STORE=db) instead of manifest.json blobs in Storage.
+
+-- =============================================================================
+-- Rollback Instructions (if needed):
+-- =============================================================================
+-- DROP INDEX IF EXISTS idx_courses_invite_code;
+-- DROP INDEX IF EXISTS idx_courses_created_by_created_at;
+-- ALTER TABLE courses DROP COLUMN IF EXISTS invite_code,
+--                     DROP COLUMN IF EXISTS overall_status,
+--                     DROP COLUMN IF EXISTS text_bytes,
+--                     DROP COLUMN IF EXISTS files;
+-- ALTER TABLE course_items DROP COLUMN IF EXISTS expected_answer,
+--                          DROP COLUMN IF EXISTS explanation,
+--                          DROP COLUMN IF EXISTS tag;
+
+-- =============================================================================
+-- A. courses: manifest fields
+-- =============================================================================
+
+-- Courses are created by curators before any organization exists
+ALTER TABLE courses ALTER COLUMN org_id DROP NOT NULL;
+
+-- The wizard sends small/medium/large; keep the original S/M/L values valid
+ALTER TABLE courses DROP CONSTRAINT IF EXISTS courses_size_check;
+ALTER TABLE courses ADD CONSTRAINT courses_size_check
+  CHECK (size IN ('S', 'M', 'L', 'small', 'medium', 'large'));
+
+ALTER TABLE courses ADD COLUMN IF NOT EXISTS invite_code TEXT;
+ALTER TABLE courses ADD COLUMN IF NOT EXISTS overall_status TEXT NOT NULL DEFAULT 'ready';
+ALTER TABLE courses ADD COLUMN IF NOT EXISTS text_bytes BIGINT NOT NULL DEFAULT 0;
+ALTER TABLE courses ADD COLUMN IF NOT EXISTS files JSONB NOT NULL DEFAULT '[]'::jsonb;
+
+-- Invite code lookup (GET /api/courses/by-code/{code}) and collision check
+CREATE UNIQUE INDEX IF NOT EXISTS idx_courses_invite_code ON courses(invite_code);
+
+-- Curator course list: WHERE created_by = ? ORDER BY created_at DESC
+CREATE INDEX IF NOT EXISTS idx_courses_created_by_created_at ON courses(created_by, created_at DESC);
+
+-- =============================================================================
+-- B. course_items: question fields beyond prompt/options
+-- =============================================================================
+
+ALTER TABLE course_items ADD COLUMN IF NOT EXISTS expected_answer TEXT;
+ALTER TABLE course_items ADD COLUMN IF NOT EXISTS explanation TEXT;
+ALTER TABLE course_items ADD COLUMN IF NOT EXISTS tag TEXT;
+
+-- =============================================================================
+-- C. Update app_meta
+-- =============================================================================
+
+UPDATE app_meta
+SET schema_version = '0006_course_store',
+    notes = 'Invite codes and manifest fields on courses for the DB course store'
+WHERE id = 1;
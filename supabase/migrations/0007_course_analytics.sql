@@ -0,0 +1,324 @@
+-- Adapt MVP - Incremental course analytics
+-- Migration: 0007_course_analytics.sql
+-- Description: Per-course and per-question aggregates kept up to date by
+-- triggers on answers/enrollments, so GET /api/courses/{id}/analytics reads
+-- a fixed number of rows regardless of cohort size. Requires 0006.
+
+-- =============================================================================
+-- Rollback Instructions (if needed):
+-- =============================================================================
+-- DROP TRIGGER IF EXISTS trg_answers_stats ON answers;
+-- DROP TRIGGER IF EXISTS trg_enrollments_stats ON enrollments;
+-- DROP TRIGGER IF EXISTS trg_courses_stats_row ON courses;
+-- DROP TRIGGER IF EXISTS trg_course_items_stats_row ON course_items;
+-- DROP FUNCTION IF EXISTS public.answers_stats();
+-- DROP FUNCTION IF EXISTS public.enrollments_stats();
+-- DROP FUNCTION IF EXISTS public.create_course_stats_row();
+-- DROP FUNCTION IF EXISTS public.create_course_item_stats_row();
+-- DROP FUNCTION IF EXISTS public.score_bucket(INTEGER, INTEGER);
+-- DROP TABLE IF EXISTS course_item_stats;
+-- DROP TABLE IF EXISTS course_stats;
+-- ALTER TABLE enrollments DROP COLUMN IF EXISTS answered,
+--                         DROP COLUMN IF EXISTS quiz_graded,
+--                         DROP COLUMN IF EXISTS quiz_correct;
+
+-- =============================================================================
+-- A. Aggregate tables
+-- =============================================================================
+
+-- Per-enrollment running totals (feed the score distribution)
+ALTER TABLE enrollments ADD COLUMN IF NOT EXISTS answered INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE enrollments ADD COLUMN IF NOT EXISTS quiz_graded INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE enrollments ADD COLUMN IF NOT EXISTS quiz_correct INTEGER NOT NULL DEFAULT 0;
+
+-- course_stats: one row per course
+-- score_buckets[1..11] counts completed enrollments by quiz score decile
+-- (0-9%, 10-19%, ..., 90-99%, 100%).
+CREATE TABLE IF NOT EXISTS course_stats (
+    course_id UUID PRIMARY KEY REFERENCES courses(id) ON DELETE CASCADE,
+    enrolled INTEGER NOT NULL DEFAULT 0,
+    invited INTEGER NOT NULL DEFAULT 0,
+    in_progress INTEGER NOT NULL DEFAULT 0,
+    completed INTEGER NOT NULL DEFAULT 0,
+    answers INTEGER NOT NULL DEFAULT 0,
+    quiz_graded INTEGER NOT NULL DEFAULT 0,
+    quiz_correct INTEGER NOT NULL DEFAULT 0,
+    score_buckets INTEGER[] NOT NULL DEFAULT array_fill(0, ARRAY[11]),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- course_item_stats: one row per question
+CREATE TABLE IF NOT EXISTS course_item_stats (
+    course_item_id UUID PRIMARY KEY REFERENCES course_items(id) ON DELETE CASCADE,
+    answers INTEGER NOT NULL DEFAULT 0,
+    quiz_graded INTEGER NOT NULL DEFAULT 0,
+    quiz_correct INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- =============================================================================
+-- B. Stats rows follow courses/course_items
+-- =============================================================================
+-- Counter triggers below only UPDATE existing rows, so cascaded deletes never
+-- try to re-create stats for a course that is going away.
+
+CREATE OR REPLACE FUNCTION public.create_course_stats_row()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  INSERT INTO course_stats (course_id) VALUES (NEW.id) ON CONFLICT (course_id) DO NOTHING;
+  RETURN NEW;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.create_course_item_stats_row()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  INSERT INTO course_item_stats (course_item_id) VALUES (NEW.id) ON CONFLICT (course_item_id) DO NOTHING;
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_courses_stats_row ON courses;
+CREATE TRIGGER trg_courses_stats_row
+  AFTER INSERT ON courses
+  FOR EACH ROW EXECUTE FUNCTION public.create_course_stats_row();
+
+DROP TRIGGER IF EXISTS trg_course_items_stats_row ON course_items;
+CREATE TRIGGER trg_course_items_stats_row
+  AFTER INSERT ON course_items
+  FOR EACH ROW EXECUTE FUNCTION public.create_course_item_stats_row();
+
+-- =============================================================================
+-- C. Counter maintenance
+-- =============================================================================
+
+-- Index into score_buckets (1..11) for a completed enrollment, NULL if ungraded
+CREATE OR REPLACE FUNCTION public.score_bucket(graded INTEGER, correct INTEGER)
+RETURNS INTEGER
+LANGUAGE sql
+IMMUTABLE
+AS $$
+  SELECT CASE WHEN graded > 0 THEN floor(10.0 * correct / graded)::INTEGER + 1 END;
+$$;
+
+-- answers → course_item_stats, course_stats and the enrollment's totals
+CREATE OR REPLACE FUNCTION public.answers_stats()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  d_answers INTEGER := 0;
+  d_graded INTEGER := 0;
+  d_correct INTEGER := 0;
+  item_id UUID;
+  enr_id UUID;
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    d_answers := d_answers - 1;
+    d_graded := d_graded - (OLD.is_correct IS NOT NULL)::INTEGER;
+    d_correct := d_correct - (OLD.is_correct IS TRUE)::INTEGER;
+    item_id := OLD.course_item_id;
+    enr_id := OLD.enrollment_id;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    d_answers := d_answers + 1;
+    d_graded := d_graded + (NEW.is_correct IS NOT NULL)::INTEGER;
+    d_correct := d_correct + (NEW.is_correct IS TRUE)::INTEGER;
+    item_id := NEW.course_item_id;
+    enr_id := NEW.enrollment_id;
+  END IF;
+
+  IF d_answers = 0 AND d_graded = 0 AND d_correct = 0 THEN
+    RETURN NULL;  -- re-submitted answer with the same grading outcome
+  END IF;
+
+  UPDATE course_item_stats
+     SET answers = answers + d_answers,
+         quiz_graded = quiz_graded + d_graded,
+         quiz_correct = quiz_correct + d_correct,
+         updated_at = NOW()
+   WHERE course_item_id = item_id;
+
+  UPDATE course_stats cs
+     SET answers = cs.answers + d_answers,
+         quiz_graded = cs.quiz_graded + d_graded,
+         quiz_correct = cs.quiz_correct + d_correct,
+         updated_at = NOW()
+    FROM course_items ci
+   WHERE ci.id = item_id AND cs.course_id = ci.course_id;
+
+  -- Fires enrollments_stats, which moves the score bucket of completed enrollments
+  UPDATE enrollments
+     SET answered = answered + d_answers,
+         quiz_graded = quiz_graded + d_graded,
+         quiz_correct = quiz_correct + d_correct
+   WHERE id = enr_id;
+
+  RETURN NULL;
+END;
+$$;
+
+-- enrollments → status counts and score distribution in course_stats
+CREATE OR REPLACE FUNCTION public.enrollments_stats()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  old_bucket INTEGER;
+  new_bucket INTEGER;
+  buckets INTEGER[];
+  target UUID;
+BEGIN
+  target := COALESCE(NEW.course_id, OLD.course_id);
+
+  IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.status = 'completed' THEN
+    old_bucket := public.score_bucket(OLD.quiz_graded, OLD.quiz_correct);
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.status = 'completed' THEN
+    new_bucket := public.score_bucket(NEW.quiz_graded, NEW.quiz_correct);
+  END IF;
+
+  IF TG_OP = 'UPDATE' AND OLD.status = NEW.status
+     AND old_bucket IS NOT DISTINCT FROM new_bucket THEN
+    RETURN NULL;  -- counter-only change that does not move the distribution
+  END IF;
+
+  SELECT score_buckets INTO buckets FROM course_stats WHERE course_id = target FOR UPDATE;
+  IF NOT FOUND THEN
+    RETURN NULL;
+  END IF;
+  IF old_bucket IS NOT NULL THEN
+    buckets[old_bucket] := buckets[old_bucket] - 1;
+  END IF;
+  IF new_bucket IS NOT NULL THEN
+    buckets[new_bucket] := buckets[new_bucket] + 1;
+  END IF;
+
+  UPDATE course_stats
+     SET enrolled = enrolled
+           + (TG_OP = 'INSERT')::INTEGER - (TG_OP = 'DELETE')::INTEGER,
+         invited = invited
+           + (TG_OP <> 'DELETE' AND NEW.status = 'invited')::INTEGER
+           - (TG_OP <> 'INSERT' AND OLD.status = 'invited')::INTEGER,
+         in_progress = in_progress
+           + (TG_OP <> 'DELETE' AND NEW.status = 'in_progress')::INTEGER
+           - (TG_OP <> 'INSERT' AND OLD.status = 'in_progress')::INTEGER,
+         completed = completed
+           + (TG_OP <> 'DELETE' AND NEW.status = 'completed')::INTEGER
+           - (TG_OP <> 'INSERT' AND OLD.status = 'completed')::INTEGER,
+         score_buckets = buckets,
+         updated_at = NOW()
+   WHERE course_id = target;
+
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_answers_stats ON answers;
+CREATE TRIGGER trg_answers_stats
+  AFTER INSERT OR UPDATE OR DELETE ON answers
+  FOR EACH ROW EXECUTE FUNCTION public.answers_stats();
+
+DROP TRIGGER IF EXISTS trg_enrollments_stats ON enrollments;
+CREATE TRIGGER trg_enrollments_stats
+  AFTER INSERT OR UPDATE OR DELETE ON enrollments
+  FOR EACH ROW EXECUTE FUNCTION public.enrollments_stats();
+
+-- =============================================================================
+-- D. Backfill existing data
+-- =============================================================================
+
+UPDATE enrollments e
+   SET answered = a.answered,
+       quiz_graded = a.quiz_graded,
+       quiz_correct = a.quiz_correct
+  FROM (
+    SELECT enrollment_id,
+           COUNT(*) AS answered,
+           COUNT(is_correct) AS quiz_graded,
+           COUNT(*) FILTER (WHERE is_correct) AS quiz_correct
+      FROM answers
+     GROUP BY enrollment_id
+  ) a
+ WHERE a.enrollment_id = e.id;
+
+INSERT INTO course_item_stats (course_item_id, answers, quiz_graded, quiz_correct)
+SELECT ci.id,
+       COUNT(a.id),
+       COUNT(a.is_correct),
+       COUNT(a.id) FILTER (WHERE a.is_correct)
+  FROM course_items ci
+  LEFT JOIN answers a ON a.course_item_id = ci.id
+ GROUP BY ci.id
+ON CONFLICT (course_item_id) DO UPDATE SET
+  answers = EXCLUDED.answers,
+  quiz_graded = EXCLUDED.quiz_graded,
+  quiz_correct = EXCLUDED.quiz_correct,
+  updated_at = NOW();
+
+INSERT INTO course_stats (
+  course_id, enrolled, invited, in_progress, completed,
+  answers, quiz_graded, quiz_correct, score_buckets
+)
+SELECT c.id,
+       COALESCE(e.enrolled, 0),
+       COALESCE(e.invited, 0),
+       COALESCE(e.in_progress, 0),
+       COALESCE(e.completed, 0),
+       COALESCE(e.answers, 0),
+       COALESCE(e.quiz_graded, 0),
+       COALESCE(e.quiz_correct, 0),
+       COALESCE(b.buckets, array_fill(0, ARRAY[11]))
+  FROM courses c
+  LEFT JOIN (
+    SELECT course_id,
+           COUNT(*) AS enrolled,
+           COUNT(*) FILTER (WHERE status = 'invited') AS invited,
+           COUNT(*) FILTER (WHERE status = 'in_progress') AS in_progress,
+           COUNT(*) FILTER (WHERE status = 'completed') AS completed,
+           SUM(answered) AS answers,
+           SUM(quiz_graded) AS quiz_graded,
+           SUM(quiz_correct) AS quiz_correct
+      FROM enrollments
+     GROUP BY course_id
+  ) e ON e.course_id = c.id
+  LEFT JOIN (
+    SELECT slots.course_id,
+           array_agg(COALESCE(done.n, 0) ORDER BY slots.i) AS buckets
+      FROM (SELECT DISTINCT course_id, i FROM enrollments, generate_series(1, 11) AS i) slots
+      LEFT JOIN (
+        SELECT course_id,
+               public.score_bucket(quiz_graded, quiz_correct) AS bucket,
+               COUNT(*)::INTEGER AS n
+          FROM enrollments
+         WHERE status = 'completed'
+         GROUP BY 1, 2
+      ) done ON done.course_id = slots.course_id AND done.bucket = slots.i
+     GROUP BY slots.course_id
+  ) b ON b.course_id = c.id
+ON CONFLICT (course_id) DO UPDATE SET
+  enrolled = EXCLUDED.enrolled,
+  invited = EXCLUDED.invited,
+  in_progress = EXCLUDED.in_progress,
+  completed = EXCLUDED.completed,
+  answers = EXCLUDED.answers,
+  quiz_graded = EXCLUDED.quiz_graded,
+  quiz_correct = EXCLUDED.quiz_correct,
+  score_buckets = EXCLUDED.score_buckets,
+  updated_at = NOW();
+
+-- =============================================================================
+-- E. Update app_meta
+-- =============================================================================
+
+UPDATE app_meta
+SET schema_version = '0007_course_analytics',
+    notes = 'Trigger-maintained course and question analytics aggregates'
+WHERE id = 1;
+
+COMMENT ON TABLE course_stats IS 'Per-course enrollment/answer counters and score distribution (trigger-maintained)';
+COMMENT ON TABLE course_item_stats IS 'Per-question answer and accuracy counters (trigger-maintained)';
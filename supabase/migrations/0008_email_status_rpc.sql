@@ -0,0 +1,47 @@
+-- Adapt MVP - Indexed email status lookup
+-- Migration: 0008_email_status_rpc.sql
+-- Description: RPC used by POST /api/auth/check-email to resolve one email
+-- through the auth.users email index instead of paging through all users.
+
+-- =============================================================================
+-- Rollback Instructions (if needed):
+-- =============================================================================
+-- DROP FUNCTION IF EXISTS public.auth_email_status(TEXT);
+
+-- =============================================================================
+-- A. auth_email_status(email) → (exists, confirmed)
+-- =============================================================================
+-- GoTrue stores emails lower-cased. Its unique email index
+-- (users_email_partial_key) is partial, WHERE is_sso_user = false, so the
+-- query repeats that predicate for the planner to use it. That also leaves
+-- at most one row: SSO accounts sharing the address are not password
+-- logins and are not reported. Safe to re-run (CREATE OR REPLACE).
+
+CREATE OR REPLACE FUNCTION public.auth_email_status(p_email TEXT)
+RETURNS TABLE (user_exists BOOLEAN, confirmed BOOLEAN)
+SECURITY DEFINER
+SET search_path = public, auth
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT TRUE, u.email_confirmed_at IS NOT NULL
+    FROM auth.users u
+   WHERE u.email = lower(trim(p_email))
+     AND u.is_sso_user = false;
+$$;
+
+-- Only the backend (service role) may probe emails
+REVOKE ALL ON FUNCTION public.auth_email_status(TEXT) FROM PUBLIC;
+REVOKE ALL ON FUNCTION public.auth_email_status(TEXT) FROM anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.auth_email_status(TEXT) TO service_role;
+
+-- =============================================================================
+-- B. Update app_meta
+-- =============================================================================
+
+UPDATE app_meta
+SET schema_version = '0008_email_status_rpc',
+    notes = 'Indexed auth email status lookup for check-email'
+WHERE id = 1;
+
+COMMENT ON FUNCTION public.auth_email_status(TEXT) IS 'Exists/confirmed status for one email (service role only)';
@@ -0,0 +1,125 @@
+-- Adapt MVP - Atomic course save
+-- Migration: 0009_save_course_rpc.sql
+-- Description: RPC used by the DB course store (COURSE_STORE=db) to write a
+-- course and its questions in one transaction. Questions are upserted by
+-- their stable id and only the removed ones are deleted, so re-finalizing a
+-- course keeps employee answers to unchanged questions. Requires 0006/0007.
+
+-- =============================================================================
+-- Rollback Instructions (if needed):
+-- =============================================================================
+-- DROP FUNCTION IF EXISTS public.save_course(JSONB, JSONB);
+
+-- =============================================================================
+-- A. save_course(course, items)
+-- =============================================================================
+-- p_course: courses columns (id, created_by, title, size, created_at,
+--           overall_status, text_bytes, invite_code, files, quiz_count, open_count)
+-- p_items:  course_items rows, or NULL to leave the questions untouched
+--
+-- Answers to removed questions are deleted before the questions themselves,
+-- while the course_items row still exists, so the 0007 answers trigger can
+-- take them out of course_stats (a cascaded delete could not join back to
+-- the course). An invite code taken by another course raises 23505 on
+-- idx_courses_invite_code; a course id owned by someone else raises 42501.
+
+CREATE OR REPLACE FUNCTION public.save_course(p_course JSONB, p_items JSONB)
+RETURNS VOID
+SECURITY DEFINER
+SET search_path = public
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_id UUID := (p_course->>'id')::UUID;
+  v_owner UUID := (p_course->>'created_by')::UUID;
+  v_keep UUID[];
+BEGIN
+  INSERT INTO courses (
+    id, created_by, title, size, created_at, overall_status, text_bytes,
+    invite_code, files, quiz_count, open_count
+  )
+  VALUES (
+    v_id,
+    v_owner,
+    p_course->>'title',
+    p_course->>'size',
+    COALESCE((p_course->>'created_at')::TIMESTAMPTZ, NOW()),
+    COALESCE(p_course->>'overall_status', 'ready'),
+    COALESCE((p_course->>'text_bytes')::BIGINT, 0),
+    NULLIF(p_course->>'invite_code', ''),
+    COALESCE(p_course->'files', '[]'::JSONB),
+    COALESCE((p_course->>'quiz_count')::INTEGER, 0),
+    COALESCE((p_course->>'open_count')::INTEGER, 0)
+  )
+  ON CONFLICT (id) DO UPDATE SET
+    title = EXCLUDED.title,
+    size = EXCLUDED.size,
+    created_at = COALESCE((p_course->>'created_at')::TIMESTAMPTZ, courses.created_at),
+    overall_status = EXCLUDED.overall_status,
+    text_bytes = EXCLUDED.text_bytes,
+    invite_code = EXCLUDED.invite_code,
+    files = EXCLUDED.files,
+    quiz_count = EXCLUDED.quiz_count,
+    open_count = EXCLUDED.open_count
+  WHERE courses.created_by IS NOT DISTINCT FROM EXCLUDED.created_by;
+
+  IF NOT FOUND THEN
+    RAISE EXCEPTION 'course % belongs to another user', v_id USING ERRCODE = '42501';
+  END IF;
+
+  IF p_items IS NULL THEN
+    RETURN;
+  END IF;
+
+  SELECT COALESCE(array_agg((item->>'id')::UUID), '{}')
+    INTO v_keep
+    FROM jsonb_array_elements(p_items) AS item;
+
+  DELETE FROM answers a
+   USING course_items ci
+   WHERE a.course_item_id = ci.id
+     AND ci.course_id = v_id
+     AND ci.id <> ALL (v_keep);
+
+  DELETE FROM course_items
+   WHERE course_id = v_id
+     AND id <> ALL (v_keep);
+
+  INSERT INTO course_items (
+    id, course_id, type, prompt, options, correct_option,
+    expected_answer, explanation, tag, order_index
+  )
+  SELECT i.id, v_id, i.type, i.prompt, i.options, i.correct_option,
+         i.expected_answer, i.explanation, i.tag, i.order_index
+    FROM jsonb_to_recordset(p_items) AS i(
+      id UUID, type TEXT, prompt TEXT, options JSONB, correct_option INTEGER,
+      expected_answer TEXT, explanation TEXT, tag TEXT, order_index INTEGER
+    )
+  ON CONFLICT (id) DO UPDATE SET
+    type = EXCLUDED.type,
+    prompt = EXCLUDED.prompt,
+    options = EXCLUDED.options,
+    correct_option = EXCLUDED.correct_option,
+    expected_answer = EXCLUDED.expected_answer,
+    explanation = EXCLUDED.explanation,
+    tag = EXCLUDED.tag,
+    order_index = EXCLUDED.order_index
+  WHERE course_items.course_id = EXCLUDED.course_id;
+END;
+$$;
+
+-- Only the backend (service role) writes courses
+REVOKE ALL ON FUNCTION public.save_course(JSONB, JSONB) FROM PUBLIC;
+REVOKE ALL ON FUNCTION public.save_course(JSONB, JSONB) FROM anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.save_course(JSONB, JSONB) TO service_role;
+
+-- =============================================================================
+-- B. Update app_meta
+-- =============================================================================
+
+UPDATE app_meta
+SET schema_version = '0009_save_course_rpc',
+    notes = 'Atomic course save that keeps answers to unchanged questions'
+WHERE id = 1;
+
+COMMENT ON FUNCTION public.save_course(JSONB, JSONB) IS 'Upsert a course and its questions in one transaction (service role only)';
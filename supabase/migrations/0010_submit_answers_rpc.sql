@@ -0,0 +1,98 @@
+-- Adapt MVP - One-call answer submission
+-- Migration: 0010_submit_answers_rpc.sql
+-- Description: RPC used by POST /api/courses/{id}/answers to create or
+-- advance the enrollment, upsert a graded batch of answers and complete the
+-- enrollment once every question is answered, in a single round trip and
+-- transaction. Requires 0006/0007.
+
+-- =============================================================================
+-- Rollback Instructions (if needed):
+-- =============================================================================
+-- DROP FUNCTION IF EXISTS public.submit_answers(UUID, UUID, JSONB, BOOLEAN);
+
+-- =============================================================================
+-- A. submit_answers(course, employee, rows, complete) → enrollment state
+-- =============================================================================
+-- p_rows: answers rows graded by the API
+--         [{course_item_id, answer_text, answer_option, is_correct}, ...]
+--
+-- The enrollment insert is ON CONFLICT DO NOTHING followed by a row lock, so
+-- concurrent first submissions never reset status/started_at. Completion
+-- compares the enrollment's distinct answered questions (all batches, not
+-- just this one) with the course's question count.
+
+CREATE OR REPLACE FUNCTION public.submit_answers(
+  p_course_id UUID,
+  p_employee_id UUID,
+  p_rows JSONB,
+  p_complete BOOLEAN DEFAULT FALSE
+)
+RETURNS TABLE (enrollment_id UUID, status TEXT, answered INTEGER, total INTEGER)
+SECURITY DEFINER
+SET search_path = public
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_id UUID;
+  v_status TEXT;
+  v_completed_at TIMESTAMPTZ;
+  v_answered INTEGER;
+  v_total INTEGER;
+BEGIN
+  INSERT INTO enrollments (course_id, employee_id, status, started_at)
+  VALUES (p_course_id, p_employee_id, 'in_progress', NOW())
+  ON CONFLICT ON CONSTRAINT unique_enrollment DO NOTHING;
+
+  SELECT e.id, e.status, e.completed_at INTO v_id, v_status, v_completed_at
+    FROM enrollments e
+   WHERE e.course_id = p_course_id AND e.employee_id = p_employee_id
+     FOR UPDATE;
+
+  INSERT INTO answers (enrollment_id, course_item_id, answer_text, answer_option, is_correct)
+  SELECT v_id, r.course_item_id, r.answer_text, r.answer_option, r.is_correct
+    FROM jsonb_to_recordset(COALESCE(p_rows, '[]'::JSONB)) AS r(
+      course_item_id UUID, answer_text TEXT, answer_option INTEGER, is_correct BOOLEAN
+    )
+  ON CONFLICT ON CONSTRAINT unique_answer DO UPDATE SET
+    answer_text = EXCLUDED.answer_text,
+    answer_option = EXCLUDED.answer_option,
+    is_correct = EXCLUDED.is_correct;
+
+  SELECT COUNT(*) INTO v_answered FROM answers a WHERE a.enrollment_id = v_id;
+  SELECT COUNT(*) INTO v_total FROM course_items ci WHERE ci.course_id = p_course_id;
+
+  IF v_status <> 'completed' AND (p_complete OR (v_total > 0 AND v_answered >= v_total)) THEN
+    v_status := 'completed';
+    v_completed_at := NOW();
+  ELSIF v_status = 'invited' THEN
+    v_status := 'in_progress';
+  END IF;
+
+  UPDATE enrollments e
+     SET status = v_status,
+         started_at = COALESCE(e.started_at, NOW()),
+         completed_at = v_completed_at
+   WHERE e.id = v_id
+     AND (e.status IS DISTINCT FROM v_status
+          OR e.started_at IS NULL
+          OR e.completed_at IS DISTINCT FROM v_completed_at);
+
+  RETURN QUERY SELECT v_id, v_status, v_answered, v_total;
+END;
+$$;
+
+-- Only the backend (service role) records answers
+REVOKE ALL ON FUNCTION public.submit_answers(UUID, UUID, JSONB, BOOLEAN) FROM PUBLIC;
+REVOKE ALL ON FUNCTION public.submit_answers(UUID, UUID, JSONB, BOOLEAN) FROM anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.submit_answers(UUID, UUID, JSONB, BOOLEAN) TO service_role;
+
+-- =============================================================================
+-- B. Update app_meta
+-- =============================================================================
+
+UPDATE app_meta
+SET schema_version = '0010_submit_answers_rpc',
+    notes = 'Single-call answer submission with cumulative completion'
+WHERE id = 1;
+
+COMMENT ON FUNCTION public.submit_answers(UUID, UUID, JSONB, BOOLEAN) IS 'Enrollment + answers upsert + completion in one transaction (service role only)';